@@ -1,6 +1,6 @@
 {
     "name": "BerpIA - Blockchain Core",
-    "version": "18.0.1.0.0",
+    "version": "18.0.1.0.1",
     "category": "BerpIA",
     "author": "Pedro Pereira Vaz",
     "website": "https://wavext.io",
@@ -21,6 +21,10 @@
         "views/res_config_settings_views.xml",
         "views/verification_template.xml",
         "views/blockchain_registry_entry_views.xml",
+        "views/blockchain_registry_archive_views.xml",
+        "views/blockchain_merkle_batch_views.xml",
+        "views/blockchain_queue_lane_views.xml",
+        "views/blockchain_stats_snapshot_views.xml",
         "views/blockchain_menu_views.xml",
         "data/mail_template_data.xml",
     ],
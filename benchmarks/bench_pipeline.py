@@ -0,0 +1,260 @@
+"""
+Benchmark del pipeline cola -> envío -> confirmación contra la cadena simulada.
+
+Arranca `mock_chain` en proceso, apunta la configuración del módulo a ella,
+siembra N entradas (o registra N documentos de un modelo con el mixin) y
+ejecuta los crons en bucle hasta que todas quedan confirmadas. Informa de:
+
+- documentos por segundo,
+- llamadas RPC y peticiones HTTP por documento,
+- consultas SQL por documento (solo las de los crons),
+- p50/p99 de latencia de cola a `confirmed`,
+- tiempo por fase (cola, recibos, indexador).
+
+Usar SIEMPRE una base de datos desechable con el módulo instalado: los crons
+hacen commit. La configuración previa se restaura al terminar.
+
+    python benchmarks/bench_pipeline.py -c odoo.conf -d bench_db --docs 2000 \\
+        --latency 0.05 --wallets 4 --engine async --mode single
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_chain import CHAIN_ID, CONTRACT_ADDRESS, MockChain, serve_in_thread  # noqa: E402
+
+PARAM_PREFIX = "berpia_blockchain_core."
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = max(math.ceil(pct / 100 * len(values)) - 1, 0)
+    return values[index]
+
+
+def sql_count(cr):
+    return getattr(cr, "sql_log_count", 0)
+
+
+def configure(env, rpc_url, args):
+    """Apunta el módulo a la cadena simulada; devuelve los valores previos"""
+    settings = {
+        "rpc_url": rpc_url,
+        "contract_address": CONTRACT_ADDRESS,
+        "chain_id": str(CHAIN_ID),
+        "max_gas_price_gwei": "1000",
+        "queue_batch_size": str(args.batch_size),
+        "receipt_batch_size": str(args.receipt_batch_size),
+        "merkle_batch_size": str(args.merkle_batch_size),
+        "anchoring_mode": args.mode,
+        "engine": args.engine,
+        "async_concurrency": str(args.concurrency),
+        "indexer_start_block": "0",
+    }
+    params = env["ir.config_parameter"].sudo()
+    previous = {key: params.get_param(PARAM_PREFIX + key) for key in settings}
+    for key, value in settings.items():
+        params.set_param(PARAM_PREFIX + key, value)
+    params.set_param(PARAM_PREFIX + "indexer_last_block", False)
+    return previous
+
+
+def restore(env, previous):
+    params = env["ir.config_parameter"].sudo()
+    for key, value in previous.items():
+        params.set_param(PARAM_PREFIX + key, value or False)
+
+
+def seed(env, args, run_id):
+    """Crea las entradas a medir; devuelve (entradas, métricas de la siembra)"""
+    cr = env.cr
+    started, queries = time.perf_counter(), sql_count(cr)
+    if args.mixin_model:
+        domain = json.loads(args.mixin_domain)
+        records = env[args.mixin_model].search(domain, limit=args.docs)
+        records.action_blockchain_register()
+        entries = records.blockchain_entry_id
+    else:
+        entries = env["blockchain.registry.entry"].create(
+            [
+                {
+                    "content_hash": hashlib.sha256(f"{run_id}-{i}".encode()).hexdigest(),
+                    "status": "pending",
+                }
+                for i in range(args.docs)
+            ]
+        )
+    env.flush_all()
+    metrics = {
+        "seconds": time.perf_counter() - started,
+        "sql_queries": sql_count(cr) - queries,
+        "documents": len(entries),
+    }
+    cr.commit()
+    return entries, metrics
+
+
+def run(env, args, chain, rpc_url):
+    cr = env.cr
+    Entry = env["blockchain.registry.entry"]
+    run_id = uuid.uuid4().hex
+    previous = configure(env, rpc_url, args)
+    cr.commit()
+
+    entries, seed_metrics = seed(env, args, run_id)
+    steps = [("queue", "process_blockchain_queue"), ("receipts", "check_transaction_receipts")]
+    if args.indexer:
+        steps.append(("indexer", "index_contract_events"))
+    phases = {name: {"seconds": 0.0, "sql_queries": 0, "runs": 0} for name, _m in steps}
+
+    waiting = set(entries.ids)
+    confirmed_at, failed = {}, 0
+    rpc_before = chain.stats()
+    started = time.perf_counter()
+    try:
+        while waiting and time.perf_counter() - started < args.timeout:
+            for name, method in steps:
+                t0, q0 = time.perf_counter(), sql_count(cr)
+                getattr(Entry, method)()
+                env.flush_all()
+                cr.commit()
+                phases[name]["seconds"] += time.perf_counter() - t0
+                phases[name]["sql_queries"] += sql_count(cr) - q0
+                phases[name]["runs"] += 1
+
+            cr.execute(
+                "SELECT id, status FROM blockchain_registry_entry WHERE id = ANY(%s) AND status IN ('confirmed', 'error')",
+                (list(waiting),),
+            )
+            now = time.perf_counter() - started
+            for entry_id, status in cr.fetchall():
+                waiting.discard(entry_id)
+                if status == "confirmed":
+                    confirmed_at[entry_id] = now
+                else:
+                    failed += 1
+            if waiting:
+                time.sleep(args.poll)
+        elapsed = time.perf_counter() - started
+    finally:
+        restore(env, previous)
+        if not args.keep:
+            batches = entries.merkle_batch_id
+            entries.unlink()
+            batches.unlink()
+        cr.commit()
+
+    rpc_after = chain.stats()
+    done = len(confirmed_at) or 1
+    latencies = list(confirmed_at.values())
+    sql_total = sum(phase["sql_queries"] for phase in phases.values())
+    return {
+        "documents": len(entries),
+        "confirmed": len(confirmed_at),
+        "failed": failed,
+        "timed_out": len(waiting),
+        "elapsed_seconds": round(elapsed, 3),
+        "docs_per_second": round(len(confirmed_at) / elapsed, 2) if elapsed else 0.0,
+        "rpc_calls_per_doc": round((rpc_after["rpc_calls"] - rpc_before["rpc_calls"]) / done, 2),
+        "http_requests_per_doc": round(
+            (rpc_after["http_requests"] - rpc_before["http_requests"]) / done, 2
+        ),
+        "sql_queries_per_doc": round(sql_total / done, 2),
+        "latency_p50_seconds": round(percentile(latencies, 50), 3),
+        "latency_p99_seconds": round(percentile(latencies, 99), 3),
+        "seed": seed_metrics,
+        "phases": phases,
+        "rpc_calls_by_method": {
+            method: count - rpc_before["calls_by_method"].get(method, 0)
+            for method, count in rpc_after["calls_by_method"].items()
+        },
+    }
+
+
+def print_report(report, args):
+    print(
+        f"\nmode={args.mode} engine={args.engine} wallets={args.wallets} "
+        f"latency={args.latency}s block_time={args.block_time}s"
+    )
+    print(f"  documents            {report['confirmed']}/{report['documents']} confirmed "
+          f"({report['failed']} failed, {report['timed_out']} timed out)")
+    print(f"  elapsed              {report['elapsed_seconds']} s")
+    print(f"  docs/s               {report['docs_per_second']}")
+    print(f"  RPC calls/doc        {report['rpc_calls_per_doc']}")
+    print(f"  HTTP requests/doc    {report['http_requests_per_doc']}")
+    print(f"  SQL queries/doc      {report['sql_queries_per_doc']}")
+    print(f"  latency p50 / p99    {report['latency_p50_seconds']} s / {report['latency_p99_seconds']} s")
+    print(f"  seed                 {report['seed']['seconds']:.3f} s, "
+          f"{report['seed']['sql_queries']} SQL queries")
+    for name, phase in report["phases"].items():
+        print(f"  phase {name:<14} {phase['seconds']:.3f} s in {phase['runs']} runs, "
+              f"{phase['sql_queries']} SQL queries")
+    for method, count in sorted(report["rpc_calls_by_method"].items()):
+        print(f"    {method:<28} {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Queue/receipt pipeline benchmark against a mock chain")
+    parser.add_argument("-c", "--config", help="Odoo configuration file")
+    parser.add_argument("-d", "--database", required=True, help="Disposable database with the module installed")
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--wallets", type=int, default=1)
+    parser.add_argument("--mode", choices=["single", "merkle"], default="single")
+    parser.add_argument("--engine", choices=["sync", "async"], default="sync")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--receipt-batch-size", type=int, default=100)
+    parser.add_argument("--merkle-batch-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per RPC HTTP request")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--block-time", type=float, default=1.0)
+    parser.add_argument("--poll", type=float, default=0.5, help="Pause between cron rounds")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--indexer", action="store_true", help="Also run index_contract_events")
+    parser.add_argument("--mixin-model", help="Register records of this model via action_blockchain_register")
+    parser.add_argument("--mixin-domain", default="[]", help="JSON domain for --mixin-model")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark entries")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    import odoo
+    from eth_account import Account
+    from odoo import SUPERUSER_ID, api
+
+    odoo_args = ["-d", args.database] + (["-c", args.config] if args.config else [])
+    odoo.tools.config.parse_config(odoo_args)
+
+    # Claves efímeras: la cadena simulada acepta cualquier emisor
+    os.environ["ODOO_BLOCKCHAIN_PRIVATE_KEYS"] = ",".join(
+        "0x" + bytes(Account.create().key).hex() for _i in range(args.wallets)
+    )
+    chain = MockChain(block_time=args.block_time)
+    chain.start_mining()
+    server, rpc_url = serve_in_thread(chain, latency=args.latency, jitter=args.jitter)
+    try:
+        registry = odoo.modules.registry.Registry(args.database)
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            report = run(env, args, chain, rpc_url)
+    finally:
+        server.shutdown()
+        chain.stop()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+"""
+Cadena EVM simulada para los benchmarks (sin red, sin nodo real).
+
+Servidor JSON-RPC en proceso que implementa lo que usa el módulo: envío de
+transacciones firmadas (legacy y EIP-1559), recibos, bloques, logs, fee
+history y `eth_call` de verifyDocument. El contrato UniversalDocumentRegistry
+se emula en memoria en `CONTRACT_ADDRESS` con la misma semántica que el ABI
+de `models/abi.py` (registro, revocación por el emisor y eventos).
+
+Se minan bloques cada `block_time` segundos y cada petición HTTP espera
+`latency` segundos (± `jitter`) para reproducir un proveedor remoto.
+
+Uso independiente:
+
+    python benchmarks/mock_chain.py --port 8545 --latency 0.05 --block-time 1
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import rlp
+from eth_abi import encode as abi_encode
+from eth_account import Account
+from eth_utils import keccak
+
+CONTRACT_ADDRESS = "0x00000000000000000000000000000000000b10c5"
+CHAIN_ID = 31337
+BASE_FEE = 10 * 10**9
+PRIORITY_FEE = 10**9
+GAS_ESTIMATE = 100000
+
+
+def _selector(signature):
+    return keccak(text=signature)[:4]
+
+
+SELECTORS = {
+    _selector("registerDocument(bytes32)"): "registerDocument",
+    _selector("revokeDocument(bytes32)"): "revokeDocument",
+    _selector("verifyDocument(bytes32)"): "verifyDocument",
+}
+TOPIC_REGISTERED = "0x" + keccak(text="DocumentRegistered(bytes32,address)").hex()
+TOPIC_REVOKED = "0x" + keccak(text="DocumentRevoked(bytes32,address)").hex()
+
+
+def _hex(value):
+    return hex(value)
+
+
+def _int(value):
+    if isinstance(value, str):
+        return int(value, 16)
+    return int(value or 0)
+
+
+def _to_int(raw):
+    return int.from_bytes(raw, "big") if raw else 0
+
+
+def _topic_address(address):
+    return "0x" + address[2:].lower().rjust(64, "0")
+
+
+class RpcError(Exception):
+    def __init__(self, message, code=-32000):
+        super().__init__(message)
+        self.code = code
+
+
+class MockChain:
+    """Estado de la cadena simulada; todos los métodos son seguros entre hilos"""
+
+    def __init__(self, block_time=1.0, issuer_name="Benchmark Issuer", issuer_tax_id="B00000000"):
+        self.block_time = block_time
+        self.issuer_name = issuer_name
+        self.issuer_tax_id = issuer_tax_id
+        self.lock = threading.RLock()
+        self.blocks = [self._new_block(0, [])]
+        self.mempool = {}  # (sender, nonce) -> tx
+        self.transactions = {}  # tx_hash -> tx
+        self.receipts = {}  # tx_hash -> receipt
+        self.confirmed_nonce = {}  # sender -> siguiente nonce minado
+        self.documents = {}  # hash -> {"issuer", "timestamp", "revoked"}
+        self.logs = []
+        self.rpc_calls = 0
+        self.http_requests = 0
+        self.calls_by_method = {}
+        self._stop = threading.Event()
+
+    # --- Bloques ---
+
+    def _new_block(self, number, tx_hashes):
+        return {
+            "number": number,
+            "timestamp": int(time.time()),
+            "hash": "0x" + keccak(f"block-{number}-{time.time()}".encode()).hex(),
+            "transactions": tx_hashes,
+        }
+
+    def start_mining(self):
+        def loop():
+            while not self._stop.wait(self.block_time):
+                self.mine()
+
+        threading.Thread(target=loop, name="mock-chain-miner", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def mine(self):
+        """Incluye en un bloque nuevo las transacciones con nonce consecutivo"""
+        with self.lock:
+            number = len(self.blocks)
+            block = self._new_block(number, [])
+            by_sender = {}
+            for (sender, nonce), tx in self.mempool.items():
+                by_sender.setdefault(sender, {})[nonce] = tx
+            for sender, txs in by_sender.items():
+                nonce = self.confirmed_nonce.get(sender, 0)
+                while nonce in txs:
+                    tx = txs[nonce]
+                    self._execute(tx, block, len(block["transactions"]))
+                    block["transactions"].append(tx["hash"])
+                    del self.mempool[(sender, nonce)]
+                    nonce += 1
+                self.confirmed_nonce[sender] = nonce
+            self.blocks.append(block)
+
+    def _execute(self, tx, block, index):
+        """Aplica la llamada al contrato emulado y genera recibo y eventos"""
+        status, logs = 1, []
+        call = tx.get("call")
+        if tx["to"] == CONTRACT_ADDRESS and call:
+            function, doc_hash = call
+            document = self.documents.get(doc_hash)
+            if function == "registerDocument":
+                if document:
+                    status = 0  # Ya registrado: revert
+                else:
+                    self.documents[doc_hash] = {
+                        "issuer": tx["from"],
+                        "timestamp": block["timestamp"],
+                        "revoked": False,
+                    }
+                    logs.append(TOPIC_REGISTERED)
+            elif function == "revokeDocument":
+                if not document or document["revoked"] or document["issuer"] != tx["from"]:
+                    status = 0
+                else:
+                    document["revoked"] = True
+                    logs.append(TOPIC_REVOKED)
+
+        receipt_logs = []
+        for topic in logs:
+            log = {
+                "address": CONTRACT_ADDRESS,
+                "topics": [topic, "0x" + call[1], _topic_address(tx["from"])],
+                "data": "0x",
+                "blockNumber": _hex(block["number"]),
+                "blockHash": block["hash"],
+                "transactionHash": tx["hash"],
+                "transactionIndex": _hex(index),
+                "logIndex": _hex(len(self.logs)),
+                "removed": False,
+            }
+            self.logs.append(log)
+            receipt_logs.append(log)
+
+        self.receipts[tx["hash"]] = {
+            "transactionHash": tx["hash"],
+            "transactionIndex": _hex(index),
+            "blockNumber": _hex(block["number"]),
+            "blockHash": block["hash"],
+            "from": tx["from"],
+            "to": tx["to"],
+            "status": _hex(status),
+            "gasUsed": _hex(GAS_ESTIMATE // 2),
+            "cumulativeGasUsed": _hex(GAS_ESTIMATE // 2),
+            "effectiveGasPrice": _hex(BASE_FEE + PRIORITY_FEE),
+            "contractAddress": None,
+            "logs": receipt_logs,
+            "logsBloom": "0x" + "00" * 256,
+            "type": _hex(tx["type"]),
+        }
+
+    # --- Transacciones ---
+
+    def _decode_raw(self, raw_hex):
+        raw = bytes.fromhex(raw_hex[2:])
+        if raw[0] == 2:
+            fields = rlp.decode(raw[1:])
+            nonce, to, data, tx_type = fields[1], fields[5], fields[7], 2
+        elif raw[0] >= 0xC0:
+            fields = rlp.decode(raw)
+            nonce, to, data, tx_type = fields[0], fields[3], fields[5], 0
+        else:
+            raise RpcError(f"Unsupported transaction type {raw[0]}")
+        call = None
+        if len(data) == 36 and data[:4] in SELECTORS:
+            call = (SELECTORS[data[:4]], data[4:].hex())
+        return {
+            "hash": "0x" + keccak(raw).hex(),
+            "from": Account.recover_transaction(raw).lower(),
+            "to": "0x" + to.hex() if to else None,
+            "nonce": _to_int(nonce),
+            "type": tx_type,
+            "call": call,
+        }
+
+    def send_raw_transaction(self, raw_hex):
+        tx = self._decode_raw(raw_hex)
+        with self.lock:
+            if tx["nonce"] < self.confirmed_nonce.get(tx["from"], 0):
+                raise RpcError("nonce too low")
+            # Mismo nonce pendiente: reemplazo (no se comprueba la subida de comisión)
+            self.mempool[(tx["from"], tx["nonce"])] = tx
+            self.transactions[tx["hash"]] = tx
+        return tx["hash"]
+
+    def transaction_count(self, address, block):
+        address = address.lower()
+        with self.lock:
+            nonce = self.confirmed_nonce.get(address, 0)
+            if block == "pending":
+                while (address, nonce) in self.mempool:
+                    nonce += 1
+            return nonce
+
+    # --- Lecturas ---
+
+    def verify_document(self, doc_hash):
+        document = self.documents.get(doc_hash)
+        if not document:
+            return abi_encode(
+                ["bool", "string", "string", "uint256", "address"],
+                [False, "", "", 0, "0x" + "00" * 20],
+            )
+        return abi_encode(
+            ["bool", "string", "string", "uint256", "address"],
+            [
+                not document["revoked"],
+                self.issuer_name,
+                self.issuer_tax_id,
+                document["timestamp"],
+                document["issuer"],
+            ],
+        )
+
+    def block_payload(self, number):
+        block = self.blocks[number]
+        return {
+            "number": _hex(block["number"]),
+            "hash": block["hash"],
+            "parentHash": self.blocks[number - 1]["hash"] if number else "0x" + "00" * 32,
+            "timestamp": _hex(block["timestamp"]),
+            "baseFeePerGas": _hex(BASE_FEE),
+            "gasLimit": _hex(30_000_000),
+            "gasUsed": _hex(len(block["transactions"]) * GAS_ESTIMATE // 2),
+            "miner": "0x" + "00" * 20,
+            "extraData": "0x",
+            "transactions": list(block["transactions"]),
+            "uncles": [],
+        }
+
+    def _resolve_block(self, tag):
+        if tag in ("latest", "pending", "safe", "finalized", None):
+            return len(self.blocks) - 1
+        if tag == "earliest":
+            return 0
+        return _int(tag)
+
+    def get_logs(self, params):
+        start = self._resolve_block(params.get("fromBlock", "latest"))
+        end = self._resolve_block(params.get("toBlock", "latest"))
+        topics = params.get("topics") or []
+        result = []
+        for log in self.logs:
+            if not start <= _int(log["blockNumber"]) <= end:
+                continue
+            matched = True
+            for position, wanted in enumerate(topics):
+                if wanted is None:
+                    continue
+                wanted = wanted if isinstance(wanted, list) else [wanted]
+                if log["topics"][position].lower() not in [w.lower() for w in wanted]:
+                    matched = False
+                    break
+            if matched:
+                result.append(log)
+        return result
+
+    # --- Despacho JSON-RPC ---
+
+    def handle(self, method, params):
+        with self.lock:
+            self.rpc_calls += 1
+            self.calls_by_method[method] = self.calls_by_method.get(method, 0) + 1
+            latest = len(self.blocks) - 1
+
+            if method == "web3_clientVersion":
+                return "MockChain/1.0"
+            if method == "eth_chainId":
+                return _hex(CHAIN_ID)
+            if method == "net_version":
+                return str(CHAIN_ID)
+            if method == "eth_blockNumber":
+                return _hex(latest)
+            if method == "eth_gasPrice":
+                return _hex(BASE_FEE + PRIORITY_FEE)
+            if method == "eth_maxPriorityFeePerGas":
+                return _hex(PRIORITY_FEE)
+            if method == "eth_feeHistory":
+                count = min(_int(params[0]), latest + 1)
+                return {
+                    "oldestBlock": _hex(latest - count + 1),
+                    "baseFeePerGas": [_hex(BASE_FEE)] * (count + 1),
+                    "gasUsedRatio": [0.5] * count,
+                    "reward": [[_hex(PRIORITY_FEE)] for _i in range(count)],
+                }
+            if method == "eth_getBalance":
+                return _hex(10**21)
+            if method == "eth_estimateGas":
+                return _hex(GAS_ESTIMATE)
+            if method == "eth_getTransactionCount":
+                return _hex(self.transaction_count(params[0], params[1]))
+            if method == "eth_sendRawTransaction":
+                return self.send_raw_transaction(params[0])
+            if method == "eth_getTransactionReceipt":
+                return self.receipts.get(params[0])
+            if method == "eth_getTransactionByHash":
+                tx = self.transactions.get(params[0])
+                if not tx:
+                    return None
+                return {"hash": tx["hash"], "from": tx["from"], "nonce": _hex(tx["nonce"])}
+            if method == "eth_getBlockByNumber":
+                number = self._resolve_block(params[0])
+                return self.block_payload(number) if number <= latest else None
+            if method == "eth_getLogs":
+                return self.get_logs(params[0])
+            if method == "eth_call":
+                data = bytes.fromhex(params[0].get("data", params[0].get("input", "0x"))[2:])
+                if SELECTORS.get(data[:4]) == "verifyDocument":
+                    return "0x" + self.verify_document(data[4:36].hex()).hex()
+                return "0x"
+        raise RpcError(f"Method {method} not supported by the mock chain", code=-32601)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "rpc_calls": self.rpc_calls,
+                "http_requests": self.http_requests,
+                "calls_by_method": dict(self.calls_by_method),
+                "blocks": len(self.blocks),
+                "mempool": len(self.mempool),
+            }
+
+
+def make_server(chain, host="127.0.0.1", port=0, latency=0.0, jitter=0.0):
+    """Servidor HTTP JSON-RPC (admite peticiones batch) sobre `chain`"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _answer(self, request):
+            try:
+                result = chain.handle(request.get("method"), request.get("params") or [])
+                return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+            except RpcError as e:
+                return {
+                    "jsonrpc": "2.0",
+                    "id": request.get("id"),
+                    "error": {"code": e.code, "message": str(e)},
+                }
+            except Exception as e:
+                return {
+                    "jsonrpc": "2.0",
+                    "id": request.get("id"),
+                    "error": {"code": -32603, "message": f"Internal error: {e}"},
+                }
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            with chain.lock:
+                chain.http_requests += 1
+            if latency or jitter:
+                time.sleep(max(latency + random.uniform(-jitter, jitter), 0))
+            if isinstance(body, list):
+                payload = [self._answer(request) for request in body]
+            else:
+                payload = self._answer(body)
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def serve_in_thread(chain, **kwargs):
+    """Arranca el servidor en segundo plano; devuelve (servidor, url)"""
+    server = make_server(chain, **kwargs)
+    threading.Thread(target=server.serve_forever, name="mock-chain-rpc", daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per HTTP request")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--block-time", type=float, default=1.0)
+    args = parser.parse_args()
+
+    chain = MockChain(block_time=args.block_time)
+    chain.start_mining()
+    server = make_server(chain, args.host, args.port, args.latency, args.jitter)
+    print(f"Mock chain {CHAIN_ID} on http://{args.host}:{args.port}, contract {CONTRACT_ADDRESS}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        chain.stop()
+
+
+if __name__ == "__main__":
+    main()
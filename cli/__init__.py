@@ -0,0 +1 @@
+from . import audit_export
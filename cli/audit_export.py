@@ -0,0 +1,60 @@
+import argparse
+import sys
+from pathlib import Path
+
+import odoo
+from odoo import SUPERUSER_ID, api, fields
+from odoo.cli import Command
+
+from ..models.blockchain_audit_export import FORMATS
+
+
+class BlockchainAuditExport(Command):
+    """Stream blockchain registry entries to a JSONL or CSV file for auditors"""
+
+    name = "blockchain_audit_export"
+
+    def run(self, cmdargs):
+        parser = argparse.ArgumentParser(
+            prog=f"{Path(sys.argv[0]).name} {self.name}", description=self.__doc__
+        )
+        parser.add_argument("-c", "--config", help="Odoo configuration file")
+        parser.add_argument("-d", "--database", required=True)
+        parser.add_argument("-o", "--output", default="-", help="Output file ('-' for stdout)")
+        parser.add_argument("--format", choices=FORMATS, default="jsonl")
+        parser.add_argument("--gzip", action="store_true", help="Compress the output with gzip")
+        parser.add_argument("--status", action="append", help="Only entries in this status (repeatable)")
+        parser.add_argument("--from", dest="date_from", help="Block date from (UTC, inclusive)")
+        parser.add_argument("--to", dest="date_to", help="Block date to (UTC, exclusive)")
+        parser.add_argument("--since", help="Watermark printed by a previous export")
+        parser.add_argument("--chain-data", action="store_true", help="Include block number and log index")
+        parser.add_argument("--no-archive", action="store_true", help="Skip archived entries")
+        args = parser.parse_args(cmdargs)
+
+        odoo.tools.config.parse_config(
+            ["-d", args.database] + (["-c", args.config] if args.config else [])
+        )
+        registry = odoo.modules.registry.Registry(args.database)
+        with registry.cursor() as cr:
+            Export = api.Environment(cr, SUPERUSER_ID, {})["blockchain.audit.export"]
+            until = Export._watermark_now()
+            chunks = Export._stream(
+                args.format,
+                compress=args.gzip,
+                include_chain=args.chain_data,
+                statuses=args.status,
+                date_from=fields.Datetime.to_datetime(args.date_from),
+                date_to=fields.Datetime.to_datetime(args.date_to),
+                since=fields.Datetime.to_datetime(args.since),
+                until=until,
+                include_archive=not args.no_archive,
+            )
+            output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+            try:
+                for chunk in chunks:
+                    output.write(chunk)
+            finally:
+                if output is not sys.stdout.buffer:
+                    output.close()
+        # Marca de agua para la siguiente exportación incremental (--since)
+        print(f"Watermark: {fields.Datetime.to_string(until)}", file=sys.stderr)
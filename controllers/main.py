@@ -1,6 +1,14 @@
-from odoo import http
+import hmac
+import json
+
+from odoo import api, fields, http
 from odoo.http import request
 
+from ..models.blockchain_audit_export import FORMATS
+
+# Hashes admitidos por petición en la verificación en bloque
+MAX_VERIFY_BATCH = 1000
+
 
 class BlockchainVerifierController(http.Controller):
     @http.route(
@@ -19,3 +27,128 @@ class BlockchainVerifierController(http.Controller):
         return request.render(
             "berpia_blockchain_core.verification_page_template", values
         )
+
+    @http.route("/blockchain/merkle_proof", type="json", auth="public")
+    def merkle_proof(self, doc_hash=None, **kwargs):
+        """Prueba de inclusión de un documento anclado en un lote Merkle.
+
+        La prueba no requiere confianza en el servidor: el navegador recalcula
+        la raíz y la consulta directamente en la blockchain.
+        """
+        if not doc_hash:
+            return {}
+        normalized = doc_hash.lower().removeprefix("0x")
+        domain = [
+            ("content_hash", "in", [normalized, "0x" + normalized]),
+            ("merkle_batch_id", "!=", False),
+        ]
+        entry = request.env["blockchain.registry.entry"].sudo().search(domain, limit=1)
+        if not entry:
+            entry = request.env["blockchain.registry.archive"].sudo().search(domain, limit=1)
+        if not entry:
+            return {}
+        return {
+            "root": "0x" + entry.merkle_batch_id.root_hash,
+            "proof": ["0x" + p for p in json.loads(entry.merkle_proof or "[]")],
+            "leaf_index": entry.merkle_leaf_index,
+        }
+
+    @http.route("/blockchain/verify_batch", type="json", auth="public")
+    def verify_batch(self, hashes=None, **kwargs):
+        """Verificación de varios hashes en una sola llamada.
+
+        Los documentos en estado final se responden desde Odoo; el resto se
+        consulta a la cadena en batch y se cachea durante unos minutos.
+        """
+        if not isinstance(hashes, list):
+            return {"error": "hashes must be a list"}
+        if len(hashes) > MAX_VERIFY_BATCH:
+            return {"error": f"At most {MAX_VERIFY_BATCH} hashes per request"}
+        return {
+            "results": request.env["blockchain.registry.entry"]
+            .sudo()
+            ._verify_hashes(hashes)
+        }
+
+    @http.route("/blockchain/metrics", type="http", auth="public", methods=["GET"], csrf=False)
+    def metrics(self, token=None, **kwargs):
+        """Métricas en formato de texto de Prometheus.
+
+        Requiere el token configurado en Ajustes (cabecera Authorization:
+        Bearer o parámetro `token`); sin token configurado la ruta no existe.
+        """
+        expected = (
+            request.env["ir.config_parameter"]
+            .sudo()
+            .get_param("berpia_blockchain_core.metrics_token")
+        )
+        if not expected:
+            return request.not_found()
+        header = request.httprequest.headers.get("Authorization", "")
+        provided = header.removeprefix("Bearer ").strip() if header else token
+        if not provided or not hmac.compare_digest(provided.encode(), expected.encode()):
+            return request.make_response("Forbidden", status=403)
+        body = request.env["blockchain.stats.snapshot"].sudo()._prometheus_text()
+        return request.make_response(
+            body, headers=[("Content-Type", "text/plain; version=0.0.4; charset=utf-8")]
+        )
+
+    @http.route("/blockchain/audit_export", type="http", auth="user", methods=["GET"])
+    def audit_export(
+        self,
+        format="jsonl",
+        gzip=None,
+        status=None,
+        date_from=None,
+        date_to=None,
+        since=None,
+        chain_data=None,
+        archive="1",
+        **kwargs,
+    ):
+        """Exportación para auditoría en streaming (JSONL o CSV, opcionalmente gzip).
+
+        La respuesta se genera por bloques con un cursor propio, así que la
+        memoria no depende del número de entradas. La cabecera
+        X-Audit-Watermark es el valor de `since` de la siguiente exportación
+        incremental.
+        """
+        if not request.env.user.has_group("berpia_blockchain_core.group_blockchain_manager"):
+            return request.make_response("Forbidden", status=403)
+        if format not in FORMATS:
+            return request.make_response(f"format must be one of {', '.join(FORMATS)}", status=400)
+        try:
+            filters = {
+                "statuses": [s for s in (status or "").split(",") if s] or None,
+                "date_from": fields.Datetime.to_datetime(date_from or None),
+                "date_to": fields.Datetime.to_datetime(date_to or None),
+                "since": fields.Datetime.to_datetime(since or None),
+                "include_archive": archive not in ("0", "false"),
+            }
+        except ValueError as e:
+            return request.make_response(str(e), status=400)
+
+        Export = request.env["blockchain.audit.export"]
+        until = Export._watermark_now()
+        compress = gzip in ("1", "true")
+        include_chain = chain_data in ("1", "true")
+        registry, uid = request.env.registry, request.env.uid
+
+        def stream():
+            # El cursor de la petición se cierra al devolver la respuesta
+            with registry.cursor() as cr:
+                export = api.Environment(cr, uid, {})["blockchain.audit.export"]
+                yield from export._stream(
+                    format, compress=compress, include_chain=include_chain, until=until, **filters
+                )
+
+        filename = f"blockchain-audit-{until:%Y%m%dT%H%M%S}.{format}" + (".gz" if compress else "")
+        content_type = "text/csv" if format == "csv" else "application/x-ndjson"
+        return request.make_response(
+            stream(),
+            headers=[
+                ("Content-Type", "application/gzip" if compress else f"{content_type}; charset=utf-8"),
+                ("Content-Disposition", f'attachment; filename="{filename}"'),
+                ("X-Audit-Watermark", fields.Datetime.to_string(until)),
+            ],
+        )
@@ -0,0 +1,21 @@
+"""
+Firma de transacciones para los procesos del pool de firma (ver models/tx_signer.py).
+
+Este fichero no forma parte del paquete del addon: los procesos hijos se
+arrancan con spawn y lo cargan desde su ruta, así que solo puede importar
+eth_account (nada de odoo ni del propio módulo).
+"""
+
+
+def sign_chunk(items):
+    """Firma [(clave, tx)] en el proceso actual: [(raw, hash, error)]"""
+    from eth_account import Account
+
+    signed = []
+    for private_key, transaction in items:
+        try:
+            result = Account.sign_transaction(transaction, private_key)
+            signed.append((bytes(result.raw_transaction), "0x" + bytes(result.hash).hex(), None))
+        except Exception as e:
+            signed.append((None, None, str(e)))
+    return signed
@@ -0,0 +1,40 @@
+"""
+Rellena la wallet emisora de los registros anteriores al soporte de varias
+wallets: entonces todo se firmaba con ODOO_BLOCKCHAIN_PRIVATE_KEY, y sin
+`sender_address` sus revocaciones no sabrían desde qué wallet salir.
+"""
+
+import logging
+import os
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    private_key = os.environ.get("ODOO_BLOCKCHAIN_PRIVATE_KEY", "").strip()
+    if not private_key:
+        _logger.warning(
+            "ODOO_BLOCKCHAIN_PRIVATE_KEY is not set: the sender wallet of existing registrations "
+            "is left empty and their revocations will fail until it is filled in."
+        )
+        return
+    try:
+        from eth_account import Account
+
+        address = Account.from_key(private_key).address
+    except Exception as e:
+        _logger.warning(f"Could not derive the legacy signer wallet, sender wallets not filled in: {e}")
+        return
+    for table in ("blockchain_registry_entry", "blockchain_registry_archive"):
+        cr.execute(
+            f"""
+            UPDATE {table}
+               SET sender_address = %s
+             WHERE sender_address IS NULL
+               AND tx_hash IS NOT NULL
+            """,
+            (address,),
+        )
+        _logger.info(f"Filled in the sender wallet {address} of {cr.rowcount} rows of {table}")
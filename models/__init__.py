@@ -1,3 +1,11 @@
+from . import ir_config_parameter
+from . import ir_http
 from . import blockchain_config
+from . import blockchain_queue_lane
 from . import blockchain_registry_entry
+from . import blockchain_registry_archive
+from . import blockchain_merkle_batch
+from . import blockchain_cron_run
+from . import blockchain_stats_snapshot
+from . import blockchain_audit_export
 from . import blockchain_mixin
@@ -0,0 +1,230 @@
+"""
+Motor asíncrono de envío y comprobación de recibos.
+
+Alternativa al camino síncrono del cron: todas las llamadas a la cadena se
+lanzan con asyncio y un límite de concurrencia, de forma que la duración del
+ciclo depende de ese límite y no del número de entradas. Este módulo no toca
+el ORM; devuelve los resultados para que el cron los escriba en bloque.
+"""
+
+import asyncio
+import logging
+import threading
+from datetime import datetime
+
+from . import metrics, tx_signer
+from .blockchain_client import load_web3
+from .nonce_manager import MAX_RENONCE_ROUNDS, is_nonce_error
+
+_logger = logging.getLogger(__name__)
+
+
+def run(coro):
+    """Ejecuta la corrutina desde código síncrono (crons y acciones de Odoo)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    # Ya hay un bucle activo en este hilo: usamos uno propio en otro hilo
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = asyncio.run(coro)
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=metrics.propagate(target), name="blockchain-async-engine")
+    thread.start()
+    thread.join()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def _connect(rpc_url):
+    AsyncWeb3 = load_web3().AsyncWeb3
+    return AsyncWeb3(metrics.instrument_async_provider(AsyncWeb3.AsyncHTTPProvider(rpc_url)))
+
+
+async def _disconnect(w3):
+    disconnect = getattr(w3.provider, "disconnect", None)
+    if disconnect:
+        try:
+            await disconnect()
+        except Exception as e:
+            _logger.debug(f"Error closing async provider: {e}")
+
+
+async def submit_transactions(
+    rpc_url,
+    contract_address,
+    abi,
+    accounts,
+    jobs_by_wallet,
+    chain_id,
+    fees,
+    concurrency,
+    signing_processes=0,
+):
+    """
+    Firma y envía las transacciones de cada wallet con concurrencia acotada.
+
+    `jobs_by_wallet` es {address: [{"record_id", "function", "hash_bytes"}]} y
+    `fees` los campos de comisión del oráculo (EIP-1559 o gasPrice).
+    Devuelve [(address, [(record_id, tx_hash, error, nonce)])].
+
+    Primero se estima el gas de todas las llamadas (las que revertirían no
+    llegan a consumir nonce), después se asignan nonces consecutivos a partir
+    de una única lectura por wallet, se firma todo el lote fuera del bucle de
+    eventos (ver tx_signer) y por último se difunde en orden de nonce; las
+    wallets avanzan en paralelo.
+    """
+    w3 = _connect(rpc_url)
+    contract = w3.eth.contract(
+        address=w3.to_checksum_address(contract_address), abi=abi
+    )
+    semaphore = asyncio.Semaphore(max(int(concurrency), 1))
+    accounts_by_address = {a.address: a for a in accounts}
+
+    async def limited(awaitable):
+        async with semaphore:
+            return await awaitable
+
+    async def run_wallet(address, jobs):
+        account = accounts_by_address[address]
+
+        async def estimate(job):
+            func = getattr(contract.functions, job["function"])(job["hash_bytes"])
+            try:
+                gas = await limited(func.estimate_gas({"from": address}))
+                return job, func, gas, None
+            except Exception as e:
+                return job, func, None, str(e)
+
+        estimated = await asyncio.gather(*(estimate(job) for job in jobs))
+        results = [
+            (job["record_id"], None, error, None) for job, _f, _g, error in estimated if error
+        ]
+        ready = [(job, func, gas) for job, func, gas, error in estimated if not error]
+        if not ready:
+            return address, results
+
+        first_nonce = await w3.eth.get_transaction_count(address, "pending")
+
+        async def build(job, func, gas, nonce):
+            try:
+                txn = await func.build_transaction(
+                    {
+                        "chainId": chain_id,
+                        "from": address,
+                        "nonce": nonce,
+                        "gas": gas,
+                        **fees,
+                    }
+                )
+                return job, txn, None
+            except Exception as e:
+                return job, None, str(e)
+
+        built = await asyncio.gather(
+            *(build(job, func, gas, first_nonce + i) for i, (job, func, gas) in enumerate(ready))
+        )
+        results += [(job["record_id"], None, error, None) for job, _txn, error in built if error]
+        built = [(job, txn) for job, txn, error in built if not error]
+
+        async def sign(batch):
+            """[(job, txn)] -> [(job, txn, raw, error)], firmado fuera del bucle de eventos"""
+            signed = await asyncio.to_thread(
+                tx_signer.sign_transactions,
+                [(account.key, txn) for _job, txn in batch],
+                signing_processes,
+            )
+            return [
+                (job, txn, raw, error)
+                for (job, txn), (raw, _tx_hash, error) in zip(batch, signed)
+            ]
+
+        # Difusión en orden de nonce: un hueco dejaría las siguientes atascadas
+        # en el mempool, así que tras un fallo el resto se renumera y se firma
+        # de nuevo (como en el camino síncrono)
+        pending, retried, rounds = await sign(built), set(), 0
+        while pending:
+            job, txn, raw, error = pending.pop(0)
+            if raw is not None:
+                try:
+                    tx_hash = await limited(w3.eth.send_raw_transaction(raw))
+                    results.append((job["record_id"], w3.to_hex(tx_hash), None, txn["nonce"]))
+                    continue
+                except Exception as e:
+                    error = e
+            # Si el nodo rechaza el nonce, resincronizamos y reintentamos una sola vez
+            if is_nonce_error(error) and job["record_id"] not in retried:
+                _logger.warning(f"Nonce {txn['nonce']} from {address} rejected: {error}")
+                retried.add(job["record_id"])
+                pending.insert(0, (job, txn, None, None))
+            else:
+                _logger.warning(
+                    f"Async submission with nonce {txn['nonce']} from {address} failed: {error}"
+                )
+                results.append((job["record_id"], None, str(error), None))
+            if not pending:
+                break
+            rounds += 1
+            if rounds > MAX_RENONCE_ROUNDS:
+                message = f"No enviada: fallaron varias transacciones anteriores de la wallet ({error})"
+                results += [(other["record_id"], None, message, None) for other, *_rest in pending]
+                break
+            next_nonce = await w3.eth.get_transaction_count(address, "pending")
+            pending = await sign(
+                [
+                    (other, dict(other_txn, nonce=next_nonce + i))
+                    for i, (other, other_txn, *_rest) in enumerate(pending)
+                ]
+            )
+        return address, results
+
+    try:
+        return await asyncio.gather(
+            *(run_wallet(address, jobs) for address, jobs in jobs_by_wallet.items())
+        )
+    finally:
+        await _disconnect(w3)
+
+
+async def fetch_receipts(rpc_url, tx_hashes, concurrency):
+    """
+    Recibos y timestamps de bloque consultados en paralelo.
+
+    Devuelve ({tx_hash: {"status", "blockNumber"}}, {block_number: datetime}).
+    Las transacciones aún no minadas no aparecen en el resultado.
+    """
+    w3 = _connect(rpc_url)
+    semaphore = asyncio.Semaphore(max(int(concurrency), 1))
+
+    async def receipt(tx_hash):
+        async with semaphore:
+            try:
+                raw = await w3.eth.get_transaction_receipt(tx_hash)
+            except Exception:
+                return tx_hash, None  # Tx no encontrada aún (pending in mempool)
+        return tx_hash, {"status": raw["status"], "blockNumber": raw["blockNumber"]}
+
+    async def block_timestamp(number):
+        async with semaphore:
+            try:
+                block = await w3.eth.get_block(number)
+            except Exception as e:
+                _logger.warning(f"Could not fetch block {number}: {e}")
+                return number, None
+        return number, datetime.fromtimestamp(block["timestamp"])
+
+    try:
+        pairs = await asyncio.gather(*(receipt(h) for h in dict.fromkeys(tx_hashes)))
+        receipts = {tx_hash: r for tx_hash, r in pairs if r}
+        numbers = {r["blockNumber"] for r in receipts.values() if r["status"] == 1}
+        timestamps = await asyncio.gather(*(block_timestamp(n) for n in numbers))
+        return receipts, {n: ts for n, ts in timestamps if ts}
+    finally:
+        await _disconnect(w3)
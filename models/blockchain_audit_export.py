@@ -0,0 +1,170 @@
+import csv
+import io
+import json
+import logging
+import os
+import zlib
+from datetime import timedelta
+from odoo import models, fields, api
+from . import metrics
+
+_logger = logging.getLogger(__name__)
+
+COLUMNS = [
+    "source",
+    "id",
+    "content_hash",
+    "status",
+    "tx_hash",
+    "revocation_tx_hash",
+    "block_timestamp",
+    "related_model",
+    "related_id",
+]
+# Columnas opcionales para contrastar cada fila con la cadena (eth_getLogs)
+CHAIN_COLUMNS = ["block_number", "log_index"]
+FORMATS = ("jsonl", "csv")
+
+# Filas leídas por consulta (paginación por id, memoria constante)
+PAGE_SIZE = 2000
+# Bytes acumulados antes de entregar un bloque al destino
+CHUNK_SIZE = 64 * 1024
+# Las filas modificadas en los últimos minutos esperan a la siguiente
+# exportación: una transacción aún abierta puede confirmar cambios con una
+# fecha anterior a la marca de agua
+WATERMARK_LAG = timedelta(minutes=10)
+
+# Tabla, columna de fecha de cambio y columna de fecha de alta de cada origen
+SOURCES = {
+    "entry": ("blockchain_registry_entry", "write_date", "create_date"),
+    "archive": ("blockchain_registry_archive", "archived_at", "created_at"),
+}
+ARCHIVE_STATUSES = ("confirmed", "revoked")
+
+
+def encode_rows(rows, fmt, columns):
+    """Serializa las filas en JSONL o CSV y las entrega en bloques de bytes"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer:
+        writer.writerow(columns)
+    for row in rows:
+        if writer:
+            writer.writerow(["" if row[c] is None else row[c] for c in columns])
+        else:
+            buffer.write(json.dumps({c: row[c] for c in columns}) + "\n")
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks):
+    """Comprime en gzip a medida que llegan los bloques"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class BlockchainAuditExport(models.AbstractModel):
+    _name = "blockchain.audit.export"
+    _description = "Blockchain Registry Audit Export"
+
+    @api.model
+    def _watermark_now(self):
+        """Límite superior de una exportación incremental lanzada ahora"""
+        return fields.Datetime.now() - WATERMARK_LAG
+
+    @api.model
+    def _iter_rows(
+        self,
+        statuses=None,
+        date_from=None,
+        date_to=None,
+        since=None,
+        until=None,
+        include_chain=False,
+        include_archive=True,
+    ):
+        """
+        Recorre las entradas (y el archivo) con paginación por id.
+
+        `date_from`/`date_to` filtran por la fecha del bloque (o de alta si aún
+        no se ha confirmado); `since`/`until` por la fecha del último cambio,
+        para exportaciones incrementales desde una marca de agua.
+        """
+        self.env["blockchain.registry.entry"].flush_model()
+        self.env["blockchain.registry.archive"].flush_model()
+        sources = ["entry"]
+        if include_archive and (not statuses or set(statuses) & set(ARCHIVE_STATUSES)):
+            sources.append("archive")
+        columns = COLUMNS[1:] + (CHAIN_COLUMNS if include_chain else [])
+        for source in sources:
+            table, changed_column, created_column = SOURCES[source]
+            conditions, params = ["id > %(after)s"], {"limit": PAGE_SIZE}
+            if statuses:
+                conditions.append("status IN %(statuses)s")
+                params["statuses"] = tuple(statuses)
+            if date_from:
+                conditions.append(f"coalesce(block_timestamp, {created_column}) >= %(date_from)s")
+                params["date_from"] = date_from
+            if date_to:
+                conditions.append(f"coalesce(block_timestamp, {created_column}) < %(date_to)s")
+                params["date_to"] = date_to
+            if since:
+                conditions.append(f"{changed_column} > %(since)s")
+                params["since"] = since
+            if until:
+                conditions.append(f"{changed_column} <= %(until)s")
+                params["until"] = until
+            query = f"""
+                SELECT {", ".join(columns)}
+                  FROM {table}
+                 WHERE {" AND ".join(conditions)}
+                 ORDER BY id
+                 LIMIT %(limit)s
+            """
+            params["after"] = 0
+            while True:
+                self.env.cr.execute(query, params)
+                page = self.env.cr.dictfetchall()
+                for row in page:
+                    row["source"] = source
+                    row["block_timestamp"] = fields.Datetime.to_string(row["block_timestamp"]) or None
+                    yield row
+                if len(page) < PAGE_SIZE:
+                    break
+                params["after"] = page[-1]["id"]
+
+    @api.model
+    def _stream(self, fmt="jsonl", compress=False, include_chain=False, **filters):
+        """Exportación completa como generador de bytes (JSONL o CSV, opcionalmente gzip)"""
+        columns = COLUMNS + (CHAIN_COLUMNS if include_chain else [])
+        rows = self._iter_rows(include_chain=include_chain, **filters)
+        chunks = encode_rows(rows, fmt, columns)
+        return gzip_chunks(chunks) if compress else chunks
+
+    @api.model
+    @metrics.timed_cron("audit_export")
+    def _cron_export(self):
+        """CRON: Exportación incremental en JSONL comprimido al directorio configurado"""
+        params = self.env["ir.config_parameter"].sudo()
+        directory = params.get_param("berpia_blockchain_core.audit_export_dir")
+        if not directory:
+            return
+        since = params.get_param("berpia_blockchain_core.audit_export_watermark") or None
+        until = self._watermark_now()
+        path = os.path.join(directory, f"blockchain-audit-{until:%Y%m%dT%H%M%S}.jsonl.gz")
+        size = 0
+        with open(path + ".part", "wb") as output:
+            for chunk in self._stream(compress=True, include_chain=True, since=since, until=until):
+                output.write(chunk)
+                size += len(chunk)
+        os.replace(path + ".part", path)
+        params.set_param("berpia_blockchain_core.audit_export_watermark", fields.Datetime.to_string(until))
+        _logger.info(f"Blockchain audit export written to {path} ({size} bytes)")
@@ -0,0 +1,175 @@
+import importlib.util
+import logging
+import threading
+import warnings
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+from .rpc_pool import REQUEST_TIMEOUT, RpcPool
+from .abi import UNIVERSAL_REGISTRY_ABI
+
+_logger = logging.getLogger(__name__)
+
+# web3 y su árbol de dependencias (eth-account, eth-abi, websockets...) no se
+# importan al cargar el módulo: los workers HTTP que nunca hablan con la cadena
+# no pagan ni el tiempo de arranque ni la memoria. Solo comprobamos que está
+# instalado; la importación real ocurre la primera vez que se necesita.
+WEB3_AVAILABLE = importlib.util.find_spec("web3") is not None
+if not WEB3_AVAILABLE:
+    _logger.warning("web3 is not installed, blockchain features are disabled")
+
+_web3 = {}
+_web3_lock = threading.Lock()
+
+
+def web3_available():
+    """True si web3 está instalado (sin importarlo)"""
+    return WEB3_AVAILABLE
+
+
+def load_web3():
+    """Importa web3 la primera vez y devuelve el módulo (None si no está instalado)"""
+    if not WEB3_AVAILABLE:
+        return None
+    with _web3_lock:
+        if "module" not in _web3:
+            try:
+                # Suprimimos websockets.legacy deprecation warning proveniente de la dependencia de web3
+                with warnings.catch_warnings():
+                    warnings.filterwarnings(
+                        "ignore",
+                        category=DeprecationWarning,
+                        message=".*websockets.legacy is deprecated.*",
+                    )
+                    import web3
+            except ImportError as e:
+                _logger.warning(f"Failed to import Web3: {e}")
+                web3 = None
+            _web3["module"] = web3
+        return _web3["module"]
+
+
+# Parámetros que definen la conexión; el resto (estado del indexador,
+# tamaños de lote...) no requieren reconstruir el cliente.
+CLIENT_CONFIG_KEYS = {
+    "berpia_blockchain_core.rpc_url",
+    "berpia_blockchain_core.rpc_fallback_urls",
+    "berpia_blockchain_core.contract_address",
+    "berpia_blockchain_core.chain_id",
+}
+
+# Tamaño del pool keep-alive por cliente (hilos de wallets + cron)
+HTTP_POOL_SIZE = 32
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def parse_rpc_urls(value):
+    """Lista de URLs de un texto con una por línea (o separadas por comas)"""
+    return [url.strip() for url in (value or "").replace(",", "\n").splitlines() if url.strip()]
+
+
+class ChainClient:
+    """
+    Cliente de cadena reutilizable dentro del proceso.
+
+    Mantiene una sesión HTTP con conexiones keep-alive, el objeto contrato y
+    las cuentas derivadas de las claves, para que cada cron o botón no pague
+    de nuevo el handshake TLS ni la construcción del contrato. Con varios
+    endpoints las llamadas se reparten según su salud (ver rpc_pool).
+    """
+
+    def __init__(self, rpc_url, contract_address, fallback_urls=()):
+        # URL principal: clave estable de cachés (p. ej. el oráculo de comisiones)
+        self.rpc_url = rpc_url
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        Web3 = load_web3().Web3
+
+        def make_provider(url):
+            # Sin reintentos propios de web3: el pool decide a qué endpoint
+            # reintentar. Cada llamada alimenta los contadores de metrics.
+            return metrics.instrument_provider(
+                Web3.HTTPProvider(
+                    url,
+                    session=session,
+                    request_kwargs={"timeout": REQUEST_TIMEOUT},
+                    exception_retry_configuration=None,
+                )
+            )
+
+        urls = list(dict.fromkeys([rpc_url, *fallback_urls]))
+        self.pool = RpcPool(urls, make_provider)
+        self.w3 = Web3(self.pool.install(Web3.HTTPProvider(rpc_url, session=session)))
+        self.contract = None
+        if contract_address:
+            self.contract = self.w3.eth.contract(
+                address=Web3.to_checksum_address(contract_address),
+                abi=UNIVERSAL_REGISTRY_ABI,
+            )
+        self._accounts = {}
+        self._lock = threading.Lock()
+
+    def account(self, private_key):
+        with self._lock:
+            if private_key not in self._accounts:
+                self._accounts[private_key] = self.w3.eth.account.from_key(private_key)
+            return self._accounts[private_key]
+
+    def accounts(self, private_keys):
+        return [self.account(key) for key in private_keys]
+
+    def best_rpc_url(self):
+        """Endpoint mejor puntuado ahora (para el motor asíncrono)"""
+        return self.pool.best_url()
+
+
+def get_client(env, rpc_url=None, contract_address=None, chain_id=None, fallback_urls=None):
+    """Cliente compartido para la configuración actual (None si falta el RPC).
+
+    Los argumentos permiten probar valores aún no guardados (p. ej. desde Ajustes).
+    """
+    if not load_web3():
+        return None
+    params = env["ir.config_parameter"].sudo()
+    rpc = rpc_url or params.get_param("berpia_blockchain_core.rpc_url")
+    if not rpc:
+        return None
+    contract_addr = contract_address or params.get_param(
+        "berpia_blockchain_core.contract_address"
+    )
+    chain_id = chain_id or params.get_param("berpia_blockchain_core.chain_id")
+    if fallback_urls is None:
+        fallback_urls = params.get_param("berpia_blockchain_core.rpc_fallback_urls")
+    fallbacks = tuple(parse_rpc_urls(fallback_urls))
+
+    key = (rpc, fallbacks, contract_addr or "", chain_id or "")
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = ChainClient(rpc, contract_addr, fallbacks)
+        return client
+
+
+def endpoint_health():
+    """Salud de los endpoints de los clientes de este proceso (uno por host)"""
+    with _clients_lock:
+        clients = list(_clients.values())
+    rows = {}
+    for client in clients:
+        for row in client.pool.health():
+            rows.setdefault(row["endpoint"], row)
+    return list(rows.values())
+
+
+def invalidate_clients():
+    """Descarta los clientes cacheados (la configuración ha cambiado)"""
+    with _clients_lock:
+        if _clients:
+            _logger.info("Blockchain configuration changed, dropping cached clients")
+        _clients.clear()
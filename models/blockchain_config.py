@@ -1,6 +1,7 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
-import os
+from .blockchain_client import get_client
+from .blockchain_registry_entry import _load_signer_keys
 
 
 class ResConfigSettings(models.TransientModel):
@@ -11,6 +12,11 @@ class ResConfigSettings(models.TransientModel):
         config_parameter="berpia_blockchain_core.rpc_url",
         help="E.g: https://sepolia.infura.io/v3/YOUR-PROJECT-ID",
     )
+    blockchain_rpc_fallback_urls = fields.Char(
+        string="Fallback RPC URLs",
+        config_parameter="berpia_blockchain_core.rpc_fallback_urls",
+        help="Other providers of the same network, separated by commas. Calls go to the healthiest endpoint; slow reads are repeated on a second one and failed or rate limited calls move to the next.",
+    )
     blockchain_contract_address = fields.Char(
         string="Contract Address",
         config_parameter="berpia_blockchain_core.contract_address",
@@ -28,59 +34,215 @@ class ResConfigSettings(models.TransientModel):
         default=50.0,
         help="Maximum gas price (in Gwei) allowed for transactions. If network is more expensive, transactions will wait in queue.",
     )
+    blockchain_fee_drain_band = fields.Float(
+        string="Partial Drain Band (%)",
+        config_parameter="berpia_blockchain_core.fee_drain_band",
+        default=50.0,
+        help="Tolerance above the maximum gas price. Within this band only a shrinking share of the oldest queued documents is submitted; above it the queue waits.",
+    )
+    blockchain_fee_cache_seconds = fields.Integer(
+        string="Fee Estimate Cache (s)",
+        config_parameter="berpia_blockchain_core.fee_cache_seconds",
+        default=30,
+        help="Seconds the eth_feeHistory based fee estimate is reused before querying the network again.",
+    )
+    blockchain_stuck_tx_timeout = fields.Integer(
+        string="Stuck Transaction Timeout (s)",
+        config_parameter="berpia_blockchain_core.stuck_tx_timeout",
+        default=600,
+        help="Seconds without a receipt after which a transaction is re-broadcast with the same nonce and a higher fee.",
+    )
+    blockchain_fee_bump_percent = fields.Float(
+        string="Fee Bump (%)",
+        config_parameter="berpia_blockchain_core.fee_bump_percent",
+        default=12.5,
+        help="Fee increase applied to each replacement. Nodes reject replacements below 10%.",
+    )
+    blockchain_max_replacements = fields.Integer(
+        string="Max Fee Bumps",
+        config_parameter="berpia_blockchain_core.max_replacements",
+        default=5,
+        help="Maximum number of replacements of the same transaction.",
+    )
+    blockchain_archive_after_days = fields.Integer(
+        string="Archive After (days)",
+        config_parameter="berpia_blockchain_core.archive_after_days",
+        default=365,
+        help="Confirmed and revoked entries older than this are moved to the compact archive table. 0 disables archiving.",
+    )
+    blockchain_queue_batch_size = fields.Integer(
+        string="Queue Batch Size",
+        config_parameter="berpia_blockchain_core.queue_batch_size",
+        default=50,
+        help="Maximum number of documents submitted per queue run, registrations and revocations combined, shared among the priority lanes by weight. In Merkle mode it only limits revocations. Nonces are assigned locally, so the run only reads the account nonce once.",
+    )
+    blockchain_receipt_batch_size = fields.Integer(
+        string="Receipt Batch Size",
+        config_parameter="berpia_blockchain_core.receipt_batch_size",
+        default=100,
+        help="Number of receipts and blocks requested per JSON-RPC batch call when checking submitted transactions.",
+    )
+    blockchain_engine = fields.Selection(
+        [("sync", "Synchronous"), ("async", "Asynchronous (asyncio)")],
+        string="Chain I/O Engine",
+        config_parameter="berpia_blockchain_core.engine",
+        default="sync",
+        help="The asynchronous engine signs, broadcasts and polls receipts concurrently and writes the results back in bulk.",
+    )
+    blockchain_async_concurrency = fields.Integer(
+        string="Async Concurrency",
+        config_parameter="berpia_blockchain_core.async_concurrency",
+        default=20,
+        help="Maximum number of chain requests in flight at the same time with the asynchronous engine.",
+    )
+    blockchain_claim_timeout = fields.Integer(
+        string="Queue Claim Timeout (s)",
+        config_parameter="berpia_blockchain_core.claim_timeout",
+        default=600,
+        help="Seconds a worker keeps its claim on queued entries. Entries claimed by a worker that crashed become available again after this delay.",
+    )
+    blockchain_signing_processes = fields.Integer(
+        string="Signing Processes",
+        config_parameter="berpia_blockchain_core.signing_processes",
+        default=0,
+        help="Worker processes used to sign large batches of transactions outside the cron worker. 0 signs inside the cron worker.",
+    )
+    blockchain_dispatch_window = fields.Integer(
+        string="Dispatch Window (s)",
+        config_parameter="berpia_blockchain_core.dispatch_window",
+        default=5,
+        help="Queue runs requested within this many seconds of an already scheduled run are merged into it, so a burst of registrations is sent in a single cycle.",
+    )
+    blockchain_expected_block_time = fields.Integer(
+        string="Expected Block Time (s)",
+        config_parameter="berpia_blockchain_core.expected_block_time",
+        default=12,
+        help="Average block time of the network. Receipts are checked this long after a submission and spaced out by it while transactions are pending.",
+    )
+    blockchain_wallet_assignment = fields.Selection(
+        [
+            ("hash", "Deterministic (by document hash)"),
+            ("least_loaded", "Least loaded wallet"),
+        ],
+        string="Wallet Assignment",
+        config_parameter="berpia_blockchain_core.wallet_assignment",
+        default="hash",
+        help="How queued documents are distributed when several signer keys are configured in ODOO_BLOCKCHAIN_PRIVATE_KEYS. Revocations always use the wallet that registered the document and fail if its key is no longer configured.",
+    )
+    blockchain_indexer_start_block = fields.Integer(
+        string="Indexer Start Block",
+        config_parameter="berpia_blockchain_core.indexer_start_block",
+        help="First block scanned by the event indexer on its first run (usually the contract deployment block). Leave empty to start from the latest blocks.",
+    )
+    blockchain_indexer_block_range = fields.Integer(
+        string="Indexer Block Range",
+        config_parameter="berpia_blockchain_core.indexer_block_range",
+        default=2000,
+        help="Number of blocks requested per eth_getLogs call. It is halved automatically when the provider rejects the range.",
+    )
+    blockchain_anchoring_mode = fields.Selection(
+        [("single", "One transaction per document"), ("merkle", "Merkle batch")],
+        string="Anchoring Mode",
+        config_parameter="berpia_blockchain_core.anchoring_mode",
+        default="single",
+        help="In Merkle batch mode pending documents are grouped in a Merkle tree and only its root is registered on chain. Each document keeps its inclusion proof.",
+    )
+    blockchain_merkle_batch_size = fields.Integer(
+        string="Merkle Batch Size",
+        config_parameter="berpia_blockchain_core.merkle_batch_size",
+        default=1000,
+        help="Maximum number of documents anchored by a single Merkle root.",
+    )
+    blockchain_verify_cache_ttl = fields.Integer(
+        string="Verification Cache (s)",
+        config_parameter="berpia_blockchain_core.verify_cache_ttl",
+        default=300,
+        help="Seconds an on-chain verifyDocument result is reused by the bulk verification API. Documents already confirmed or revoked in Odoo are answered without querying the chain.",
+    )
+    blockchain_metrics_token = fields.Char(
+        string="Metrics Token",
+        config_parameter="berpia_blockchain_core.metrics_token",
+        help="Bearer token required by the /blockchain/metrics Prometheus endpoint. Leave empty to disable the endpoint.",
+    )
+    blockchain_audit_export_dir = fields.Char(
+        string="Audit Export Directory",
+        config_parameter="berpia_blockchain_core.audit_export_dir",
+        help="Server directory where the daily audit export writes a gzipped JSONL file with the entries changed since the previous export. Leave empty to disable.",
+    )
+    blockchain_stats_retention_days = fields.Integer(
+        string="Stats Retention (days)",
+        config_parameter="berpia_blockchain_core.stats_retention_days",
+        default=30,
+        help="Pipeline stats snapshots older than this are deleted and older cron run metrics are folded into one total per cron. 0 keeps them forever.",
+    )
 
     blockchain_private_key_status = fields.Selection(
         [("set", "Configured"), ("missing", "Missing")],
         string="Private Key Status",
         compute="_compute_key_status",
     )
+    blockchain_wallet_count = fields.Integer(
+        string="Signer Wallets", compute="_compute_key_status"
+    )
 
     @api.depends(
         "blockchain_rpc_url"
     )  # Dependencia ficticia para activar el recálculo o la carga cuando se cambia la configuración
     def _compute_key_status(self):
-        key = os.environ.get("ODOO_BLOCKCHAIN_PRIVATE_KEY")
+        keys = _load_signer_keys()
         for record in self:
-            record.blockchain_private_key_status = "set" if key else "missing"
+            record.blockchain_private_key_status = "set" if keys else "missing"
+            record.blockchain_wallet_count = len(keys)
 
     def action_check_blockchain_connection(self):
         """Test connection to RPC and check Balance"""
         self.ensure_one()
-        try:
-            from web3 import Web3
-        except ImportError:
-            raise UserError(_("Web3 library not installed."))
-
-        rpc = self.blockchain_rpc_url
-        if not rpc:
+        if not self.blockchain_rpc_url:
             raise UserError(_("Please configure RPC URL first."))
 
-        w3 = Web3(Web3.HTTPProvider(rpc))
+        client = get_client(
+            self.env,
+            rpc_url=self.blockchain_rpc_url,
+            contract_address=self.blockchain_contract_address,
+            chain_id=self.blockchain_chain_id,
+            fallback_urls=self.blockchain_rpc_fallback_urls or "",
+        )
+        if not client:
+            raise UserError(_("Web3 library not installed."))
+
+        w3 = client.w3
         if not w3.is_connected():
             raise UserError(_("Could not connect to RPC URL."))
+        unreachable = [
+            _("Unreachable endpoint %s: %s") % (label, error)
+            for label, error in client.pool.probe()
+            if error
+        ]
 
-        # Comprobamos la clave privada y balance
-        key = os.environ.get("ODOO_BLOCKCHAIN_PRIVATE_KEY")
-        if not key:
+        # Comprobamos las claves privadas y balances
+        keys = _load_signer_keys()
+        if not keys:
             raise UserError(
                 _("Connection Successful, but Private Key ENV VAR is missing.")
             )
 
         try:
-            account = w3.eth.account.from_key(key)
-            balance = w3.eth.get_balance(account.address)
-            balance_eth = w3.from_wei(balance, "ether")
+            wallets = []
+            for account in client.accounts(keys):
+                balance = w3.eth.get_balance(account.address)
+                balance_eth = w3.from_wei(balance, "ether")
+                wallets.append(
+                    _("Wallet: %s\nBalance: %s ETH") % (account.address, balance_eth)
+                )
 
             return {
                 "type": "ir.actions.client",
                 "tag": "display_notification",
                 "params": {
                     "title": _("Connection Successful"),
-                    "message": _(
-                        "Connected to Chain ID %s.\nWallet: %s\nBalance: %s ETH"
-                    )
-                    % (w3.eth.chain_id, account.address, balance_eth),
-                    "type": "success",
+                    "message": _("Connected to Chain ID %s.\n%s")
+                    % (w3.eth.chain_id, "\n".join(wallets + unreachable)),
+                    "type": "warning" if unreachable else "success",
                 },
             }
         except Exception as e:
@@ -0,0 +1,105 @@
+import logging
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+
+class BlockchainCronRun(models.Model):
+    _name = "blockchain.cron.run"
+    _description = "Blockchain Cron Run Metrics"
+    _order = "id desc"
+    _rec_name = "cron"
+
+    cron = fields.Char(string="Cron", required=True, readonly=True, index=True)
+    run_count = fields.Integer(
+        string="Runs",
+        default=1,
+        readonly=True,
+        help="Number of runs this row stands for (more than one once older runs are rolled up).",
+    )
+    error_count = fields.Integer(string="Errors", readonly=True)
+    duration = fields.Float(string="Duration (s)", readonly=True, help="Total wall time of the runs.")
+    rollup = fields.Boolean(
+        string="Rolled Up",
+        readonly=True,
+        help="Sum of runs older than the stats retention, kept so that the exported counters never go backwards.",
+    )
+    series = fields.Json(
+        string="Metrics",
+        readonly=True,
+        help="Counters and phase timings recorded during the run, as Prometheus series.",
+    )
+
+    @api.model
+    def _record_run(self, cron, duration, failed, series):
+        """Guarda una ejecución con su propio cursor: se conserva aunque el cron falle"""
+        try:
+            with self.env.registry.cursor() as cr:
+                self.with_env(self.env(cr=cr, su=True)).create(
+                    {
+                        "cron": cron,
+                        "error_count": int(failed),
+                        "duration": duration,
+                        "series": series,
+                    }
+                )
+        except Exception as e:
+            _logger.warning(f"Could not record metrics of the {cron} cron run: {e}")
+
+    @api.model
+    def _totals(self, since=None):
+        """Suma de las series de todas las ejecuciones (o de las posteriores a `since`)"""
+        self.flush_model()
+        query = """
+            SELECT key, sum(value::numeric)
+              FROM blockchain_cron_run, jsonb_each_text(series)
+        """
+        params = []
+        if since:
+            query += " WHERE create_date > %s AND NOT coalesce(rollup, false)"
+            params.append(since)
+        self.env.cr.execute(query + " GROUP BY key", params)
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def _roll_up(self, cutoff):
+        """Acumula por cron las ejecuciones anteriores a `cutoff` en una sola fila"""
+        self.flush_model()
+        self.env.cr.execute(
+            """
+            WITH old AS (
+                    DELETE FROM blockchain_cron_run
+                     WHERE create_date < %(cutoff)s
+                 RETURNING cron, run_count, error_count, duration, series
+                 ),
+                 runs AS (
+                    SELECT cron, sum(run_count) AS run_count, sum(error_count) AS error_count,
+                           sum(duration) AS duration
+                      FROM old
+                     GROUP BY cron
+                 ),
+                 totals AS (
+                    SELECT cron, jsonb_object_agg(key, total) AS series
+                      FROM (
+                            SELECT cron, key, sum(value::numeric) AS total
+                              FROM old, jsonb_each_text(series)
+                             GROUP BY cron, key
+                           ) AS by_key
+                     GROUP BY cron
+                 )
+            INSERT INTO blockchain_cron_run
+                   (cron, run_count, error_count, duration, rollup, series,
+                    create_uid, create_date, write_uid, write_date)
+            SELECT runs.cron, runs.run_count, runs.error_count, runs.duration, true,
+                   coalesce(totals.series, '{}'::jsonb),
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM runs
+              LEFT JOIN totals ON totals.cron = runs.cron
+            RETURNING cron
+            """,
+            {"cutoff": cutoff, "uid": self.env.uid},
+        )
+        crons = [row[0] for row in self.env.cr.fetchall()]
+        self.invalidate_model()
+        if crons:
+            _logger.info(f"Rolled up old run metrics of the crons: {', '.join(crons)}")
@@ -0,0 +1,105 @@
+import json
+import logging
+from odoo import models, fields, api
+from . import merkle, tx_signer
+
+_logger = logging.getLogger(__name__)
+
+
+class BlockchainMerkleBatch(models.Model):
+    _name = "blockchain.merkle.batch"
+    _description = "Blockchain Merkle Anchoring Batch"
+    _order = "create_date desc"
+    _rec_name = "root_hash"
+
+    root_hash = fields.Char(
+        string="Merkle Root", required=True, index=True, copy=False, readonly=True
+    )
+    status = fields.Selection(
+        [
+            ("pending", "Pending"),
+            ("submitted", "Submitted (Waiting Conf)"),
+            ("confirmed", "Confirmed"),
+            ("error", "Error"),
+        ],
+        string="Status",
+        default="pending",
+        required=True,
+        copy=False,
+        index=True,
+    )
+    tx_hash = fields.Char(string="Transaction Hash", copy=False, readonly=True)
+    block_timestamp = fields.Datetime(
+        string="Block Timestamp", copy=False, readonly=True
+    )
+    error_message = fields.Text(string="Error Message", copy=False, readonly=True)
+
+    entry_ids = fields.One2many(
+        "blockchain.registry.entry",
+        "merkle_batch_id",
+        string="Documents",
+        readonly=True,
+    )
+    entry_count = fields.Integer(
+        string="Documents Count", compute="_compute_entry_count"
+    )
+
+    @api.depends("entry_ids")
+    def _compute_entry_count(self):
+        for batch in self:
+            batch.entry_count = len(batch.entry_ids)
+
+    @api.model
+    def _create_from_entries(self, entries):
+        """Construye el árbol de las entradas y guarda en cada una su prueba de inclusión"""
+        levels = merkle.build_tree(tx_signer.hashes_to_bytes32(entries.mapped("content_hash")))
+        batch = self.create({"root_hash": merkle.merkle_root(levels).hex()})
+        entries.write({"merkle_batch_id": batch.id})
+        entries._bulk_update_columns(
+            {
+                entry.id: (
+                    index,
+                    json.dumps([p.hex() for p in merkle.merkle_proof(levels, index)]),
+                )
+                for index, entry in enumerate(entries)
+            },
+            ["merkle_leaf_index", "merkle_proof"],
+        )
+        return batch
+
+    def _mark_failed(self, message):
+        """El lote no se ha anclado: sus documentos pasan a error.
+
+        Conservan el lote y su prueba hasta que se vuelvan a anclar: si la raíz
+        acaba apareciendo en la cadena (p. ej. una tx dada por perdida que se
+        mina), el indexador confirma el lote y sus documentos a la vez.
+        """
+        self.entry_ids.write({"status": "error", "error_message": message})
+        self.write({"status": "error", "error_message": message})
+
+    @api.model
+    def _check_batch_receipts(self, w3, chunk_size=100):
+        """Confirma los lotes enviados y propaga el resultado a sus documentos"""
+        Entry = self.env["blockchain.registry.entry"]
+        batches = self.search([("status", "=", "submitted"), ("tx_hash", "!=", False)])
+        receipts = Entry._fetch_receipts(w3, batches.mapped("tx_hash"), chunk_size)
+        block_timestamps = Entry._fetch_block_timestamps(
+            w3,
+            [r["blockNumber"] for r in receipts.values() if r["status"] == 1],
+            chunk_size,
+        )
+        results = []
+        for batch in batches:
+            receipt = receipts.get(batch.tx_hash)
+            if not receipt:
+                continue  # Tx no encontrada aún (pending in mempool)
+
+            if receipt["status"] != 1:
+                batch._mark_failed(f"Transacción {batch.tx_hash} Revertida en la Cadena")
+                continue
+
+            block_timestamp = block_timestamps.get(receipt["blockNumber"])
+            batch.write({"status": "confirmed", "block_timestamp": block_timestamp})
+            for entry in batch.entry_ids.filtered(lambda e: e.status == "submitted"):
+                results.append((entry, receipt, False))
+        Entry._apply_receipts(results, block_timestamps, w3=w3)
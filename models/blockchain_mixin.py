@@ -1,64 +1,255 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from collections import OrderedDict
 import hashlib
+import threading
+
+# Lectura del filestore por bloques: memoria constante aunque el PDF ocupe cientos de MB
+HASH_CHUNK_SIZE = 1024 * 1024
+HASH_ALGORITHMS = ('sha256', 'keccak256')
+
+# Digests ya calculados, por (checksum, tamaño, algoritmo) del adjunto
+HASH_CACHE_SIZE = 4096
+_digest_cache = OrderedDict()
+_digest_cache_lock = threading.Lock()
+
+
+def _new_hasher(algorithm):
+    """ Objeto incremental (update/hexdigest) para el algoritmo pedido """
+    if algorithm == 'sha256':
+        return hashlib.sha256()
+    if algorithm == 'keccak256':
+        # hashlib.sha3_256 NO es Keccak-256 (padding distinto): usamos pycryptodome
+        # o, en su defecto, eth_hash (dependencia de web3)
+        try:
+            from Crypto.Hash import keccak
+            return keccak.new(digest_bits=256)
+        except ImportError:
+            pass
+        try:
+            from eth_hash.auto import keccak
+            return keccak.new(b'')
+        except ImportError:
+            raise UserError(_("Keccak-256 hashing requires pycryptodome or eth-hash to be installed."))
+    raise UserError(_("Unsupported hash algorithm: %s") % algorithm)
+
+
+def _hexdigest(hasher):
+    if hasattr(hasher, 'hexdigest'):
+        return hasher.hexdigest()
+    return hasher.digest().hex()
+
+
+def hash_stream(stream, algorithm='sha256', chunk_size=HASH_CHUNK_SIZE):
+    """ Digest hexadecimal de un fichero abierto, leído por bloques """
+    hasher = _new_hasher(algorithm)
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        hasher.update(chunk)
+    return _hexdigest(hasher)
+
+
+def _cached_digest(key):
+    with _digest_cache_lock:
+        digest = _digest_cache.get(key)
+        if digest is not None:
+            _digest_cache.move_to_end(key)
+        return digest
+
+
+def _store_digest(key, digest):
+    with _digest_cache_lock:
+        _digest_cache[key] = digest
+        _digest_cache.move_to_end(key)
+        while len(_digest_cache) > HASH_CACHE_SIZE:
+            _digest_cache.popitem(last=False)
 
 class BlockchainCertifiedMixin(models.AbstractModel):
     _name = 'blockchain.certified.mixin'
     _description = 'Mixin to enable Blockchain Universal Registration'
 
     blockchain_entry_id = fields.Many2one('blockchain.registry.entry', string='Blockchain Entry', copy=False, readonly=True)
-    blockchain_status = fields.Selection(related='blockchain_entry_id.status', string='Blockchain Status', store=True, readonly=True)
-    blockchain_hash = fields.Char(related='blockchain_entry_id.content_hash', readonly=True)
+    blockchain_archive_id = fields.Many2one('blockchain.registry.archive', string='Blockchain Archive', copy=False, readonly=True, index='btree_not_null')
+    blockchain_status = fields.Selection(selection='_selection_blockchain_status', compute='_compute_blockchain_status', string='Blockchain Status', store=True, readonly=True)
+    blockchain_hash = fields.Char(compute='_compute_blockchain_status', readonly=True)
+
+    def _selection_blockchain_status(self):
+        return self.env['blockchain.registry.entry']._fields['status'].selection
+
+    @api.depends('blockchain_entry_id.status', 'blockchain_archive_id.status')
+    def _compute_blockchain_status(self):
+        """ La entrada puede estar en la tabla activa o, si es antigua, en el archivo """
+        for record in self:
+            source = record.blockchain_entry_id or record.blockchain_archive_id
+            record.blockchain_status = source.status
+            record.blockchain_hash = source.content_hash
     
     def _compute_blockchain_hash(self):
         """ Método abstracto: debe devolver la cadena hexadecimal SHA256 del contenido a certificar. """
         raise NotImplementedError("Models consuming blockchain.certified.mixin must implement _compute_blockchain_hash()")
 
+    def _compute_blockchain_hashes(self):
+        """ Versión por lotes de _compute_blockchain_hash: devuelve {record.id: hash}.
+        Por defecto calcula registro a registro; los modelos pueden sobrescribirla
+        para obtener los datos de todo el recordset de una vez. """
+        return {record.id: record._compute_blockchain_hash() for record in self}
+
+    @api.model
+    def _blockchain_hash_attachment(self, attachment, algorithm='sha256'):
+        """ Hash hexadecimal del contenido de un ir.attachment sin cargarlo entero en memoria """
+        return self._blockchain_hash_attachments(attachment, algorithm)[attachment.id]
+
+    @api.model
+    def _blockchain_hash_attachments(self, attachments, algorithm='sha256'):
+        """
+        Hashes {attachment.id: hex} de varios adjuntos.
+        Se leen directamente del filestore por bloques; los guardados en BD usan `raw`.
+        Si falta el fichero de un adjunto en el filestore se lanza un UserError con su nombre.
+        El resultado se cachea por checksum y tamaño, así un fichero sin cambios no se
+        vuelve a leer.
+        """
+        if algorithm not in HASH_ALGORITHMS:
+            raise UserError(_("Unsupported hash algorithm: %s") % algorithm)
+        result = {}
+        for attachment in attachments.sudo():
+            key = None
+            if attachment.checksum:
+                key = (attachment.checksum, attachment.file_size, algorithm)
+                digest = _cached_digest(key)
+                if digest:
+                    result[attachment.id] = digest
+                    continue
+
+            if attachment.store_fname:
+                try:
+                    with open(attachment._full_path(attachment.store_fname), 'rb') as stream:
+                        digest = hash_stream(stream, algorithm)
+                except FileNotFoundError:
+                    raise UserError(
+                        _("The file of attachment %(name)s (ID %(id)s) is missing from the filestore.")
+                        % {'name': attachment.name, 'id': attachment.id}
+                    ) from None
+            else:
+                hasher = _new_hasher(algorithm)
+                hasher.update(attachment.raw or b'')
+                digest = _hexdigest(hasher)
+
+            if key:
+                _store_digest(key, digest)
+            result[attachment.id] = digest
+        return result
+
+    def _blockchain_company_id(self):
+        """ Compañía de la entrada (decide su carril de prioridad en la cola) """
+        self.ensure_one()
+        if 'company_id' in self._fields and self.company_id:
+            return self.company_id.id
+        return self.env.company.id
+
     def _post_blockchain_message(self, body, subtype_xmlid='mail.mt_note'):
         """ Permitir que el registro vuelva a publicar en el chat de este registro """
         self.ensure_one()
         if hasattr(self, 'message_post'):
             self.message_post(body=body, subtype_xmlid=subtype_xmlid)
-        
+
+    def _post_blockchain_messages(self, bodies, subtype_xmlid='mail.mt_note'):
+        """ Versión por lotes de _post_blockchain_message: bodies es {record.id: cuerpo} """
+        records = self.browse(list(bodies))
+        if not records or not hasattr(records, 'message_post'):
+            return
+        if subtype_xmlid == 'mail.mt_note' and hasattr(records, '_message_log_batch'):
+            records._message_log_batch(bodies=bodies)
+        else:
+            for record in records:
+                record.message_post(body=bodies[record.id], subtype_xmlid=subtype_xmlid)
+
     def action_blockchain_register(self):
         """
-        Acción para activar el registro, crea la entrada en cola
+        Acción para activar el registro, crea la entrada en cola.
+        Trabaja sobre el recordset completo: una búsqueda, una creación múltiple
+        y una escritura por entrada enlazada.
         """
+        if not self:
+            return
+        Entry = self.env['blockchain.registry.entry']
+        hashes = self._compute_blockchain_hashes()
+        if not all(hashes.get(record.id) for record in self):
+            raise UserError(_("Could not compute hash for this record."))
+
+        # 1. Comprobamos cuáles existen ya (una sola búsqueda)
+        entries_by_hash = {}
+        for entry in Entry.search([('content_hash', 'in', list(set(hashes.values())))]):
+            entries_by_hash.setdefault(entry.content_hash, entry)
+
+        # Las ya archivadas no se vuelven a registrar: se enlaza el archivo
+        archived_by_hash = {}
+        missing = set(hashes.values()) - set(entries_by_hash)
+        if missing:
+            archives = self.env['blockchain.registry.archive'].search([('content_hash', 'in', list(missing))])
+            archived_by_hash = {archive.content_hash: archive for archive in archives}
+
+        # 2. Creamos las que faltan; el primer registro con cada hash es el origen
+        requested = {}
         for record in self:
-            content_hash = record._compute_blockchain_hash()
-            if not content_hash:
-                raise UserError(_("Could not compute hash for this record."))
-
-            # 1. Comprobamos si ya existe
-            entry = self.env['blockchain.registry.entry'].search([
-                ('content_hash', '=', content_hash)
-            ], limit=1)
-
-            if not entry:
-                # 2. Sino existe creamos nueva
-                entry = self.env['blockchain.registry.entry'].create({
-                    'content_hash': content_hash,
-                    'related_model': record._name,
-                    'related_id': record.id,
-                    'status': 'pending'
-                })
-                record._post_blockchain_message(_("Blockchain Registration Requested. Hash: %s") % content_hash)
+            content_hash = hashes[record.id]
+            if content_hash not in entries_by_hash and content_hash not in archived_by_hash \
+                    and content_hash not in requested:
+                requested[content_hash] = record
+        if requested:
+            new_entries = Entry.create([{
+                'content_hash': content_hash,
+                'related_model': record._name,
+                'related_id': record.id,
+                'company_id': record._blockchain_company_id(),
+                'status': 'pending',
+            } for content_hash, record in requested.items()])
+            entries_by_hash.update(zip(requested, new_entries))
+
+        # Si existe y esta en error, cambiamos a pendiente para reintentar el registro
+        retried = Entry.browse({
+            entry.id for entry in entries_by_hash.values() if entry.status == 'error'
+        })
+        if retried:
+            retried.write({'status': 'pending'})
+        if requested or retried:
+            Entry._schedule_cron_run('berpia_blockchain_core.ir_cron_blockchain_process_queue')
+
+        # 3. Enlaces agrupados por entrada
+        record_ids_by_link = {}
+        for record in self:
+            content_hash = hashes[record.id]
+            if content_hash in entries_by_hash:
+                link = (entries_by_hash[content_hash].id, False)
             else:
-                # Si ya existe
-                if entry.related_model != record._name or entry.related_id != record.id:
-                     pass
-                
-                # Si existe y esta en error, cambiamos a pendiente para reintentar el registro
-                if entry.status == 'error':
-                    entry.status = 'pending'
-                    record._post_blockchain_message(_("Retrying Blockchain Registration."))
-
-            record.blockchain_entry_id = entry
-            
+                link = (False, archived_by_hash[content_hash].id)
+            record_ids_by_link.setdefault(link, []).append(record.id)
+        for (entry_id, archive_id), record_ids in record_ids_by_link.items():
+            self.browse(record_ids).write({
+                'blockchain_entry_id': entry_id,
+                'blockchain_archive_id': archive_id,
+            })
+
+        bodies = {
+            record.id: _("Blockchain Registration Requested. Hash: %s") % content_hash
+            for content_hash, record in requested.items()
+        }
+        bodies.update({
+            record.id: _("Retrying Blockchain Registration.")
+            for record in self if record.blockchain_entry_id in retried
+        })
+        self._post_blockchain_messages(bodies)
+
     def action_blockchain_revoke(self):
         """
         Acción pública para provocar la revocación.
         """
+        # Las entradas archivadas vuelven a la tabla activa para poder revocarse.
+        # Restaurar crea entradas y reescribe enlaces, así que se hace con sudo
+        # solo si el usuario puede modificar el documento y las entradas
+        archives = self.blockchain_archive_id
+        if archives:
+            self.check_access('write')
+            self.env['blockchain.registry.entry'].check_access('write')
+            archives.sudo()._restore()
         for record in self:
             if not record.blockchain_entry_id:
                 raise UserError(_("No blockchain entry found to revoke."))
@@ -71,4 +262,7 @@ class BlockchainCertifiedMixin(models.AbstractModel):
         self.ensure_one()
         if self.blockchain_entry_id:
             return self.blockchain_entry_id.action_verify_on_chain_manual()
+        # Las archivadas se verifican sobre el archivo, sin restaurarlas
+        if self.blockchain_archive_id:
+            return self.blockchain_archive_id.action_verify_on_chain_manual()
         raise UserError(_("No blockchain entry linked."))
@@ -0,0 +1,76 @@
+from odoo import models, fields, api
+
+
+class BlockchainQueueLane(models.Model):
+    _name = "blockchain.queue.lane"
+    _description = "Blockchain Queue Priority Lane"
+    _order = "sequence, id"
+
+    name = fields.Char(string="Name", required=True)
+    sequence = fields.Integer(string="Sequence", default=10)
+    active = fields.Boolean(default=True)
+    model_name = fields.Char(
+        string="Origin Model",
+        help="Technical name of the certified model (e.g. account.move). Leave empty to match every model.",
+    )
+    company_id = fields.Many2one(
+        "res.company",
+        string="Company",
+        help="Leave empty to match every company.",
+    )
+    weight = fields.Integer(
+        string="Weight",
+        default=1,
+        required=True,
+        help="Share of every queue run relative to the other lanes with documents waiting. A lane with weight 0 is paused.",
+    )
+    backlog_count = fields.Integer(
+        string="Queued Documents", compute="_compute_backlog_count"
+    )
+
+    _sql_constraints = [
+        ("weight_positive", "CHECK(weight >= 0)", "The lane weight cannot be negative."),
+    ]
+
+    def _compute_backlog_count(self):
+        counts = dict(
+            self.env["blockchain.registry.entry"]._read_group(
+                [
+                    ("lane_id", "in", self.ids),
+                    ("status", "in", ["pending", "revocation_pending"]),
+                ],
+                ["lane_id"],
+                ["__count"],
+            )
+        )
+        for lane in self:
+            lane.backlog_count = counts.get(lane, 0)
+
+    def _matches(self, model_name, company):
+        self.ensure_one()
+        return (not self.model_name or self.model_name == model_name) and (
+            not self.company_id or self.company_id == company
+        )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lanes = super().create(vals_list)
+        lanes._reassign_queued_entries()
+        return lanes
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {"model_name", "company_id", "sequence", "active"} & set(vals):
+            self._reassign_queued_entries()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self._reassign_queued_entries()
+        return res
+
+    def _reassign_queued_entries(self):
+        """Recalcula el carril de lo que sigue en cola al cambiar la configuración"""
+        Entry = self.env["blockchain.registry.entry"]
+        queued = Entry.search([("status", "in", ["pending", "revocation_pending"])])
+        self.env.add_to_compute(Entry._fields["lane_id"], queued)
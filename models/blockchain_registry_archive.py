@@ -0,0 +1,210 @@
+import logging
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+from . import metrics
+
+_logger = logging.getLogger(__name__)
+
+# Columnas copiadas de blockchain_registry_entry al archivar (y al restaurar)
+ARCHIVED_COLUMNS = [
+    "content_hash",
+    "status",
+    "tx_hash",
+    "block_timestamp",
+    "block_number",
+    "log_index",
+    "revocation_tx_hash",
+    "revocation_date",
+    "sender_address",
+    "related_model",
+    "related_id",
+    "company_id",
+    "merkle_batch_id",
+    "merkle_leaf_index",
+    "merkle_proof",
+]
+
+
+class BlockchainRegistryArchive(models.Model):
+    _name = "blockchain.registry.archive"
+    _description = "Blockchain Document Registry Archive"
+    _order = "id desc"
+    _rec_name = "content_hash"
+    _log_access = False
+
+    content_hash = fields.Char(string="Document Hash", required=True, readonly=True)
+    status = fields.Selection(
+        [("confirmed", "Confirmed"), ("revoked", "Revoked")],
+        string="Status",
+        required=True,
+        readonly=True,
+    )
+    tx_hash = fields.Char(string="Transaction Hash", readonly=True)
+    block_timestamp = fields.Datetime(string="Block Timestamp", readonly=True)
+    block_number = fields.Integer(string="Block Number", readonly=True)
+    log_index = fields.Integer(string="Log Index", readonly=True)
+    revocation_tx_hash = fields.Char(string="Revocation Tx Hash", readonly=True)
+    revocation_date = fields.Datetime(string="Revocation Date", readonly=True)
+    sender_address = fields.Char(string="Sender Wallet", readonly=True)
+    related_model = fields.Char(string="Origin Model", readonly=True)
+    related_id = fields.Integer(string="Origin ID", readonly=True)
+    company_id = fields.Many2one("res.company", string="Company", readonly=True)
+    merkle_batch_id = fields.Many2one(
+        "blockchain.merkle.batch", string="Merkle Batch", readonly=True, ondelete="set null"
+    )
+    merkle_leaf_index = fields.Integer(string="Merkle Leaf Index", readonly=True)
+    merkle_proof = fields.Text(string="Merkle Proof", readonly=True)
+    created_at = fields.Datetime(
+        string="Registered On", readonly=True, help="Creation date of the original entry."
+    )
+    archived_at = fields.Datetime(string="Archived On", readonly=True)
+
+    _sql_constraints = [
+        (
+            "content_hash_unique",
+            "unique(content_hash)",
+            "This document hash is already archived.",
+        )
+    ]
+
+    def init(self):
+        super().init()
+        create_index(
+            self.env.cr,
+            "blockchain_registry_archive_related_idx",
+            self._table,
+            ["related_model", "related_id"],
+        )
+
+    def _certified_models(self):
+        """Modelos concretos que usan blockchain.certified.mixin"""
+        return [
+            self.env[name]
+            for name, model in self.env.registry.items()
+            if not model._abstract
+            and "blockchain_archive_id" in model._fields
+            and "blockchain_entry_id" in model._fields
+        ]
+
+    @api.model
+    @metrics.timed_cron("archive")
+    def _cron_archive_entries(self):
+        """CRON: Mueve al archivo las entradas confirmadas o revocadas antiguas.
+
+        La tabla de entradas queda con lo que sigue en curso y lo reciente, de
+        modo que el coste de los crons no crece con el histórico. Cada llamada
+        procesa un bloque y avisa al planificador si queda trabajo pendiente.
+        """
+        params = self.env["ir.config_parameter"].sudo()
+        days = int(params.get_param("berpia_blockchain_core.archive_after_days", 365))
+        batch_size = int(params.get_param("berpia_blockchain_core.archive_batch_size", 10000))
+        if days <= 0:
+            return
+
+        Entry = self.env["blockchain.registry.entry"]
+        Entry.flush_model()
+        cutoff = fields.Datetime.subtract(fields.Datetime.now(), days=days)
+        cr = self.env.cr
+        cr.execute(
+            """
+            SELECT id
+              FROM blockchain_registry_entry
+             WHERE status IN ('confirmed', 'revoked')
+               AND create_date < %s
+               AND claimed_by IS NULL
+             ORDER BY create_date, id
+             LIMIT %s
+            """,
+            (cutoff, batch_size + 1),
+        )
+        ids = [row[0] for row in cr.fetchall()]
+        remaining = len(ids) > batch_size
+        ids = ids[:batch_size]
+        if ids:
+            self._archive_entries(ids)
+            _logger.info(f"Archived {len(ids)} blockchain registry entries")
+        self.env["ir.cron"]._notify_progress(done=len(ids), remaining=int(remaining))
+
+    @api.model
+    def _archive_entries(self, entry_ids):
+        """Copia las entradas al archivo, reenlaza los documentos y las borra"""
+        cr = self.env.cr
+        columns = ", ".join(ARCHIVED_COLUMNS)
+        cr.execute(
+            f"""
+            INSERT INTO blockchain_registry_archive ({columns}, created_at, archived_at)
+            SELECT {columns}, create_date, now() at time zone 'UTC'
+              FROM blockchain_registry_entry
+             WHERE id = ANY(%s)
+            ON CONFLICT (content_hash) DO NOTHING
+            """,
+            (entry_ids,),
+        )
+        for model in self._certified_models():
+            model.flush_model(["blockchain_entry_id", "blockchain_archive_id"])
+            cr.execute(
+                f"""
+                UPDATE {model._table} AS r
+                   SET blockchain_archive_id = a.id
+                  FROM blockchain_registry_entry e
+                  JOIN blockchain_registry_archive a ON a.content_hash = e.content_hash
+                 WHERE r.blockchain_entry_id = e.id
+                   AND e.id = ANY(%s)
+                """,
+                (entry_ids,),
+            )
+        # La FK del mixin (ondelete set null) suelta el enlace a la entrada
+        cr.execute("DELETE FROM blockchain_registry_entry WHERE id = ANY(%s)", (entry_ids,))
+        self.env.invalidate_all()
+
+    def action_verify_on_chain_manual(self):
+        """Verificación manual directamente sobre la fila archivada"""
+        self.ensure_one()
+        return self.env["blockchain.registry.entry"]._verify_record_on_chain(self)
+
+    def _restore(self):
+        """Devuelve las entradas archivadas a la tabla activa (p. ej. para revocarlas)"""
+        if not self:
+            return self.env["blockchain.registry.entry"]
+        Entry = self.env["blockchain.registry.entry"]
+        entries = Entry.create(
+            [
+                {
+                    **{column: archive[column] for column in ARCHIVED_COLUMNS},
+                    "company_id": archive.company_id.id,
+                    "merkle_batch_id": archive.merkle_batch_id.id,
+                }
+                for archive in self
+            ]
+        )
+        # create() pone la fecha actual: recuperamos la de la entrada original
+        entries.flush_recordset()
+        self.env.cr.execute(
+            """
+            UPDATE blockchain_registry_entry AS e
+               SET create_date = a.created_at
+              FROM blockchain_registry_archive a
+             WHERE a.content_hash = e.content_hash
+               AND a.id = ANY(%s)
+               AND e.id = ANY(%s)
+            """,
+            (self.ids, entries.ids),
+        )
+        entries.invalidate_recordset(["create_date"])
+        entry_by_archive = {
+            archive.id: entry.id for archive, entry in zip(self, entries)
+        }
+        for model in self._certified_models():
+            records = model.search(
+                [("blockchain_archive_id", "in", self.ids)]
+            )
+            record_ids_by_entry = {}
+            for record in records:
+                entry_id = entry_by_archive[record.blockchain_archive_id.id]
+                record_ids_by_entry.setdefault(entry_id, []).append(record.id)
+            for entry_id, record_ids in record_ids_by_entry.items():
+                records.browse(record_ids).write(
+                    {"blockchain_entry_id": entry_id, "blockchain_archive_id": False}
+                )
+        self.unlink()
+        return entries
@@ -1,25 +1,51 @@
+import hashlib
+import json
 import logging
 import os
-from odoo import models, fields, api, _
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import UserError
+from odoo.tools.sql import create_index, index_exists
+from . import async_engine, fee_oracle, merkle, metrics, queue_scheduler, rpc_batch, tx_signer
 from .abi import UNIVERSAL_REGISTRY_ABI
+from .blockchain_client import get_client, web3_available
+from .nonce_manager import MAX_RENONCE_ROUNDS, NonceManager, is_nonce_error
+from .ttl_cache import TTLCache
 
 _logger = logging.getLogger(__name__)
 
-try:
-    import warnings
+# Resultados de verifyDocument por (contrato, hash), compartidos por el proceso
+_verification_cache = TTLCache(maxsize=50000)
 
-    # Suprimimos websockets.legacy deprecation warning proveniente de la dependencia de web3
-    with warnings.catch_warnings():
-        warnings.filterwarnings(
-            "ignore",
-            category=DeprecationWarning,
-            message=".*websockets.legacy is deprecated.*",
-        )
-        from web3 import Web3
-except ImportError as e:
-    _logger.warning(f"Failed to import Web3: {e}")
-    Web3 = None
+QUEUE_CRON = "berpia_blockchain_core.ir_cron_blockchain_process_queue"
+RECEIPTS_CRON = "berpia_blockchain_core.ir_cron_blockchain_check_receipts"
+# Reintento de la cola cuando no puede enviarse: comisión alta o sin RPC (segundos)
+QUEUE_RETRY_DELAY = 120
+# Espera máxima entre comprobaciones de recibos programadas (segundos)
+RECEIPT_MAX_DELAY = 300
+INVALID_HASH_MESSAGE = "Hash inválido: se esperaba un valor hexadecimal de 32 bytes."
+
+
+def _worker_identity():
+    """Identifica el worker que reclama entradas de la cola (host:pid:hilo)"""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+
+def _load_signer_keys():
+    """Claves de las wallets firmantes, leídas siempre de variables de entorno.
+
+    ODOO_BLOCKCHAIN_PRIVATE_KEYS admite varias claves separadas por comas; si no
+    está definida se usa la clave única ODOO_BLOCKCHAIN_PRIVATE_KEY.
+    """
+    raw = os.environ.get("ODOO_BLOCKCHAIN_PRIVATE_KEYS") or os.environ.get(
+        "ODOO_BLOCKCHAIN_PRIVATE_KEY", ""
+    )
+    keys = [key.strip() for key in raw.split(",") if key.strip()]
+    return list(dict.fromkeys(keys))
 
 
 class BlockchainRegistryEntry(models.Model):
@@ -32,7 +58,6 @@ class BlockchainRegistryEntry(models.Model):
     content_hash = fields.Char(
         string="Document Hash",
         required=True,
-        index=True,
         copy=False,
         help="SHA256/Keccak256 hash of the document content.",
     )
@@ -52,7 +77,6 @@ class BlockchainRegistryEntry(models.Model):
         default="draft",
         required=True,
         copy=False,
-        index=True,
     )
 
     # --- Metadata ---
@@ -60,6 +84,8 @@ class BlockchainRegistryEntry(models.Model):
     block_timestamp = fields.Datetime(
         string="Block Timestamp", copy=False, readonly=True
     )
+    block_number = fields.Integer(string="Block Number", copy=False, readonly=True)
+    log_index = fields.Integer(string="Log Index", copy=False, readonly=True)
 
     revocation_tx_hash = fields.Char(
         string="Revocation Tx Hash", copy=False, readonly=True
@@ -73,6 +99,83 @@ class BlockchainRegistryEntry(models.Model):
     # --- Relacion ---
     related_model = fields.Char(string="Origin Model", index=True)
     related_id = fields.Integer(string="Origin ID", index=True)
+    company_id = fields.Many2one(
+        "res.company",
+        string="Company",
+        default=lambda self: self.env.company,
+        index=True,
+    )
+
+    # --- Prioridad en la cola ---
+    lane_id = fields.Many2one(
+        "blockchain.queue.lane",
+        string="Priority Lane",
+        compute="_compute_lane_id",
+        store=True,
+        readonly=False,
+        index=True,
+        ondelete="set null",
+        help="Queue lane (by origin model and company) that decides the share of each queue run. Entries are processed first-in first-out within a lane.",
+    )
+
+    # --- Wallet emisora ---
+    sender_address = fields.Char(
+        string="Sender Wallet",
+        copy=False,
+        readonly=True,
+        index=True,
+        help="Wallet that signed the registration. Revocations are sent from the same wallet.",
+    )
+
+    # --- Seguimiento de la transacción en el mempool ---
+    submitted_at = fields.Datetime(string="Submitted At", copy=False, readonly=True)
+    tx_nonce = fields.Integer(string="Transaction Nonce", copy=False, readonly=True)
+    tx_max_fee = fields.Float(
+        string="Max Fee (wei)",
+        copy=False,
+        readonly=True,
+        help="maxFeePerGas of the last broadcast transaction (gasPrice for legacy transactions).",
+    )
+    tx_priority_fee = fields.Float(
+        string="Priority Fee (wei)",
+        copy=False,
+        readonly=True,
+        help="maxPriorityFeePerGas of the last broadcast transaction. Zero for legacy transactions.",
+    )
+    replacement_count = fields.Integer(
+        string="Fee Bumps", copy=False, readonly=True
+    )
+    replaced_tx_hashes = fields.Text(
+        string="Replaced Transactions",
+        copy=False,
+        readonly=True,
+        help="Previous hashes broadcast with the same nonce, one per line. Any of them may still be the one mined.",
+    )
+
+    # --- Reclamación de cola (varios workers) ---
+    claimed_by = fields.Char(string="Claimed By", copy=False, readonly=True)
+    claim_expires_at = fields.Datetime(
+        string="Claim Expires At", copy=False, readonly=True
+    )
+
+    # --- Anclaje Merkle ---
+    merkle_batch_id = fields.Many2one(
+        "blockchain.merkle.batch",
+        string="Merkle Batch",
+        copy=False,
+        readonly=True,
+        index=True,
+        ondelete="set null",
+    )
+    merkle_leaf_index = fields.Integer(
+        string="Merkle Leaf Index", copy=False, readonly=True
+    )
+    merkle_proof = fields.Text(
+        string="Merkle Proof",
+        copy=False,
+        readonly=True,
+        help="JSON list of sibling hashes needed to rebuild the batch root from this document hash.",
+    )
 
     # --- Hash Unico ---
     _sql_constraints = [
@@ -83,30 +186,102 @@ class BlockchainRegistryEntry(models.Model):
         )
     ]
 
+    def init(self):
+        super().init()
+        cr = self.env.cr
+        # Índices parciales: los crons solo consultan los estados en curso, así
+        # que su coste no depende del histórico de confirmadas/revocadas. Por
+        # eso `status` no lleva índice propio, ni `content_hash`, que ya tiene
+        # el de la restricción unique.
+        create_index(
+            cr,
+            "blockchain_registry_entry_queue_idx",
+            self._table,
+            ["status", "lane_id", "create_date", "id"],
+            where="status IN ('pending', 'revocation_pending')",
+        )
+        create_index(
+            cr,
+            "blockchain_registry_entry_inflight_idx",
+            self._table,
+            ["status", "submitted_at"],
+            where="status IN ('submitted', 'revocation_submitted')",
+        )
+        # Orden por defecto de las vistas (create_date desc)
+        create_index(
+            cr,
+            "blockchain_registry_entry_create_date_idx",
+            self._table,
+            ["create_date DESC", "id DESC"],
+        )
+        # Búsquedas del mixin por hash resueltas solo con el índice
+        if not index_exists(cr, "blockchain_registry_entry_hash_covering_idx"):
+            cr.execute(
+                f"""
+                CREATE INDEX blockchain_registry_entry_hash_covering_idx
+                    ON {self._table} (content_hash)
+                    INCLUDE (id, status, related_model, related_id)
+                """
+            )
+
     def _post_to_related_chatter(self, body, subtype_xmlid="mail.mt_note"):
         """Helper para publicar mensajes en el chat del documento de origen"""
-        self.ensure_one()
-        if self.related_model and self.related_id:
+        self._post_chatter_batch([(record, body) for record in self], subtype_xmlid)
+
+    @api.model
+    def _post_chatter_batch(self, messages, subtype_xmlid="mail.mt_note"):
+        """Publica [(entrada, cuerpo)] en los documentos de origen agrupando por modelo.
+
+        Un único browse/exists por modelo. Las notas internas se registran con
+        _message_log_batch (una sola creación de mensajes) cuando el modelo lo
+        permite; los comentarios pasan por message_post para notificar.
+        """
+        by_model = {}
+        for entry, body in messages:
+            if entry.related_model and entry.related_id:
+                by_model.setdefault(entry.related_model, []).append((entry.related_id, body))
+
+        for model_name, items in by_model.items():
             try:
-                record = self.env[self.related_model].browse(self.related_id)
-                if record.exists() and hasattr(record, "message_post"):
-                    record.message_post(body=body, subtype_xmlid=subtype_xmlid)
+                if model_name not in self.env:
+                    continue
+                records = self.env[model_name].browse({rid for rid, _b in items}).exists()
+                if not hasattr(records, "message_post"):
+                    continue
+                existing = set(records.ids)
+                items = [(rid, body) for rid, body in items if rid in existing]
+
+                if subtype_xmlid == "mail.mt_note" and hasattr(records, "_message_log_batch"):
+                    # Un cuerpo por documento en cada llamada
+                    while items:
+                        bodies, remaining = {}, []
+                        for rid, body in items:
+                            if rid in bodies:
+                                remaining.append((rid, body))
+                            else:
+                                bodies[rid] = body
+                        records.browse(list(bodies))._message_log_batch(bodies=bodies)
+                        items = remaining
+                else:
+                    for rid, body in items:
+                        records.browse(rid).message_post(
+                            body=body, subtype_xmlid=subtype_xmlid
+                        )
             except Exception as e:
                 _logger.warning(f"Could not post to related chatter: {e}")
 
     def action_register(self):
         """Cambia el estado para que se ponga en cola para registro"""
-        for record in self:
-            if record.status in ["draft", "error"]:
-                record.status = "pending"
-                record._post_to_related_chatter(
-                    _("Blockchain Registration Queued (Status: Pending)")
-                )
+        to_queue = self.filtered(lambda r: r.status in ["draft", "error"])
+        to_queue.write({"status": "pending"})
+        to_queue._post_to_related_chatter(
+            _("Blockchain Registration Queued (Status: Pending)")
+        )
+        if to_queue:
+            self._schedule_cron_run(QUEUE_CRON)
 
     def action_reset_draft(self):
-        for record in self:
-            if record.status == "error":
-                record.status = "draft"
+        self.filtered(lambda r: r.status == "error").write({"status": "draft"})
 
     def action_revoke(self):
         """Cambia el estado para que se ponga en cola para revocar"""
@@ -117,16 +292,58 @@ class BlockchainRegistryEntry(models.Model):
                         "You can only revoke a document that has been fully confirmed on the blockchain."
                     )
                 )
+            if record.merkle_batch_id:
+                raise UserError(
+                    _(
+                        "This document was anchored inside a Merkle batch and cannot be revoked on its own."
+                    )
+                )
 
-            record.status = "revocation_pending"
-            record._post_to_related_chatter(
-                _("Revocation Requested. Waiting for blockchain submission...")
-            )
+        self.write({"status": "revocation_pending"})
+        self._post_to_related_chatter(
+            _("Revocation Requested. Waiting for blockchain submission...")
+        )
+        if self:
+            self._schedule_cron_run(QUEUE_CRON)
+
+    @api.model
+    def _schedule_cron_run(self, xml_id, delay=0):
+        """Pide una ejecución del cron dentro de `delay` segundos (0: ya).
+
+        Los disparos se agrupan: si ya hay uno previsto entre hace
+        `dispatch_window` segundos y el momento pedido no se crea otro, así una
+        ráfaga de registros produce un único ciclo. El intervalo fijo del cron
+        queda solo como respaldo.
+        """
+        # ir.cron solo es legible por administradores: quien encola un
+        # documento no necesita serlo
+        cron = self.env.ref(xml_id, raise_if_not_found=False)
+        cron = cron and cron.sudo()
+        if not cron or not cron.active:
+            return
+        window = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("berpia_blockchain_core.dispatch_window", 5)
+        )
+        now = fields.Datetime.now()
+        at = now + timedelta(seconds=delay)
+        pending = self.env["ir.cron.trigger"].sudo().search_count(
+            [
+                ("cron_id", "=", cron.id),
+                ("call_at", ">=", now - timedelta(seconds=window)),
+                ("call_at", "<=", at),
+            ],
+            limit=1,
+        )
+        if not pending:
+            cron._trigger(at)
 
     @api.model
+    @metrics.timed_cron("queue")
     def process_blockchain_queue(self):
         """CRON: Toma las transacciones pendientes y revocaciones para enviarlas a la blockchain"""
-        if not Web3:
+        if not web3_available():
             _logger.warning("Web3 not installed, skipping queue.")
             return
 
@@ -138,110 +355,660 @@ class BlockchainRegistryEntry(models.Model):
         max_gas_gwei = float(
             params.get_param("berpia_blockchain_core.max_gas_price_gwei", 50.0)
         )
-        private_key = os.environ.get("ODOO_BLOCKCHAIN_PRIVATE_KEY")
+        batch_size = int(params.get_param("berpia_blockchain_core.queue_batch_size", 50))
+        anchoring_mode = params.get_param(
+            "berpia_blockchain_core.anchoring_mode", "single"
+        )
+        merkle_batch_size = int(
+            params.get_param("berpia_blockchain_core.merkle_batch_size", 1000)
+        )
+        wallet_assignment = params.get_param(
+            "berpia_blockchain_core.wallet_assignment", "hash"
+        )
+        engine = params.get_param("berpia_blockchain_core.engine", "sync")
+        signer_keys = _load_signer_keys()
 
-        if not all([rpc, contract_addr, private_key]):
+        if not all([rpc, contract_addr, signer_keys]):
             return  # Falta configuración
 
-        # 2. Conexión
-        w3 = Web3(Web3.HTTPProvider(rpc))
+        # Sin nada en cola no se abre conexión con el nodo
+        if not self.search_count(
+            [("status", "in", ["pending", "revocation_pending"])], limit=1
+        ):
+            return
+
+        # 2. Conexión (cliente compartido del proceso)
+        client = get_client(self.env)
+        w3 = client.w3
         if not w3.is_connected():
+            _logger.warning("No RPC endpoint reachable, queue not processed")
+            self._schedule_cron_run(QUEUE_CRON, QUEUE_RETRY_DELAY)
             return
 
-        # 3. Comprobamos el gas, si supera el umbral, dejamos en cola las transacciones
-        current_gas_wei = w3.eth.gas_price
-        current_gas_gwei = w3.from_wei(current_gas_wei, "gwei")
+        # 3. Comprobamos la comisión suavizada: por debajo del umbral se vacía la
+        # cola, dentro de la banda de tolerancia solo las entradas más antiguas
+        fee_cache = int(params.get_param("berpia_blockchain_core.fee_cache_seconds", 30))
+        drain_band = float(params.get_param("berpia_blockchain_core.fee_drain_band", 50)) / 100
+        with metrics.timer("blockchain_phase_duration_seconds", phase="fee_estimate"):
+            estimate = fee_oracle.estimate_fees(w3, client.rpc_url, fee_cache)
+        max_gas_wei = int(max_gas_gwei * 10**9)
+        fee_gwei = w3.from_wei(estimate["smoothed_fee"], "gwei")
+        drain = fee_oracle.drain_fraction(estimate["smoothed_fee"], max_gas_wei, drain_band)
 
-        if current_gas_gwei > max_gas_gwei:
+        if not drain:
+            _logger.info(f"Gas too high ({fee_gwei} > {max_gas_gwei}). Skipping queue.")
+            self._schedule_cron_run(QUEUE_CRON, QUEUE_RETRY_DELAY)
+            return
+        if drain < 1:
+            batch_size = max(int(batch_size * drain), 1)
+            merkle_batch_size = max(int(merkle_batch_size * drain), 1)
             _logger.info(
-                f"Gas too high ({current_gas_gwei} > {max_gas_gwei}). Skipping queue."
+                f"Gas elevated ({fee_gwei} > {max_gas_gwei}). Partial drain of the {batch_size} oldest entries."
             )
+        fees = fee_oracle.tx_fee_params(estimate, max_fee_cap=int(max_gas_wei * (1 + drain_band)))
+
+        contract = client.contract
+        accounts = client.accounts(signer_keys)
+        # Un único nonce leído de la red por wallet para todo el ciclo
+        nonce_managers = {a.address: NonceManager(w3, a.address) for a in accounts}
+
+        # 3. Reclamamos las entradas para este worker. Confirmamos la
+        # transacción para que el lease sea visible al resto de workers y
+        # liberar los bloqueos de fila durante las llamadas RPC.
+        claim_timeout = int(
+            params.get_param("berpia_blockchain_core.claim_timeout", 600)
+        )
+        # El reparto entre carriles y entre registros/revocaciones depende del
+        # peso de cada carril y de su backlog (ver _claim_fair_share).
+        claim_started = time.perf_counter()
+        if anchoring_mode == "merkle":
+            pending_records = self._claim_fair_share(
+                ["pending"], merkle_batch_size, claim_timeout
+            )
+            pending_revocations = self._claim_fair_share(
+                ["revocation_pending"], batch_size, claim_timeout
+            )
+        else:
+            claimed = self._claim_fair_share(
+                ["pending", "revocation_pending"], batch_size, claim_timeout
+            )
+            pending_records = claimed.filtered(lambda r: r.status == "pending")
+            pending_revocations = claimed - pending_records
+        metrics.observe(
+            "blockchain_phase_duration_seconds", time.perf_counter() - claim_started, phase="claim"
+        )
+        if not pending_records and not pending_revocations:
             return
+        # Los hashes mal formados se descartan antes de cualquier llamada RPC
+        pending_records = self._reject_invalid_hashes(pending_records)
+        pending_revocations = self._reject_invalid_hashes(pending_revocations)
+        self.env.cr.commit()  # pylint: disable=invalid-commit
+
+        # Envío: firma, RPC y escritura de los resultados
+        submit_started = time.perf_counter()
+
+        # 3a. En modo Merkle la raíz del lote sale de una única wallet
+        if anchoring_mode == "merkle" and pending_records:
+            account = accounts[0]
+            self._submit_merkle_batch(
+                w3,
+                contract,
+                account,
+                pending_records,
+                chain_id=chain_id,
+                nonce_manager=nonce_managers[account.address],
+                fees=fees,
+            )
+            to_submit = pending_revocations
+        else:
+            to_submit = pending_records | pending_revocations
+
+        # 3b. Repartimos el resto entre las wallets y cada una envía en su
+        # propio hilo con su propio flujo de nonces
+        jobs_by_wallet = self._assign_wallets(to_submit, accounts, wallet_assignment)
+        if engine == "async" and jobs_by_wallet:
+            concurrency = int(
+                params.get_param("berpia_blockchain_core.async_concurrency", 20)
+            )
+            outcomes = async_engine.run(
+                async_engine.submit_transactions(
+                    client.best_rpc_url(),
+                    contract.address,
+                    UNIVERSAL_REGISTRY_ABI,
+                    accounts,
+                    self._prepare_submission_jobs(jobs_by_wallet),
+                    chain_id,
+                    fees,
+                    concurrency,
+                    signing_processes=int(
+                        params.get_param("berpia_blockchain_core.signing_processes", 0)
+                    ),
+                )
+            )
+            self._apply_submissions(outcomes, fees)
+        else:
+            self._submit_transactions(
+                w3,
+                contract,
+                accounts,
+                jobs_by_wallet,
+                nonce_managers,
+                chain_id,
+                fees,
+            )
+        metrics.observe(
+            "blockchain_phase_duration_seconds", time.perf_counter() - submit_started, phase="submit"
+        )
 
-        contract = w3.eth.contract(
-            address=Web3.to_checksum_address(contract_addr), abi=UNIVERSAL_REGISTRY_ABI
+        (pending_records | pending_revocations).write(
+            {"claimed_by": False, "claim_expires_at": False}
         )
-        account = w3.eth.account.from_key(private_key)
 
-        # 3a. Procesamos los registros
-        pending_records = self.search([("status", "=", "pending")], limit=3)
-        for record in pending_records:
-            self._submit_transaction(
-                w3, contract, account, record, is_revocation=False, chain_id=chain_id
+        # Recibos: en cuanto haya podido minarse un bloque. Si queda cola se
+        # encadena otro ciclo sin esperar al intervalo del cron (salvo en
+        # vaciado parcial, que se reparte en el tiempo a propósito).
+        block_time = float(
+            params.get_param("berpia_blockchain_core.expected_block_time", 12)
+        )
+        self._schedule_cron_run(RECEIPTS_CRON, block_time)
+        if self.search_count([("status", "in", ["pending", "revocation_pending"])], limit=1):
+            self._schedule_cron_run(QUEUE_CRON, 0 if drain >= 1 else QUEUE_RETRY_DELAY)
+
+    @api.depends("related_model", "company_id")
+    def _compute_lane_id(self):
+        lanes = self.env["blockchain.queue.lane"].search([])
+        for entry in self:
+            entry.lane_id = next(
+                (lane for lane in lanes if lane._matches(entry.related_model, entry.company_id)),
+                False,
             )
 
-        # 3b. Procesamos las revocaciones
-        pending_revocations = self.search(
-            [("status", "=", "revocation_pending")], limit=3
+    @api.model
+    def _claim_fair_share(self, statuses, capacity, timeout):
+        """Reclama hasta `capacity` entradas repartidas entre carriles.
+
+        Cada (estado, carril) con entradas libres recibe una entrada y una parte
+        del resto según el peso del carril, limitada por su backlog; si la
+        capacidad no llega para todos, primero los que más tiempo llevan
+        esperando (ver queue_scheduler).
+        """
+        now = fields.Datetime.now()
+        backlog = self._read_group(
+            [
+                ("status", "in", statuses),
+                "|",
+                ("claim_expires_at", "=", False),
+                ("claim_expires_at", "<", now),
+            ],
+            ["status", "lane_id"],
+            ["__count", "create_date:min"],
         )
-        for record in pending_revocations:
-            self._submit_transaction(
-                w3, contract, account, record, is_revocation=True, chain_id=chain_id
+        weights = {
+            lane.id: lane.weight for lane in self.env["blockchain.queue.lane"].search([])
+        }
+        shares = queue_scheduler.fair_share(
+            capacity,
+            {
+                (status, lane.id): (
+                    weights.get(lane.id, queue_scheduler.DEFAULT_LANE_WEIGHT),
+                    count,
+                )
+                for status, lane, count, _oldest in backlog
+            },
+            waiting_since={
+                (status, lane.id): oldest for status, lane, _count, oldest in backlog
+            },
+        )
+        claimed = []
+        for (status, lane_id), limit in shares.items():
+            if limit:
+                claimed += self._claim_queue(status, limit, timeout, lane_id=lane_id).ids
+        # FIFO global entre carriles
+        return self.browse(claimed).sorted(lambda r: (r.create_date, r.id))
+
+    @api.model
+    def _claim_queue(self, status, limit, timeout, lane_id=None):
+        """Reclama de forma atómica hasta `limit` entradas en `status` para este worker.
+
+        SKIP LOCKED evita que dos workers esperen por (o tomen) las mismas filas
+        y el lease con caducidad permite recuperar las de un worker caído.
+        Se toman las más antiguas primero (FIFO). Con `lane_id` (False para las
+        entradas sin carril) solo se reclaman las de ese carril.
+        """
+        lane_clause, lane_params = "", []
+        if lane_id:
+            lane_clause, lane_params = "AND lane_id = %s", [lane_id]
+        elif lane_id is not None:
+            lane_clause = "AND lane_id IS NULL"
+        self.flush_model(["status", "claimed_by", "claim_expires_at", "lane_id"])
+        self.env.cr.execute(
+            f"""
+            UPDATE blockchain_registry_entry
+               SET claimed_by = %s,
+                   claim_expires_at = (now() at time zone 'UTC') + %s * interval '1 second'
+             WHERE id IN (
+                    SELECT id
+                      FROM blockchain_registry_entry
+                     WHERE status = %s
+                       AND (claim_expires_at IS NULL
+                            OR claim_expires_at < (now() at time zone 'UTC'))
+                       {lane_clause}
+                     ORDER BY create_date, id
+                     LIMIT %s
+                       FOR UPDATE SKIP LOCKED
+             )
+            RETURNING id
+            """,
+            (_worker_identity(), timeout, status, *lane_params, limit),
+        )
+        ids = [row[0] for row in self.env.cr.fetchall()]
+        self.invalidate_model(["claimed_by", "claim_expires_at"])
+        # Conservamos el orden de la cola
+        return self.browse(ids).sorted(lambda r: (r.create_date, r.id))
+
+    @api.model
+    def _assign_wallets(self, records, accounts, strategy="hash"):
+        """Reparte las entradas entre las wallets firmantes.
+
+        - Revocaciones: siempre desde la wallet que registró el documento; si
+          esa wallet no está configurada la entrada pasa a error (el contrato
+          solo acepta la revocación de quien registró).
+        - "hash": reparto determinista por hash del documento.
+        - "least_loaded": a la wallet con menos transacciones en vuelo.
+        """
+        by_address = {a.address.lower(): a for a in accounts}
+        load = dict.fromkeys(by_address, 0)
+        if strategy == "least_loaded":
+            groups = self._read_group(
+                [
+                    ("status", "in", ("submitted", "revocation_submitted")),
+                    ("sender_address", "!=", False),
+                ],
+                ["sender_address"],
+                ["__count"],
+            )
+            for sender, count in groups:
+                if sender.lower() in load:
+                    load[sender.lower()] = count
+
+        jobs = {}
+        orphans = self.browse()
+        for record in records:
+            is_revocation = record.status == "revocation_pending"
+            address = (record.sender_address or "").lower()
+            if is_revocation and address not in by_address:
+                orphans |= record
+                continue
+            if not is_revocation:
+                if strategy == "least_loaded":
+                    address = min(load, key=load.get)
+                else:
+                    digest = hashlib.sha256(record.content_hash.encode()).digest()
+                    address = list(by_address)[int.from_bytes(digest[:8], "big") % len(by_address)]
+            load[address] += 1
+            jobs.setdefault(by_address[address].address, []).append(record)
+        for record in orphans:
+            record.write(
+                {
+                    "status": "error",
+                    "error_message": _(
+                        "Signer wallet %s is not configured.",
+                        record.sender_address or _("(unknown)"),
+                    ),
+                    "claimed_by": False,
+                    "claim_expires_at": False,
+                }
+            )
+        if orphans:
+            metrics.inc("blockchain_submissions_total", len(orphans), result="missing_wallet")
+            _logger.warning(
+                f"{len(orphans)} revocations left in error: their signer wallet is not configured"
             )
+        return jobs
 
-    def _submit_transaction(
-        self, w3, contract, account, record, is_revocation, chain_id
+    def _submit_transactions(
+        self, w3, contract, accounts, jobs_by_wallet, nonce_managers, chain_id, fees
     ):
-        """Helper para construir, firmar y enviar transacción"""
-        try:
-            nonce = w3.eth.get_transaction_count(account.address, "pending")
+        """Envía las transacciones de cada wallet en paralelo y aplica los resultados.
 
-            # Construimos el hash
-            try:
-                hash_bytes = bytes.fromhex(record.content_hash)
-            except:
-                hash_bytes = record.content_hash.encode()
-
-            if is_revocation:
-                func = contract.functions.revokeDocument(hash_bytes)
-                next_status = "revocation_submitted"
-                tx_field = "revocation_tx_hash"
-            else:
-                func = contract.functions.registerDocument(hash_bytes)
-                next_status = "submitted"
-                tx_field = "tx_hash"
+        Tres etapas: cada wallet estima el gas y construye sus transacciones en
+        su propio hilo, todas se firman juntas (en un pool de procesos si hay
+        `signing_processes`, ver tx_signer) y cada wallet las difunde en orden
+        de nonce. Los hilos solo hacen I/O contra la cadena; la preparación y
+        la escritura en Odoo se hacen en el hilo del cron.
+        """
+        accounts_by_address = {a.address: a for a in accounts}
+        prepared = self._prepare_submission_jobs(jobs_by_wallet)
+        processes = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("berpia_blockchain_core.signing_processes", 0)
+        )
+
+        def run_parallel(task, items):
+            if len(items) > 1:
+                with ThreadPoolExecutor(max_workers=len(items)) as executor:
+                    return list(executor.map(metrics.propagate(lambda item: task(*item)), items))
+            return [task(*item) for item in items]
+
+        def build(address, jobs):
+            """Estima el gas (las llamadas que revertirían no consumen nonce) y
+            construye las transacciones sin firmar con nonces consecutivos"""
+            errors, ready = [], []
+            for job in jobs:
+                func = getattr(contract.functions, job["function"])(job["hash_bytes"])
+                try:
+                    ready.append((job, func, func.estimate_gas({"from": address})))
+                except Exception as e:
+                    _logger.warning(f"Gas estimation failed for entry {job['record_id']}: {e}")
+                    errors.append((job["record_id"], None, str(e), None))
+            built = []
+            for job, func, gas in ready:
+                nonce = nonce_managers[address].allocate()
+                tx_params = {"chainId": chain_id, "from": address, "nonce": nonce, "gas": gas, **fees}
+                try:
+                    built.append((job, func.build_transaction(tx_params)))
+                except Exception as e:
+                    nonce_managers[address].release(nonce)
+                    errors.append((job["record_id"], None, str(e), None))
+            return address, built, errors
+
+        def sign(batches):
+            """{address: [(job, txn)]} -> {address: [(job, txn, raw, error)]}"""
+            items = [
+                (address, job, txn) for address, built in batches.items() for job, txn in built
+            ]
+            signed = tx_signer.sign_transactions(
+                [(accounts_by_address[address].key, txn) for address, _job, txn in items],
+                processes,
+            )
+            result = {address: [] for address in batches}
+            for (address, job, txn), (raw, _tx_hash, error) in zip(items, signed):
+                result[address].append((job, txn, raw, error))
+            return result
 
-            # Construimos la transacción
-            txn = func.build_transaction(
+        def broadcast(address, signed, results):
+            nonce_manager = nonce_managers[address]
+            pending, retried, rounds = list(signed), set(), 0
+            while pending:
+                job, txn, raw, error = pending.pop(0)
+                if raw is not None:
+                    try:
+                        tx_hash_hex = w3.to_hex(w3.eth.send_raw_transaction(raw))
+                        results.append((job["record_id"], tx_hash_hex, None, txn["nonce"]))
+                        continue
+                    except Exception as e:
+                        error = e
+                # Si el nodo rechaza el nonce, resincronizamos y reintentamos una sola vez
+                retry = is_nonce_error(error) and job["record_id"] not in retried
+                if retry:
+                    _logger.warning(f"Nonce {txn['nonce']} rejected: {error}")
+                    retried.add(job["record_id"])
+                    pending.insert(0, (job, txn, None, None))
+                else:
+                    _logger.warning(f"Failed to submit tx from {address}: {error}")
+                    results.append((job["record_id"], None, str(error), None))
+                if not pending:
+                    break
+                # El nonce no llegó a usarse: el resto se renumera y se vuelve a firmar
+                rounds += 1
+                if rounds > MAX_RENONCE_ROUNDS:
+                    message = f"No enviada: fallaron varias transacciones anteriores de la wallet ({error})"
+                    results += [(other["record_id"], None, message, None) for other, *_rest in pending]
+                    break
+                nonce_manager.resync()
+                pending = sign(
+                    {
+                        address: [
+                            (other, dict(other_txn, nonce=nonce_manager.allocate()))
+                            for other, other_txn, *_rest in pending
+                        ]
+                    }
+                )[address]
+            return address, results
+
+        built = run_parallel(build, list(prepared.items()))
+        with metrics.timer("blockchain_phase_duration_seconds", phase="sign"):
+            signed = sign({address: txns for address, txns, _errors in built})
+        outcomes = run_parallel(
+            broadcast, [(address, signed[address], errors) for address, _txns, errors in built]
+        )
+        self._apply_submissions(outcomes, fees)
+
+    @api.model
+    def _reject_invalid_hashes(self, records):
+        """Pasa a error las entradas cuyo hash no es un bytes32 y devuelve el resto"""
+        hashes = tx_signer.hashes_to_bytes32(records.mapped("content_hash"))
+        invalid = self.browse(
+            [record.id for record, hash_bytes in zip(records, hashes) if hash_bytes is None]
+        )
+        if invalid:
+            invalid.write(
                 {
-                    "chainId": chain_id,
-                    "gasPrice": w3.eth.gas_price,
-                    "from": account.address,
-                    "nonce": nonce,
+                    "status": "error",
+                    "error_message": INVALID_HASH_MESSAGE,
+                    "claimed_by": False,
+                    "claim_expires_at": False,
                 }
             )
+            metrics.inc("blockchain_submissions_total", len(invalid), result="invalid_hash")
+            _logger.warning(f"Rejected {len(invalid)} queue entries with malformed hashes")
+        return records - invalid
 
-            # Firmamos la transaccion y la enviamos
-            signed_txn = w3.eth.account.sign_transaction(txn, private_key=account.key)
-            tx_hash_bytes = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-            tx_hash_hex = w3.to_hex(tx_hash_bytes)
+    @api.model
+    def _prepare_submission_jobs(self, jobs_by_wallet):
+        """Datos de cada envío, sin objetos del ORM, para usarlos fuera del hilo del cron.
 
-            vals = {
-                "status": next_status,
-                "error_message": False,
-                tx_field: tx_hash_hex,
-            }
-            record.write(vals)
+        Los hashes ya se han validado al reclamar (ver _reject_invalid_hashes).
+        """
+        prepared = {}
+        for address, records in jobs_by_wallet.items():
+            hashes = tx_signer.hashes_to_bytes32([record.content_hash for record in records])
+            prepared[address] = [
+                {
+                    "record_id": record.id,
+                    "function": "revokeDocument"
+                    if record.status == "revocation_pending"
+                    else "registerDocument",
+                    "hash_bytes": hash_bytes,
+                }
+                for record, hash_bytes in zip(records, hashes)
+            ]
+        return prepared
 
-            action_label = "Revocación" if is_revocation else "Registro"
-            msg = f"Transacción de {action_label} Enviada. Hash Tx: {tx_hash_hex}"
-            record._post_to_related_chatter(msg)
-            _logger.info(
-                f"{action_label} Tx sent for {record.content_hash}: {tx_hash_hex}"
+    @api.model
+    def _apply_submissions(self, outcomes, fees=None):
+        """Escribe en bloque los resultados [(sender, [(record_id, tx_hash, error, nonce)])].
+
+        Una escritura ORM por estado destino (para que se recalculen los campos
+        dependientes) y una única sentencia SQL para los valores propios de
+        cada fila (hash de tx, wallet y nonce).
+        """
+        errors = {}
+        registered, revoked = {}, {}
+        for sender, results in outcomes:
+            for record_id, tx_hash_hex, error, nonce in results:
+                if error:
+                    errors.setdefault(error, []).append(record_id)
+                else:
+                    registered[record_id] = (tx_hash_hex, sender, nonce)
+
+        # Separamos las revocaciones por su estado actual
+        for record in self.browse(list(registered)):
+            if record.status == "revocation_pending":
+                tx_hash_hex, _sender, nonce = registered.pop(record.id)
+                revoked[record.id] = (tx_hash_hex, nonce)
+
+        for error, ids in errors.items():
+            self.browse(ids).write({"status": "error", "error_message": error})
+        metrics.inc("blockchain_submissions_total", len(registered) + len(revoked), result="sent")
+        metrics.inc("blockchain_submissions_total", sum(map(len, errors.values())), result="error")
+
+        tracking = self._submission_tracking_vals(fees)
+        if registered:
+            self._bulk_update_columns(registered, ["tx_hash", "sender_address", "tx_nonce"])
+            # Un registro individual sustituye al lote fallido en el que estuviera
+            self.browse(list(registered)).write(
+                dict(
+                    tracking,
+                    status="submitted",
+                    error_message=False,
+                    merkle_batch_id=False,
+                    merkle_leaf_index=False,
+                    merkle_proof=False,
+                )
             )
+        if revoked:
+            self._bulk_update_columns(revoked, ["revocation_tx_hash", "tx_nonce"])
+            self.browse(list(revoked)).write(
+                dict(tracking, status="revocation_submitted", error_message=False)
+            )
+
+        self._post_chatter_batch(
+            [
+                (record, f"Transacción de Registro Enviada. Hash Tx: {record.tx_hash}")
+                for record in self.browse(list(registered))
+            ]
+            + [
+                (
+                    record,
+                    f"Transacción de Revocación Enviada. Hash Tx: {record.revocation_tx_hash}",
+                )
+                for record in self.browse(list(revoked))
+            ]
+        )
+        _logger.info(
+            f"Submitted {len(registered)} registrations and {len(revoked)} revocations, {sum(map(len, errors.values()))} errors"
+        )
+
+    @api.model
+    def _submission_tracking_vals(self, fees):
+        """Valores comunes de seguimiento de una transacción recién difundida"""
+        fees = fees or {}
+        return {
+            "submitted_at": fields.Datetime.now(),
+            "tx_max_fee": fees.get("maxFeePerGas") or fees.get("gasPrice") or 0.0,
+            "tx_priority_fee": fees.get("maxPriorityFeePerGas") or 0.0,
+            "replacement_count": 0,
+            "replaced_tx_hashes": False,
+        }
 
+    @api.model
+    def _bulk_update_columns(self, rows, columns):
+        """UPDATE en una sola sentencia de columnas con un valor distinto por fila.
+
+        `rows` es {id: (valor_columna_1, valor_columna_2, ...)}. Solo para
+        columnas de las que no dependen campos calculados almacenados.
+        """
+        if not rows:
+            return
+        self.flush_model(columns)
+        ids = list(rows)
+        arrays = [[rows[rid][i] for rid in ids] for i in range(len(columns))]
+        assignments = ", ".join(f"{col} = v.{col}" for col in columns)
+        casts = ", ".join(
+            f"%s::{self._fields[col].column_type[1]}[]" for col in columns
+        )
+        self.env.cr.execute(
+            f"""
+            UPDATE {self._table} AS e
+               SET {assignments},
+                   write_uid = %s,
+                   write_date = (now() at time zone 'UTC')
+              FROM unnest(%s::int[], {casts}) AS v(id, {", ".join(columns)})
+             WHERE e.id = v.id
+            """,
+            [self.env.uid, ids, *arrays],
+        )
+        self.browse(ids).invalidate_recordset(columns + ["write_uid", "write_date"])
+
+    def _send_contract_call(self, w3, account, func, chain_id, nonce_manager, fees):
+        """Construye, firma y envía la llamada al contrato. Devuelve (hash de la tx, nonce).
+
+        `fees` son los campos de comisión del oráculo (EIP-1559 o gasPrice).
+
+        Si el nodo rechaza el nonce, resincronizamos y reintentamos una sola vez.
+        """
+        for attempt in range(2):
+            nonce = nonce_manager.allocate()
+            try:
+                tx_hash_hex = self._sign_and_send(
+                    w3,
+                    account,
+                    func,
+                    {
+                        "chainId": chain_id,
+                        "from": account.address,
+                        "nonce": nonce,
+                        **fees,
+                    },
+                )
+                return tx_hash_hex, nonce
+            except Exception as e:
+                nonce_manager.release(nonce)
+                if attempt == 0 and is_nonce_error(e):
+                    _logger.warning(f"Nonce {nonce} rejected: {e}")
+                    nonce_manager.resync()
+                    continue
+                raise
+
+    def _sign_and_send(self, w3, account, func, tx_params):
+        """Construye, firma y difunde la llamada con los parámetros dados"""
+        txn = func.build_transaction(tx_params)
+        signed_txn = w3.eth.account.sign_transaction(txn, private_key=account.key)
+        return w3.to_hex(w3.eth.send_raw_transaction(signed_txn.raw_transaction))
+
+    @api.model
+    def _submit_merkle_batch(
+        self, w3, contract, account, pending_records, chain_id, nonce_manager, fees
+    ):
+        """Agrupa los registros pendientes en un árbol de Merkle y ancla solo la raíz"""
+        leaves = self._reject_invalid_hashes(pending_records)
+        if not leaves:
+            return
+
+        batch = self.env["blockchain.merkle.batch"]._create_from_entries(leaves)
+        try:
+            func = contract.functions.registerDocument(bytes.fromhex(batch.root_hash))
+            tx_hash_hex, nonce = self._send_contract_call(
+                w3, account, func, chain_id, nonce_manager, fees
+            )
         except Exception as e:
-            record.write({"status": "error", "error_message": str(e)})
-            _logger.exception(f"Failed to submit tx for {record.content_hash}")
+            batch._mark_failed(str(e))
+            _logger.exception(f"Failed to submit Merkle batch {batch.root_hash}")
+            return
+
+        batch.write({"status": "submitted", "tx_hash": tx_hash_hex})
+        leaves.write(
+            dict(
+                self._submission_tracking_vals(fees),
+                status="submitted",
+                error_message=False,
+                tx_hash=tx_hash_hex,
+                sender_address=account.address,
+                tx_nonce=nonce,
+            )
+        )
+        msg = f"Transacción de Registro Enviada (Lote Merkle de {len(leaves)} documentos). Hash Tx: {tx_hash_hex}"
+        leaves._post_to_related_chatter(msg)
+        _logger.info(
+            f"Merkle batch {batch.root_hash} ({len(leaves)} docs) sent: {tx_hash_hex}"
+        )
 
     @api.model
+    @metrics.timed_cron("receipts")
     def check_transaction_receipts(self):
         """CRON: Comprobamos las transacciones enviadas (registros y revocaciones)"""
-        if not Web3:
+        if not web3_available():
             return
 
+        # Los documentos anclados en un lote se confirman a través del lote
         records_reg = self.search(
-            [("status", "=", "submitted"), ("tx_hash", "!=", False)]
+            [
+                ("status", "=", "submitted"),
+                ("tx_hash", "!=", False),
+                ("merkle_batch_id", "=", False),
+            ]
         )
         records_rev = self.search(
             [
@@ -250,98 +1017,586 @@ class BlockchainRegistryEntry(models.Model):
             ]
         )
 
-        if not records_reg and not records_rev:
+        Batch = self.env["blockchain.merkle.batch"]
+        batch_count = Batch.search_count([("status", "=", "submitted")])
+        has_batches = bool(batch_count)
+
+        if not records_reg and not records_rev and not has_batches:
             return
 
         params = self.env["ir.config_parameter"].sudo()
-        rpc = params.get_param("berpia_blockchain_core.rpc_url")
-        w3 = Web3(Web3.HTTPProvider(rpc))
+        chunk_size = int(
+            params.get_param("berpia_blockchain_core.receipt_batch_size", 100)
+        )
+        client = get_client(self.env)
+        if not client:
+            return
+        w3 = client.w3
 
-        for record in records_reg:
-            self._check_single_receipt(w3, record, is_revocation=False)
+        if has_batches:
+            with metrics.timer("blockchain_phase_duration_seconds", phase="merkle_receipts"):
+                Batch._check_batch_receipts(w3, chunk_size)
 
-        for record in records_rev:
-            self._check_single_receipt(w3, record, is_revocation=True)
+        fetch_started = time.perf_counter()
+        tx_hashes = records_reg.mapped("tx_hash") + records_rev.mapped(
+            "revocation_tx_hash"
+        )
+        if params.get_param("berpia_blockchain_core.engine", "sync") == "async":
+            # 1-2. Recibos y bloques consultados en paralelo con asyncio
+            concurrency = int(
+                params.get_param("berpia_blockchain_core.async_concurrency", 20)
+            )
+            receipts, block_timestamps = async_engine.run(
+                async_engine.fetch_receipts(client.best_rpc_url(), tx_hashes, concurrency)
+            )
+        else:
+            # 1. Recibos de todas las transacciones en peticiones JSON-RPC batch
+            receipts = self._fetch_receipts(w3, tx_hashes, chunk_size)
 
-    def _check_single_receipt(self, w3, record, is_revocation):
-        tx_hash = record.revocation_tx_hash if is_revocation else record.tx_hash
-        try:
-            receipt = w3.eth.get_transaction_receipt(tx_hash)
-            if receipt:
-                if receipt["status"] == 1:
-                    # Exitoso
-                    if is_revocation:
-                        record.status = "revoked"
-                        record.revocation_date = fields.Datetime.now()
-                        xml_id = (
-                            "berpia_blockchain_core.email_template_blockchain_revoked"
-                        )
-                    else:
-                        record.status = "confirmed"
-                        # Optional: Obtenemos el block timestamp
-                        block = w3.eth.get_block(receipt["blockNumber"])
-                        from datetime import datetime
+            # 2. Un único get_block por bloque: varios recibos comparten bloque
+            block_timestamps = self._fetch_block_timestamps(
+                w3,
+                [
+                    receipts[tx]["blockNumber"]
+                    for tx in records_reg.mapped("tx_hash")
+                    if tx in receipts and receipts[tx]["status"] == 1
+                ],
+                chunk_size,
+            )
 
-                        record.block_timestamp = datetime.fromtimestamp(
-                            block["timestamp"]
-                        )
-                        xml_id = (
-                            "berpia_blockchain_core.email_template_blockchain_connected"
-                        )
+        metrics.observe(
+            "blockchain_phase_duration_seconds", time.perf_counter() - fetch_started, phase="fetch_receipts"
+        )
 
-                    # Render Template
-                    try:
-                        template = self.env.ref(xml_id, raise_if_not_found=False)
-                        if template:
-                            # Renderizamos el body_html pasando los IDs
-                            msg = template._render_field(
-                                "body_html", [record.id], compute_lang=True
-                            )[record.id]
-                        else:
-                            msg = "El estado del documento se ha actualizado en la Blockchain (Plantilla no encontrada)."
-                    except Exception as e:
-                        _logger.error(f"Error rendering template {xml_id}: {e}")
-                        msg = "El estado del documento se ha actualizado en la Blockchain."
+        # 3. Aplicamos en bloque los resultados que ya tenemos en memoria
+        results = []
+        for records, is_revocation in ((records_reg, False), (records_rev, True)):
+            for record in records:
+                tx_hash = record.revocation_tx_hash if is_revocation else record.tx_hash
+                receipt = receipts.get(tx_hash)
+                if receipt:  # Si no, tx no encontrada aún (pending in mempool)
+                    results.append((record, receipt, is_revocation))
+        with metrics.timer("blockchain_phase_duration_seconds", phase="apply_receipts"):
+            self._apply_receipts(results, block_timestamps, w3=w3)
 
-                    record._post_to_related_chatter(
-                        msg, subtype_xmlid="mail.mt_comment"
-                    )
-                else:
-                    # Error al registrar transacción
-                    record.status = "error"
-                    record.error_message = (
-                        f"Transacción {tx_hash} Revertida en la Cadena"
+        # 4. Próxima comprobación según lo que sigue en vuelo
+        remaining_batches = Batch.search_count([("status", "=", "submitted")]) if has_batches else 0
+        delay = queue_scheduler.receipt_check_delay(
+            len(tx_hashes) - len(results) + remaining_batches,
+            block_time=float(params.get_param("berpia_blockchain_core.expected_block_time", 12)),
+            chunk_size=chunk_size,
+            progressed=bool(results) or remaining_batches != batch_count,
+            max_delay=RECEIPT_MAX_DELAY,
+        )
+        if delay is not None:
+            self._schedule_cron_run(RECEIPTS_CRON, delay)
+
+    @api.model
+    @metrics.timed_cron("stuck_transactions")
+    def check_stuck_transactions(self):
+        """CRON: Vigila las transacciones que no se minan.
+
+        Una transacción sin recibo tras `stuck_tx_timeout` segundos se vuelve a
+        difundir con el mismo nonce y la comisión subida (`fee_bump_percent`,
+        mínimo el 10% que exigen los nodos). Si alguno de los hashes anteriores
+        acaba minado se adopta ese; si el nonce lo ha consumido otra transacción
+        (reemplazada o descartada) la entrada vuelve a la cola.
+        """
+        if not web3_available():
+            return
+
+        params = self.env["ir.config_parameter"].sudo()
+        timeout = int(params.get_param("berpia_blockchain_core.stuck_tx_timeout", 600))
+        bump = max(float(params.get_param("berpia_blockchain_core.fee_bump_percent", 12.5)), 10.0) / 100
+        max_replacements = int(params.get_param("berpia_blockchain_core.max_replacements", 5))
+        chunk_size = int(params.get_param("berpia_blockchain_core.receipt_batch_size", 100))
+        cutoff = fields.Datetime.subtract(fields.Datetime.now(), seconds=timeout)
+
+        # Las ya reemplazadas se revisan siempre: puede minarse un hash anterior
+        entries = self.search(
+            [
+                ("status", "in", ["submitted", "revocation_submitted"]),
+                ("sender_address", "!=", False),
+                ("submitted_at", "!=", False),
+                "|",
+                ("submitted_at", "<", cutoff),
+                ("replacement_count", ">", 0),
+            ]
+        )
+        if not entries:
+            return
+
+        client = get_client(self.env)
+        if not client or not client.contract:
+            return
+        w3 = client.w3
+
+        # Una transacción puede cubrir varias entradas (lote Merkle)
+        groups = {}
+        for entry in entries:
+            hash_field = "revocation_tx_hash" if entry.status == "revocation_submitted" else "tx_hash"
+            if entry[hash_field]:
+                groups.setdefault((hash_field, entry[hash_field]), []).append(entry.id)
+        known = {
+            key: [key[1]] + (self.browse(ids[0]).replaced_tx_hashes or "").split()
+            for key, ids in groups.items()
+        }
+        receipts = self._fetch_receipts(
+            w3, [h for hashes in known.values() for h in hashes], chunk_size
+        )
+
+        stuck = {}
+        for (hash_field, current), ids in groups.items():
+            group = self.browse(ids)
+            mined = next((h for h in known[(hash_field, current)] if h in receipts), None)
+            if mined:
+                if mined != current:
+                    # Se minó una versión anterior: el cron de recibos la aplicará
+                    group.write({hash_field: mined})
+                    group.merkle_batch_id.filtered(lambda b: b.tx_hash == current).write(
+                        {"tx_hash": mined}
                     )
-                    record._post_to_related_chatter(
-                        "Acción FALLIDA en Blockchain (Revertida).",
-                        subtype_xmlid="mail.mt_comment",
+                continue
+            if group[0].submitted_at < cutoff:
+                stuck[(hash_field, current)] = group
+        if not stuck:
+            return
+
+        # Nonce ya confirmado de cada wallet y presencia de cada tx en el mempool
+        senders = sorted({g[0].sender_address for g in stuck.values()})
+        nonces = rpc_batch.batch_request(
+            w3, [("eth_getTransactionCount", [a, "latest"]) for a in senders], chunk_size
+        )
+        confirmed_nonce = {
+            a: rpc_batch.to_int(n) for a, n in zip(senders, nonces) if n is not None
+        }
+        stuck_hashes = [current for _field, current in stuck]
+        in_mempool = dict(
+            zip(
+                stuck_hashes,
+                rpc_batch.batch_request(
+                    w3, [("eth_getTransactionByHash", [h]) for h in stuck_hashes], chunk_size
+                ),
+            )
+        )
+
+        fee_cache = int(params.get_param("berpia_blockchain_core.fee_cache_seconds", 30))
+        estimate = fee_oracle.estimate_fees(w3, client.rpc_url, fee_cache)
+        accounts = {a.address: a for a in client.accounts(_load_signer_keys())}
+        chain_id = int(params.get_param("berpia_blockchain_core.chain_id", 1))
+        contract = client.contract
+        messages = []
+
+        for (hash_field, current), group in stuck.items():
+            first = group[0]
+            sender = first.sender_address
+            if sender not in confirmed_nonce:
+                continue
+
+            if confirmed_nonce[sender] > first.tx_nonce:
+                # El nonce lo usó otra transacción y ninguna de las nuestras se minó
+                _logger.warning(f"Transaction {current} was replaced or dropped, requeueing")
+                group._requeue_replaced(current)
+                messages += [
+                    (e, f"Transacción {current} reemplazada o descartada. Documento devuelto a la cola.")
+                    for e in group
+                ]
+                continue
+
+            if first.replacement_count >= max_replacements:
+                _logger.warning(
+                    f"Transaction {current} still pending after {first.replacement_count} fee bumps"
+                )
+                continue
+            account = accounts.get(sender)
+            if not account:
+                _logger.warning(f"Key for wallet {sender} not loaded, cannot replace {current}")
+                continue
+
+            if first.merkle_batch_id:
+                func = contract.functions.registerDocument(bytes.fromhex(first.merkle_batch_id.root_hash))
+            else:
+                function = "revokeDocument" if hash_field == "revocation_tx_hash" else "registerDocument"
+                [hash_bytes] = tx_signer.hashes_to_bytes32([first.content_hash])
+                func = getattr(contract.functions, function)(hash_bytes)
+            fees = fee_oracle.bump_fees(first.tx_max_fee, first.tx_priority_fee, estimate, bump)
+            try:
+                new_hash = self._sign_and_send(
+                    w3,
+                    account,
+                    func,
+                    {"chainId": chain_id, "from": sender, "nonce": first.tx_nonce, **fees},
+                )
+            except Exception as e:
+                # 'nonce too low': se ha minado entretanto, lo veremos en la próxima pasada
+                _logger.warning(f"Could not replace transaction {current}: {e}")
+                continue
+
+            group.write(
+                dict(
+                    self._submission_tracking_vals(fees),
+                    replacement_count=first.replacement_count + 1,
+                    replaced_tx_hashes="\n".join(known[(hash_field, current)]),
+                    **{hash_field: new_hash},
+                )
+            )
+            group.merkle_batch_id.filtered(lambda b: b.tx_hash == current).write(
+                {"tx_hash": new_hash}
+            )
+            state = "en mempool" if in_mempool.get(current) else "descartada por el nodo"
+            messages += [
+                (e, f"Transacción atascada ({state}) reemplazada con mayor comisión. Nuevo Hash Tx: {new_hash}")
+                for e in group
+            ]
+            _logger.info(f"Replaced stuck transaction {current} with {new_hash} (nonce {first.tx_nonce})")
+
+        self._post_chatter_batch(messages)
+
+    def _requeue_replaced(self, current):
+        """Devuelve a la cola las entradas cuya transacción nunca llegó a minarse"""
+        reset = {
+            "submitted_at": False,
+            "tx_nonce": False,
+            "replacement_count": 0,
+            "replaced_tx_hashes": False,
+            "error_message": f"Transacción {current} reemplazada o descartada",
+        }
+        revocations = self.filtered(lambda e: e.status == "revocation_submitted")
+        registrations = self - revocations
+        revocations.write(dict(reset, status="revocation_pending", revocation_tx_hash=False))
+        batches = registrations.merkle_batch_id
+        if batches:
+            batches.write({"status": "error", "error_message": reset["error_message"]})
+        # Las entradas de un lote lo conservan, con su prueba, hasta anclarse de nuevo
+        registrations.write(dict(reset, status="pending", tx_hash=False))
+
+    @api.model
+    def _fetch_receipts(self, w3, tx_hashes, chunk_size):
+        """Recibos por hash de transacción; las que aún no se han minado no aparecen"""
+        tx_hashes = list(dict.fromkeys(tx_hashes))
+        results = rpc_batch.batch_request(
+            w3, [("eth_getTransactionReceipt", [h]) for h in tx_hashes], chunk_size
+        )
+        receipts = {}
+        for tx_hash, raw in zip(tx_hashes, results):
+            if raw:
+                receipts[tx_hash] = {
+                    "status": rpc_batch.to_int(raw["status"]),
+                    "blockNumber": rpc_batch.to_int(raw["blockNumber"]),
+                }
+        return receipts
+
+    @api.model
+    def _fetch_block_timestamps(self, w3, block_numbers, chunk_size):
+        """Timestamp de cada bloque, consultando cada número una sola vez"""
+        numbers = sorted(set(block_numbers))
+        results = rpc_batch.batch_request(
+            w3, [("eth_getBlockByNumber", [hex(n), False]) for n in numbers], chunk_size
+        )
+        return {
+            number: datetime.fromtimestamp(rpc_batch.to_int(block["timestamp"]))
+            for number, block in zip(numbers, results)
+            if block
+        }
+
+    @api.model
+    def _apply_receipts(self, results, block_timestamps, w3=None):
+        """Aplica en bloque los recibos [(entrada, recibo, es_revocación)].
+
+        Una escritura por estado destino; los valores propios de cada fila
+        (bloque, mensaje de error) van en una única sentencia SQL.
+        """
+        confirmed, failed = {}, {}
+        revoked = self.browse()
+        for record, receipt, is_revocation in results:
+            if receipt["status"] != 1:
+                # Error al registrar transacción
+                tx_hash = record.revocation_tx_hash if is_revocation else record.tx_hash
+                failed[record.id] = (f"Transacción {tx_hash} Revertida en la Cadena",)
+            elif is_revocation:
+                revoked |= record
+            else:
+                confirmed[record.id] = receipt["blockNumber"]
+
+        # Timestamps que no vinieron en el lote: un get_block por bloque
+        block_timestamps = dict(block_timestamps)
+        for number in set(confirmed.values()) - set(block_timestamps):
+            if w3 is not None:
+                block = w3.eth.get_block(number)
+                block_timestamps[number] = datetime.fromtimestamp(block["timestamp"])
+
+        if confirmed:
+            self._bulk_update_columns(
+                {
+                    rid: (block_timestamps.get(number), number)
+                    for rid, number in confirmed.items()
+                },
+                ["block_timestamp", "block_number"],
+            )
+            self.browse(list(confirmed)).write({"status": "confirmed"})
+        if revoked:
+            revoked.write({"status": "revoked", "revocation_date": fields.Datetime.now()})
+        if failed:
+            self.browse(list(failed)).write({"status": "error"})
+            self._bulk_update_columns(failed, ["error_message"])
+        metrics.inc("blockchain_receipts_total", len(confirmed), result="confirmed")
+        metrics.inc("blockchain_receipts_total", len(revoked), result="revoked")
+        metrics.inc("blockchain_receipts_total", len(failed), result="reverted")
+
+        self.browse(list(confirmed))._notify_chain_result(is_revocation=False)
+        revoked._notify_chain_result(is_revocation=True)
+        self.browse(list(failed))._post_to_related_chatter(
+            "Acción FALLIDA en Blockchain (Revertida).",
+            subtype_xmlid="mail.mt_comment",
+        )
+
+    def _notify_chain_result(self, is_revocation):
+        """Publica en el documento de origen la plantilla de confirmación o revocación"""
+        if is_revocation:
+            xml_id = "berpia_blockchain_core.email_template_blockchain_revoked"
+        else:
+            xml_id = "berpia_blockchain_core.email_template_blockchain_connected"
+
+        if not self:
+            return
+
+        # Render Template: una sola pasada para todas las entradas. Con
+        # compute_lang el propio render agrupa los ids por idioma.
+        template_id = self._get_notification_template_id(xml_id)
+        if template_id:
+            try:
+                template = self.env["mail.template"].browse(template_id)
+                with metrics.timer("blockchain_phase_duration_seconds", phase="render"):
+                    bodies = template._render_field("body_html", self.ids, compute_lang=True)
+            except Exception as e:
+                _logger.error(f"Error rendering template {xml_id}: {e}")
+                bodies = dict.fromkeys(
+                    self.ids, "El estado del documento se ha actualizado en la Blockchain."
+                )
+        else:
+            bodies = dict.fromkeys(
+                self.ids,
+                "El estado del documento se ha actualizado en la Blockchain (Plantilla no encontrada).",
+            )
+
+        self._post_chatter_batch(
+            [(record, bodies[record.id]) for record in self],
+            subtype_xmlid="mail.mt_comment",
+        )
+
+    @api.model
+    @tools.ormcache("xml_id")
+    def _get_notification_template_id(self, xml_id):
+        """Id de la plantilla de notificación (cacheado por proceso)"""
+        template = self.env.ref(xml_id, raise_if_not_found=False)
+        return template.id if template else False
+
+    @api.model
+    @metrics.timed_cron("indexer")
+    def index_contract_events(self):
+        """CRON: Confirma y revoca entradas a partir de los eventos del contrato (eth_getLogs)
+
+        Recorre los bloques desde el último procesado filtrando por la dirección
+        del contrato y por nuestro emisor, de modo que el coste depende de los
+        bloques escaneados y no del número de entradas en vuelo.
+        """
+        if not web3_available():
+            return
+
+        params = self.env["ir.config_parameter"].sudo()
+        rpc = params.get_param("berpia_blockchain_core.rpc_url")
+        contract_addr = params.get_param("berpia_blockchain_core.contract_address")
+        signer_keys = _load_signer_keys()
+        if not all([rpc, contract_addr, signer_keys]):
+            return
+
+        block_range = int(params.get_param("berpia_blockchain_core.indexer_block_range", 2000))
+        max_ranges = int(params.get_param("berpia_blockchain_core.indexer_max_ranges", 50))
+        confirmations = int(
+            params.get_param("berpia_blockchain_core.indexer_confirmations", 2)
+        )
+        chunk_size = int(
+            params.get_param("berpia_blockchain_core.receipt_batch_size", 100)
+        )
+
+        client = get_client(self.env)
+        w3 = client.w3
+        if not w3.is_connected():
+            _logger.warning("No RPC endpoint reachable, contract events not indexed")
+            return
+
+        head = w3.eth.block_number - confirmations
+        last_block = params.get_param("berpia_blockchain_core.indexer_last_block")
+        if last_block:
+            from_block = int(last_block) + 1
+        else:
+            start_block = int(params.get_param("berpia_blockchain_core.indexer_start_block", 0))
+            from_block = start_block or max(head - block_range + 1, 0)
+
+        issuers = [account.address for account in client.accounts(signer_keys)]
+        registered_topic = w3.to_hex(w3.keccak(text="DocumentRegistered(bytes32,address)"))
+        revoked_topic = w3.to_hex(w3.keccak(text="DocumentRevoked(bytes32,address)"))
+        issuer_topics = ["0x" + issuer[2:].lower().rjust(64, "0") for issuer in issuers]
+
+        ranges_done = 0
+        indexed_to = None
+        while from_block <= head and ranges_done < max_ranges:
+            to_block = min(from_block + block_range - 1, head)
+            try:
+                logs = w3.eth.get_logs(
+                    {
+                        "address": client.contract.address,
+                        "fromBlock": from_block,
+                        "toBlock": to_block,
+                        "topics": [[registered_topic, revoked_topic], None, issuer_topics],
+                    }
+                )
+            except Exception as e:
+                # Los proveedores limitan el rango/nº de logs: reducimos el rango
+                if block_range > 1:
+                    block_range //= 2
+                    _logger.info(f"eth_getLogs failed ({e}), retrying with range {block_range}")
+                    continue
+                raise
+
+            if logs:
+                self._apply_contract_events(w3, logs, registered_topic, chunk_size)
+            indexed_to = to_block
+            from_block = to_block + 1
+            ranges_done += 1
+
+        # Un único set_param por ejecución: cada escritura invalida la caché del
+        # registro en todos los workers. Los eventos y el cursor se confirman en
+        # la misma transacción, así que un fallo repite el tramo completo
+        if indexed_to is not None:
+            params.set_param("berpia_blockchain_core.indexer_last_block", indexed_to)
+
+    @api.model
+    def _apply_contract_events(self, w3, logs, registered_topic, chunk_size):
+        """Aplica en bloque los eventos DocumentRegistered/DocumentRevoked"""
+        events = []
+        for log in sorted(logs, key=lambda l: (l["blockNumber"], l["logIndex"])):
+            events.append(
+                {
+                    "is_revocation": w3.to_hex(log["topics"][0]) != registered_topic,
+                    "doc_hash": w3.to_hex(log["topics"][1])[2:].lower(),
+                    "tx_hash": w3.to_hex(log["transactionHash"]),
+                    "block_number": log["blockNumber"],
+                    "log_index": log["logIndex"],
+                }
+            )
+
+        hashes = list({event["doc_hash"] for event in events})
+        entries = self.search(
+            [("content_hash", "in", hashes + ["0x" + h for h in hashes])]
+        )
+        entries_by_hash = {e.content_hash.lower().removeprefix("0x"): e for e in entries}
+        batches = self.env["blockchain.merkle.batch"].search(
+            [("root_hash", "in", hashes), ("status", "in", ("submitted", "error"))]
+        )
+        batches_by_root = {b.root_hash: b for b in batches}
+        block_timestamps = self._fetch_block_timestamps(
+            w3, [event["block_number"] for event in events], chunk_size
+        )
+
+        # Estado final de cada entrada tras recorrer los eventos en orden
+        status = {}
+        confirm_rows, revoke_rows = {}, {}
+        for event in events:
+            block_timestamp = block_timestamps.get(event["block_number"])
+            entry = entries_by_hash.get(event["doc_hash"])
+            if event["is_revocation"]:
+                if entry and status.get(entry.id, entry.status) in (
+                    "confirmed",
+                    "revocation_pending",
+                    "revocation_submitted",
+                ):
+                    status[entry.id] = "revoked"
+                    revoke_rows[entry.id] = (event["tx_hash"], block_timestamp)
+                continue
+
+            # Registro: la entrada puede estar en vuelo o haber perdido la pista de su tx
+            targets = self.browse()
+            if entry and not entry.merkle_batch_id:
+                targets = entry
+            # Un lote fallido conserva sus entradas: se confirman con él
+            batch = batches_by_root.get(event["doc_hash"])
+            if batch:
+                batch.write(
+                    {
+                        "status": "confirmed",
+                        "tx_hash": event["tx_hash"],
+                        "block_timestamp": block_timestamp,
+                        "error_message": False,
+                    }
+                )
+                targets |= batch.entry_ids
+            for target in targets:
+                if status.get(target.id, target.status) in ("pending", "submitted", "error"):
+                    status[target.id] = "confirmed"
+                    confirm_rows[target.id] = (
+                        event["tx_hash"],
+                        event["block_number"],
+                        event["log_index"],
+                        block_timestamp,
                     )
 
-        except Exception:
-            # Tx no encontrada aún (pending in mempool)
-            pass
+        confirmed = self.browse(list(confirm_rows))
+        revoked = self.browse(list(revoke_rows))
+        if confirm_rows:
+            self._bulk_update_columns(
+                confirm_rows, ["tx_hash", "block_number", "log_index", "block_timestamp"]
+            )
+            confirmed.write({"status": "confirmed", "error_message": False})
+        if revoke_rows:
+            self._bulk_update_columns(
+                revoke_rows, ["revocation_tx_hash", "revocation_date"]
+            )
+            revoked.write({"status": "revoked", "error_message": False})
+
+        (confirmed - revoked)._notify_chain_result(is_revocation=False)
+        revoked._notify_chain_result(is_revocation=True)
+        _logger.info(
+            f"Indexed {len(events)} contract events: {len(confirmed)} confirmed, {len(revoked)} revoked"
+        )
 
     def action_verify_on_chain_manual(self):
         """Función para verificar manualmente una transacción"""
         self.ensure_one()
-        if not Web3:
+        return self._verify_record_on_chain(self)
+
+    @api.model
+    def _verify_record_on_chain(self, record):
+        """Consulta verifyDocument para una entrada o una fila del archivo.
+
+        Ambas guardan el hash, el lote y la prueba Merkle, así que un documento
+        archivado se verifica sin devolverlo a la tabla activa. Solo las
+        entradas activas se autocorrigen.
+        """
+        if not web3_available():
             raise UserError("Web3 missing")
 
-        params = self.env["ir.config_parameter"].sudo()
-        rpc = params.get_param("berpia_blockchain_core.rpc_url")
-        contract_addr = params.get_param("berpia_blockchain_core.contract_address")
+        client = get_client(self.env)
+        if not client or not client.contract:
+            raise UserError(_("Please configure RPC URL and Contract Address first."))
+        contract = client.contract
 
-        w3 = Web3(Web3.HTTPProvider(rpc))
-        contract = w3.eth.contract(
-            address=Web3.to_checksum_address(contract_addr), abi=UNIVERSAL_REGISTRY_ABI
-        )
+        # Un hash mal formado no se consulta a la cadena
+        [hash_bytes] = tx_signer.hashes_to_bytes32([record.content_hash])
+        if hash_bytes is None:
+            raise UserError(_("The document hash is not a 32-byte hexadecimal value."))
 
         try:
-            # Hash prep
-            try:
-                hash_bytes = bytes.fromhex(self.content_hash)
-            except:
-                hash_bytes = self.content_hash.encode()
+            # En modo lote lo que está en la cadena es la raíz del árbol
+            batch = record.merkle_batch_id
+            if batch:
+                proof = [bytes.fromhex(p) for p in json.loads(record.merkle_proof or "[]")]
+                root = bytes.fromhex(batch.root_hash)
+                if not merkle.verify_proof(hash_bytes, proof, root):
+                    raise UserError(
+                        _("The stored Merkle proof does not match the batch root.")
+                    )
+                hash_bytes = root
 
             result = contract.functions.verifyDocument(hash_bytes).call()
             is_valid = result[0]
@@ -349,12 +1604,17 @@ class BlockchainRegistryEntry(models.Model):
             msg = _("Chain Verification: %s") % (
                 "VALID" if is_valid else "INVALID / REVOKED"
             )
+            if batch:
+                msg += _("\nMerkle root: 0x%s (leaf #%s)") % (
+                    batch.root_hash,
+                    record.merkle_leaf_index,
+                )
             if is_valid:
                 msg += f"\nIssuer: {result[1]} ({result[4]})"
-                if self.status != "confirmed":
-                    self.status = "confirmed"  # Auto correción
+                if record._name == self._name and record.status != "confirmed":
+                    record.status = "confirmed"  # Auto correción
             else:
-                if self.status == "revoked":
+                if record.status == "revoked":
                     msg = _("Correctly verified as REVOKED on chain.")
 
             return {
@@ -364,10 +1624,146 @@ class BlockchainRegistryEntry(models.Model):
                     "title": _("Verification Result"),
                     "message": msg,
                     "type": "success"
-                    if is_valid or self.status == "revoked"
+                    if is_valid or record.status == "revoked"
                     else "warning",
                     "sticky": True,
                 },
             }
         except Exception as e:
             raise UserError(str(e))
+
+    @api.model
+    def _verify_hashes(self, doc_hashes):
+        """
+        Verificación en bloque para la API pública.
+
+        Las entradas en estado final (confirmed/revoked) se responden desde la
+        base de datos; el resto se consulta con eth_call en batch y se guarda
+        en una caché con caducidad. Devuelve una lista alineada con `doc_hashes`.
+        """
+        params = self.env["ir.config_parameter"].sudo()
+        ttl = int(params.get_param("berpia_blockchain_core.verify_cache_ttl", 300))
+        chunk_size = int(params.get_param("berpia_blockchain_core.receipt_batch_size", 100))
+
+        normalized = [str(value or "").strip().lower().removeprefix("0x") for value in doc_hashes]
+        normalized = [
+            doc_hash if hash_bytes else None
+            for doc_hash, hash_bytes in zip(normalized, tx_signer.hashes_to_bytes32(normalized))
+        ]
+        wanted = {h for h in normalized if h}
+
+        entries = {}
+        if wanted:
+            domain = [("content_hash", "in", list(wanted) + ["0x" + h for h in wanted])]
+            for entry in self.sudo().search(domain):
+                entries.setdefault(entry.content_hash.lower().removeprefix("0x"), entry)
+
+        # Las entradas antiguas ya en estado final están en el archivo
+        missing = wanted - set(entries)
+        if missing:
+            domain = [("content_hash", "in", list(missing) + ["0x" + h for h in missing])]
+            for archive in self.env["blockchain.registry.archive"].sudo().search(domain):
+                entries.setdefault(archive.content_hash.lower().removeprefix("0x"), archive)
+
+        results = {}
+        to_query = {}  # hash -> clave consultada en la cadena (raíz en modo lote)
+        for doc_hash in wanted:
+            entry = entries.get(doc_hash)
+            if entry and entry.status in ("confirmed", "revoked"):
+                results[doc_hash] = {
+                    "valid": entry.status == "confirmed",
+                    "registered": True,
+                    "status": entry.status,
+                    "tx_hash": entry.tx_hash or False,
+                    "block_number": entry.block_number or False,
+                    "block_timestamp": fields.Datetime.to_string(entry.block_timestamp),
+                    "source": "local",
+                }
+            elif entry and entry.merkle_batch_id:
+                to_query[doc_hash] = entry.merkle_batch_id.root_hash
+            else:
+                to_query[doc_hash] = doc_hash
+
+        if to_query:
+            client = get_client(self.env)
+            if client and client.contract:
+                address = client.contract.address
+                on_chain, missing = {}, []
+                for key in set(to_query.values()):
+                    cached = _verification_cache.get((address, key))
+                    if cached is None:
+                        missing.append(key)
+                    else:
+                        on_chain[key] = cached
+                if missing:
+                    for key, value in self._call_verify_document(client, missing, chunk_size).items():
+                        _verification_cache.set((address, key), value, ttl=ttl)
+                        on_chain[key] = value
+
+                for doc_hash, key in to_query.items():
+                    if key in on_chain:
+                        entry = entries.get(doc_hash)
+                        results[doc_hash] = dict(
+                            on_chain[key],
+                            status=entry.status if entry else False,
+                            source="chain",
+                        )
+
+        for doc_hash, entry in entries.items():
+            if doc_hash in results and entry.merkle_batch_id:
+                results[doc_hash]["merkle"] = {
+                    "root": "0x" + entry.merkle_batch_id.root_hash,
+                    "proof": ["0x" + p for p in json.loads(entry.merkle_proof or "[]")],
+                    "leaf_index": entry.merkle_leaf_index,
+                }
+
+        output = []
+        for value, doc_hash in zip(doc_hashes, normalized):
+            if not doc_hash:
+                output.append({"hash": value, "error": "invalid_hash"})
+            elif doc_hash not in results:
+                output.append({"hash": "0x" + doc_hash, "error": "unavailable"})
+            else:
+                output.append(dict(results[doc_hash], hash="0x" + doc_hash))
+        return output
+
+    @api.model
+    def _call_verify_document(self, client, hashes, chunk_size):
+        """verifyDocument para varios hashes en peticiones eth_call agrupadas"""
+        contract = client.contract
+        abi = next(f for f in UNIVERSAL_REGISTRY_ABI if f.get("name") == "verifyDocument")
+        output_types = [o["type"] for o in abi["outputs"]]
+        calls = [
+            (
+                "eth_call",
+                [
+                    {
+                        "to": contract.address,
+                        "data": contract.encode_abi("verifyDocument", args=[bytes.fromhex(h)]),
+                    },
+                    "latest",
+                ],
+            )
+            for h in hashes
+        ]
+        decoded = {}
+        for doc_hash, raw in zip(hashes, rpc_batch.batch_request(client.w3, calls, chunk_size)):
+            if not raw:
+                continue
+            try:
+                data = bytes.fromhex(raw.removeprefix("0x")) if isinstance(raw, str) else bytes(raw)
+                is_valid, issuer_name, issuer_tax_id, timestamp, issuer_address = (
+                    client.w3.codec.decode(output_types, data)
+                )
+            except Exception as e:
+                _logger.warning(f"Could not decode verifyDocument result for {doc_hash}: {e}")
+                continue
+            decoded[doc_hash] = {
+                "valid": bool(is_valid),
+                "registered": timestamp > 0,
+                "issuer_name": issuer_name,
+                "issuer_tax_id": issuer_tax_id,
+                "issuer_address": issuer_address,
+                "timestamp": timestamp,
+            }
+        return decoded
@@ -0,0 +1,209 @@
+import json
+import logging
+from odoo import models, fields, api
+from . import metrics
+from .blockchain_client import endpoint_health
+
+_logger = logging.getLogger(__name__)
+
+# Límites (segundos) del histograma de edad de las transacciones en vuelo
+AGE_BUCKETS = (60, 300, 600, 1800, 3600, 6 * 3600, 24 * 3600)
+IN_FLIGHT_STATUSES = ("submitted", "revocation_submitted")
+WAITING_STATUSES = ("pending", "revocation_pending") + IN_FLIGHT_STATUSES
+
+
+
+class BlockchainStatsSnapshot(models.Model):
+    _name = "blockchain.stats.snapshot"
+    _description = "Blockchain Pipeline Stats Snapshot"
+    _order = "id desc"
+    _rec_name = "create_date"
+
+    pending_count = fields.Integer(string="Pending", readonly=True)
+    submitted_count = fields.Integer(string="Submitted", readonly=True)
+    revocation_pending_count = fields.Integer(string="Pending Revocations", readonly=True)
+    revocation_submitted_count = fields.Integer(string="Submitted Revocations", readonly=True)
+    error_count = fields.Integer(string="Errors", readonly=True)
+    confirmed_count = fields.Integer(string="Confirmed", readonly=True)
+    revoked_count = fields.Integer(string="Revoked", readonly=True)
+    oldest_pending_age = fields.Integer(
+        string="Oldest Pending (s)",
+        readonly=True,
+        help="Age of the oldest document waiting in the queue.",
+    )
+    oldest_submitted_age = fields.Integer(
+        string="Oldest Submitted (s)",
+        readonly=True,
+        help="Time since the oldest transaction still waiting for a receipt was broadcast.",
+    )
+    rpc_requests = fields.Integer(
+        string="RPC Calls",
+        readonly=True,
+        help="JSON-RPC calls made by the crons of every worker since the previous snapshot.",
+    )
+    rpc_errors = fields.Integer(string="RPC Errors", readonly=True)
+    metrics_json = fields.Text(
+        string="Cron Metrics",
+        readonly=True,
+        help="Counters and timing totals recorded by the crons of every worker, cumulative.",
+    )
+
+    @api.model
+    def _collect_queue_stats(self):
+        """Estado de la cola leído de la base de datos (común a todos los workers)"""
+        self.env["blockchain.registry.entry"].flush_model(
+            ["status", "create_date", "submitted_at", "lane_id"]
+        )
+        cr = self.env.cr
+        cr.execute(
+            """
+            SELECT status,
+                   count(*),
+                   extract(epoch FROM (now() at time zone 'UTC') - min(create_date)),
+                   extract(epoch FROM (now() at time zone 'UTC') - min(submitted_at))
+              FROM blockchain_registry_entry
+             GROUP BY status
+            """
+        )
+        counts, oldest_created, oldest_submitted = {}, {}, {}
+        for status, count, created_age, submitted_age in cr.fetchall():
+            counts[status] = count
+            oldest_created[status] = int(created_age or 0)
+            oldest_submitted[status] = int(submitted_age or 0)
+
+        # Distribución de edad de lo que espera recibo, en una sola pasada
+        filters = ", ".join(["count(*) FILTER (WHERE age <= %s)"] * len(AGE_BUCKETS))
+        cr.execute(
+            f"""
+            SELECT {filters}, coalesce(sum(age), 0), count(*)
+              FROM (
+                    SELECT extract(epoch FROM (now() at time zone 'UTC') - submitted_at) AS age
+                      FROM blockchain_registry_entry
+                     WHERE status IN %s
+                       AND submitted_at IS NOT NULL
+                   ) AS in_flight
+            """,
+            [*AGE_BUCKETS, IN_FLIGHT_STATUSES],
+        )
+        *buckets, age_sum, age_count = cr.fetchone()
+
+        lanes = self.env["blockchain.registry.entry"]._read_group(
+            [("status", "in", ["pending", "revocation_pending"])],
+            ["lane_id"],
+            ["__count"],
+        )
+        return {
+            "counts": counts,
+            "oldest_pending_age": max(
+                (oldest_created.get(s, 0) for s in ("pending", "revocation_pending")), default=0
+            ),
+            "oldest_submitted_age": max(
+                (oldest_submitted.get(s, 0) for s in IN_FLIGHT_STATUSES), default=0
+            ),
+            "oldest_by_status": {
+                status: oldest_submitted[status] if status in IN_FLIGHT_STATUSES else age
+                for status, age in oldest_created.items()
+                if status in WAITING_STATUSES
+            },
+            "submitted_age": {"buckets": buckets, "sum": float(age_sum), "count": age_count},
+            "lane_backlog": [(lane.name or "none", count) for lane, count in lanes],
+        }
+
+    @api.model
+    def _prometheus_text(self):
+        """Métricas de los crons (todas las ejecuciones registradas) más el estado de la cola"""
+        stats = self._collect_queue_stats()
+        statuses = [
+            key for key, _label in self.env["blockchain.registry.entry"]._fields["status"].selection
+        ]
+        gauges = [
+            (
+                "blockchain_queue_entries",
+                "Registry entries by status",
+                [({"status": status}, stats["counts"].get(status, 0)) for status in statuses],
+            ),
+            (
+                "blockchain_queue_oldest_age_seconds",
+                "Age of the oldest waiting entry (since broadcast for submitted ones)",
+                [({"status": s}, age) for s, age in sorted(stats["oldest_by_status"].items())],
+            ),
+            (
+                "blockchain_lane_backlog",
+                "Documents waiting in the queue by priority lane",
+                [({"lane": lane}, count) for lane, count in stats["lane_backlog"]],
+            ),
+        ]
+        health = endpoint_health()
+        gauges += [
+            (
+                "blockchain_rpc_endpoint_up",
+                "1 if the RPC endpoint is in rotation in this worker, 0 while its circuit is open",
+                [({"endpoint": row["endpoint"]}, row["up"]) for row in health],
+            ),
+            (
+                "blockchain_rpc_endpoint_latency_seconds",
+                "Moving average latency of the RPC endpoint in this worker",
+                [({"endpoint": row["endpoint"]}, row["latency"]) for row in health],
+            ),
+            (
+                "blockchain_rpc_endpoint_error_rate",
+                "Moving average error rate of the RPC endpoint in this worker",
+                [({"endpoint": row["endpoint"]}, row["error_rate"]) for row in health],
+            ),
+        ]
+        age = stats["submitted_age"]
+        histograms = [
+            (
+                "blockchain_submitted_age_seconds",
+                "Time since broadcast of transactions still waiting for a receipt",
+                AGE_BUCKETS,
+                [({}, age["buckets"], age["sum"], age["count"])],
+            )
+        ]
+        totals = self.env["blockchain.cron.run"]._totals()
+        return metrics.render_prometheus(totals, gauges, histograms)
+
+    @api.model
+    def _cron_take_snapshot(self):
+        """CRON: Guarda el estado de la cola y los contadores de los crons"""
+        # Lo medido en este proceso fuera de los crons, aunque no toque volcarlo
+        metrics.flush_outside(self.env, force=True)
+        stats = self._collect_queue_stats()
+        CronRun = self.env["blockchain.cron.run"]
+        previous = self.search([], limit=1)
+        recent = CronRun._totals(since=previous.create_date) if previous else CronRun._totals()
+        deltas = {"requests": 0, "errors": 0}
+        for name, value in recent.items():
+            if name.startswith("blockchain_rpc_requests_total"):
+                deltas["requests"] += int(value)
+            elif name.startswith("blockchain_rpc_errors_total"):
+                deltas["errors"] += int(value)
+        totals = {name: float(value) for name, value in CronRun._totals().items()}
+
+        counts = stats["counts"]
+        self.create(
+            {
+                "pending_count": counts.get("pending", 0),
+                "submitted_count": counts.get("submitted", 0),
+                "revocation_pending_count": counts.get("revocation_pending", 0),
+                "revocation_submitted_count": counts.get("revocation_submitted", 0),
+                "error_count": counts.get("error", 0),
+                "confirmed_count": counts.get("confirmed", 0),
+                "revoked_count": counts.get("revoked", 0),
+                "oldest_pending_age": stats["oldest_pending_age"],
+                "oldest_submitted_age": stats["oldest_submitted_age"],
+                "rpc_requests": deltas["requests"],
+                "rpc_errors": deltas["errors"],
+                "metrics_json": json.dumps(totals, indent=2, sort_keys=True),
+            }
+        )
+
+        params = self.env["ir.config_parameter"].sudo()
+        retention = int(params.get_param("berpia_blockchain_core.stats_retention_days", 30))
+        if retention > 0:
+            cutoff = fields.Datetime.subtract(fields.Datetime.now(), days=retention)
+            old = self.search([("create_date", "<", cutoff)])
+            if old:
+                old.unlink()
+                _logger.info(f"Deleted {len(old)} blockchain stats snapshots")
+            CronRun._roll_up(cutoff)
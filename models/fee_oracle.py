@@ -0,0 +1,140 @@
+"""
+Oráculo de comisiones para el cron de envío.
+
+Lee `eth_feeHistory` una vez por ventana de caché y de ahí obtiene la base
+fee del próximo bloque, la propina (mediana de las recompensas recientes) y
+una comisión suavizada (media exponencial de las base fees) con la que se
+decide si vaciar la cola. Si la red no admite EIP-1559 se usa `gasPrice`.
+"""
+
+import logging
+import math
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+FEE_HISTORY_BLOCKS = 20
+PRIORITY_PERCENTILE = 50
+SMOOTHING_ALPHA = 0.3
+
+_estimates = {}
+_legacy_smoothed = {}
+_lock = threading.Lock()
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) // 2
+
+
+def _ewma(values, alpha=SMOOTHING_ALPHA, start=None):
+    smoothed = values[0] if start is None else start
+    for value in values[1 if start is None else 0 :]:
+        smoothed = alpha * value + (1 - alpha) * smoothed
+    return int(smoothed)
+
+
+def _fetch_estimate(w3, cache_key):
+    try:
+        history = w3.eth.fee_history(FEE_HISTORY_BLOCKS, "latest", [PRIORITY_PERCENTILE])
+        base_fees = [int(fee) for fee in history["baseFeePerGas"]]
+    except Exception as e:
+        _logger.debug(f"eth_feeHistory not available, using legacy gas price: {e}")
+        history, base_fees = {}, []
+
+    if base_fees and base_fees[-1] > 0:
+        rewards = [int(r[0]) for r in history.get("reward") or [] if r and int(r[0]) > 0]
+        if rewards:
+            priority_fee = _median(rewards)
+        else:
+            priority_fee = int(w3.eth.max_priority_fee)
+        # El último valor es la base fee del próximo bloque
+        base_fee = base_fees[-1]
+        return {
+            "type": "eip1559",
+            "base_fee": base_fee,
+            "priority_fee": priority_fee,
+            "current_fee": base_fee + priority_fee,
+            "smoothed_fee": _ewma(base_fees) + priority_fee,
+        }
+
+    gas_price = int(w3.eth.gas_price)
+    with _lock:
+        smoothed = _ewma([gas_price], start=_legacy_smoothed.get(cache_key))
+        _legacy_smoothed[cache_key] = smoothed
+    return {
+        "type": "legacy",
+        "gas_price": gas_price,
+        "current_fee": gas_price,
+        "smoothed_fee": smoothed,
+    }
+
+
+def estimate_fees(w3, cache_key, ttl=30):
+    """Estimación de comisiones en wei, reutilizada durante `ttl` segundos"""
+    now = time.monotonic()
+    with _lock:
+        cached = _estimates.get(cache_key)
+        if cached and cached[0] > now:
+            return cached[1]
+    estimate = _fetch_estimate(w3, cache_key)
+    with _lock:
+        _estimates[cache_key] = (now + max(int(ttl or 0), 0), estimate)
+    return estimate
+
+
+def tx_fee_params(estimate, max_fee_cap=None):
+    """Campos de comisión de la transacción: tipo 2 si la red lo admite, legacy si no"""
+    if estimate["type"] == "legacy":
+        return {"gasPrice": estimate["gas_price"]}
+    floor = estimate["base_fee"] + estimate["priority_fee"]
+    # Margen estándar: admite dos bloques llenos seguidos sin quedar atascada
+    max_fee = 2 * estimate["base_fee"] + estimate["priority_fee"]
+    if max_fee_cap:
+        max_fee = max(min(max_fee, max_fee_cap), floor)
+    return {"maxFeePerGas": max_fee, "maxPriorityFeePerGas": estimate["priority_fee"]}
+
+
+def bump_fees(max_fee, priority_fee, estimate, bump):
+    """
+    Comisiones para reemplazar una transacción con el mismo nonce.
+
+    Los nodos solo aceptan el reemplazo si sube al menos un 10% cada campo,
+    así que se toma el mayor entre la comisión anterior incrementada en `bump`
+    y la estimación actual. Se conserva el tipo de la transacción original.
+    """
+    max_fee = math.ceil(max_fee * (1 + bump))
+    if not priority_fee:
+        return {"gasPrice": max(max_fee, estimate["current_fee"])}
+    priority_fee = math.ceil(priority_fee * (1 + bump))
+    if estimate["type"] == "eip1559":
+        priority_fee = max(priority_fee, estimate["priority_fee"])
+        max_fee = max(max_fee, 2 * estimate["base_fee"] + priority_fee)
+    return {"maxFeePerGas": max(max_fee, priority_fee), "maxPriorityFeePerGas": priority_fee}
+
+
+def drain_fraction(fee, limit, band):
+    """
+    Parte de la cola que se envía con la comisión `fee` (wei) y el umbral `limit`.
+
+    Por debajo del umbral se vacía entera (1.0). Dentro de la banda de
+    tolerancia (limit .. limit * (1 + band)) se envía una fracción que decrece
+    linealmente, empezando por las entradas más antiguas. Por encima, nada.
+    """
+    if fee <= limit:
+        return 1.0
+    upper = limit * (1 + band)
+    if band <= 0 or fee >= upper:
+        return 0.0
+    return (upper - fee) / (upper - limit)
+
+
+def reset():
+    """Descarta las estimaciones cacheadas"""
+    with _lock:
+        _estimates.clear()
+        _legacy_smoothed.clear()
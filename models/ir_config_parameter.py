@@ -0,0 +1,33 @@
+from odoo import models, api
+from .blockchain_client import CLIENT_CONFIG_KEYS, invalidate_clients
+
+
+class IrConfigParameter(models.Model):
+    _inherit = "ir.config_parameter"
+
+    def _touches_blockchain_client(self, vals=None):
+        keys = set(self.mapped("key"))
+        if vals and vals.get("key"):
+            keys.add(vals["key"])
+        return bool(keys & CLIENT_CONFIG_KEYS)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        if records._touches_blockchain_client():
+            invalidate_clients()
+        return records
+
+    def write(self, vals):
+        touched = self._touches_blockchain_client(vals)
+        res = super().write(vals)
+        if touched:
+            invalidate_clients()
+        return res
+
+    def unlink(self):
+        touched = self._touches_blockchain_client()
+        res = super().unlink()
+        if touched:
+            invalidate_clients()
+        return res
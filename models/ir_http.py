@@ -0,0 +1,15 @@
+from odoo import models
+from odoo.http import request
+from . import metrics
+
+
+class IrHttp(models.AbstractModel):
+    _inherit = "ir.http"
+
+    @classmethod
+    def _post_dispatch(cls, response):
+        super()._post_dispatch(response)
+        # Las llamadas RPC de las peticiones (verificación, botones) no pasan
+        # por un cron: se vuelcan a blockchain.cron.run cada FLUSH_INTERVAL
+        if request.env:
+            metrics.flush_outside(request.env)
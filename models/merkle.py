@@ -0,0 +1,71 @@
+"""
+Árbol de Merkle para el anclaje por lotes.
+
+Las hojas son los hashes de documento (bytes32). Para evitar que un nodo
+interno pueda presentarse como hoja se separan los dominios:
+
+    hoja  = sha256(0x00 || hash_documento)
+    nodo  = sha256(0x01 || min(a, b) || max(a, b))
+
+Al ordenar cada par la prueba no necesita indicar el lado de cada hermano,
+lo que simplifica la verificación en el navegador (crypto.subtle). Un nodo
+sin pareja sube tal cual al siguiente nivel.
+"""
+
+import hashlib
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def leaf_node(doc_hash):
+    return hashlib.sha256(LEAF_PREFIX + doc_hash).digest()
+
+
+def hash_pair(a, b):
+    if b < a:
+        a, b = b, a
+    return hashlib.sha256(NODE_PREFIX + a + b).digest()
+
+
+def build_tree(doc_hashes):
+    """Devuelve la lista de niveles del árbol, de las hojas a la raíz"""
+    if not doc_hashes:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+    levels = [[leaf_node(h) for h in doc_hashes]]
+    while len(levels[-1]) > 1:
+        current = levels[-1]
+        parents = [
+            hash_pair(current[i], current[i + 1])
+            for i in range(0, len(current) - 1, 2)
+        ]
+        if len(current) % 2:
+            parents.append(current[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_root(levels):
+    return levels[-1][0]
+
+
+def merkle_proof(levels, index):
+    """Hermanos necesarios para recalcular la raíz desde la hoja `index`"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(level[sibling])
+        index //= 2
+    return proof
+
+
+def compute_root_from_proof(doc_hash, proof):
+    node = leaf_node(doc_hash)
+    for sibling in proof:
+        node = hash_pair(node, sibling)
+    return node
+
+
+def verify_proof(doc_hash, proof, root):
+    return compute_root_from_proof(doc_hash, proof) == root
@@ -0,0 +1,336 @@
+"""
+Métricas del proceso: contadores e histogramas en memoria.
+
+Cada cron acumula en su propia serie de valores (una variable de contexto, que
+`propagate` lleva a los hilos que lanza) y `timed_cron` la guarda al terminar
+como una fila de blockchain.cron.run. Lo que se mide fuera de un cron
+(peticiones HTTP: API de verificación, botones) va a una serie del proceso
+que se vuelca en la misma tabla, como cron "http", cada FLUSH_INTERVAL
+segundos al terminar una petición y en cada instantánea. Lo que se exporta es
+la suma de esas filas de todos los workers. Los indicadores de estado de la
+cola no se guardan aquí: se leen de la base de datos al exportar (ver
+blockchain.stats.snapshot).
+"""
+
+import contextvars
+import functools
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# Límites de los buckets de duración (segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+DESCRIPTIONS = {
+    "blockchain_rpc_requests_total": "JSON-RPC calls sent to the node, by method",
+    "blockchain_rpc_errors_total": "JSON-RPC calls that failed or returned an error, by method",
+    "blockchain_rpc_duration_seconds": "Wall time of JSON-RPC requests (a batch counts once)",
+    "blockchain_rpc_hedged_total": "Reads repeated on a second endpoint because the first was slow",
+    "blockchain_rpc_failovers_total": "Calls retried on another endpoint after a failure",
+    "blockchain_rpc_rate_limited_total": "Rate limit responses, by endpoint host",
+    "blockchain_rpc_circuit_open_total": "Times an endpoint was taken out of rotation after repeated failures",
+    "blockchain_cron_duration_seconds": "Duration of every cron run",
+    "blockchain_cron_errors_total": "Cron runs that raised an exception",
+    "blockchain_phase_duration_seconds": "Duration of the phases inside the crons",
+    "blockchain_submissions_total": "Transactions broadcast by the queue, by result",
+    "blockchain_receipts_total": "Receipts applied, by result",
+}
+HISTOGRAMS = frozenset(
+    {
+        "blockchain_rpc_duration_seconds",
+        "blockchain_cron_duration_seconds",
+        "blockchain_phase_duration_seconds",
+    }
+)
+_SERIES_PATTERN = re.compile(r'(?P<name>[^{]+)(?:\{(?P<labels>.*?),?(?:le="(?P<le>[^"]+)")?\})?')
+
+# Segundos entre volcados de la serie de fuera de los crons
+FLUSH_INTERVAL = 60
+# Nombre con el que se guarda en blockchain.cron.run lo medido fuera de los crons
+OUTSIDE_CRON = "http"
+
+
+class _Series:
+    """Contadores e histogramas de un cron en curso (o de fuera de los crons)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+
+_outside = _Series()
+_outside_flushed_at = time.monotonic()
+_current = contextvars.ContextVar("blockchain_metrics_series", default=None)
+
+
+def _series():
+    return _current.get() or _outside
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    key = _key(name, labels)
+    series = _series()
+    with series.lock:
+        series.counters[key] = series.counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    key = _key(name, labels)
+    series = _series()
+    with series.lock:
+        histogram = series.histograms.get(key)
+        if histogram is None:
+            histogram = series.histograms[key] = {
+                "buckets": [0] * len(DEFAULT_BUCKETS),
+                "sum": 0.0,
+                "count": 0,
+            }
+        for i, bound in enumerate(DEFAULT_BUCKETS):
+            if value <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+
+def propagate(func):
+    """Envuelve `func` para que, ejecutada en otro hilo, mida en la serie del
+    cron que la lanza (los hilos no heredan las variables de contexto)"""
+    series = _current.get()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current.set(series)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+    return wrapper
+
+
+@contextmanager
+def timer(name, **labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+def timed_cron(cron):
+    """Decorador de los métodos de cron: duración, errores y registro de la ejecución.
+
+    Lo medido durante la llamada, incluidos los hilos lanzados con
+    `propagate`, se guarda como una fila de blockchain.cron.run. Otros hilos
+    del mismo proceso (peticiones HTTP, otros crons) miden en su propia serie.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            series = _Series()
+            token = _current.set(series)
+            started = time.perf_counter()
+            failed = False
+            try:
+                with timer("blockchain_cron_duration_seconds", cron=cron):
+                    try:
+                        return method(self, *args, **kwargs)
+                    except Exception:
+                        failed = True
+                        inc("blockchain_cron_errors_total", cron=cron)
+                        raise
+            finally:
+                _current.reset(token)
+                self.env["blockchain.cron.run"]._record_run(
+                    cron, time.perf_counter() - started, failed, series_values(series)
+                )
+
+        return wrapper
+
+    return decorator
+
+
+def flush_outside(env, force=False):
+    """Guarda lo medido fuera de los crons si han pasado FLUSH_INTERVAL segundos"""
+    global _outside_flushed_at
+    with _outside.lock:
+        now = time.monotonic()
+        if not force and now - _outside_flushed_at < FLUSH_INTERVAL:
+            return
+        _outside_flushed_at = now
+        values = _values(_outside)
+        _outside.counters.clear()
+        _outside.histograms.clear()
+    if values:
+        env["blockchain.cron.run"]._record_run(OUTSIDE_CRON, 0.0, False, values)
+
+
+def _rpc_failed(response):
+    return not isinstance(response, dict) or bool(response.get("error"))
+
+
+def _count_rpc(method, started, responses):
+    observe("blockchain_rpc_duration_seconds", time.perf_counter() - started, method=method)
+    for name, response in responses:
+        inc("blockchain_rpc_requests_total", method=name)
+        if _rpc_failed(response):
+            inc("blockchain_rpc_errors_total", method=name)
+
+
+def instrument_provider(provider):
+    """Envuelve make_request/make_batch_request de un proveedor HTTP de web3"""
+    make_request = provider.make_request
+    make_batch_request = getattr(provider, "make_batch_request", None)
+
+    def counted_request(method, params):
+        started = time.perf_counter()
+        response = None
+        try:
+            response = make_request(method, params)
+            return response
+        finally:
+            _count_rpc(method, started, [(method, response)])
+
+    provider.make_request = counted_request
+
+    if make_batch_request:
+
+        def counted_batch_request(calls):
+            started = time.perf_counter()
+            responses = None
+            try:
+                responses = make_batch_request(calls)
+                return responses
+            finally:
+                if not isinstance(responses, list) or len(responses) != len(calls):
+                    responses = [None] * len(calls)
+                _count_rpc(
+                    "batch",
+                    started,
+                    [(method, response) for (method, _params), response in zip(calls, responses)],
+                )
+
+        provider.make_batch_request = counted_batch_request
+    return provider
+
+
+def instrument_async_provider(provider):
+    """Igual que instrument_provider para AsyncHTTPProvider"""
+    make_request = provider.make_request
+
+    async def counted_request(method, params):
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await make_request(method, params)
+            return response
+        finally:
+            _count_rpc(method, started, [(method, response)])
+
+    provider.make_request = counted_request
+    return provider
+
+
+def series_values(series=None):
+    """Valores como {serie en formato Prometheus: valor}, histogramas desglosados.
+
+    Un histograma se guarda con todos sus buckets, aunque alguno siga a cero.
+    """
+    series = series or _series()
+    with series.lock:
+        return _values(series)
+
+
+def _values(series):
+    values = {_format_name(name, labels): value for (name, labels), value in series.counters.items()}
+    for (name, labels), h in series.histograms.items():
+        for bound, value in zip(DEFAULT_BUCKETS, h["buckets"]):
+            values[_format_name(name + "_bucket", labels + (("le", bound),))] = value
+        values[_format_name(name + "_bucket", labels + (("le", "+Inf"),))] = h["count"]
+        values[_format_name(name + "_sum", labels)] = h["sum"]
+        values[_format_name(name + "_count", labels)] = h["count"]
+    return values
+
+
+def reset():
+    with _outside.lock:
+        _outside.counters.clear()
+        _outside.histograms.clear()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_name(name, labels):
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _header(lines, name, kind):
+    if name in DESCRIPTIONS:
+        lines.append(f"# HELP {name} {DESCRIPTIONS[name]}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _series_order(key):
+    """Agrupa las series por métrica y ordena los buckets por su límite"""
+    match = _SERIES_PATTERN.fullmatch(key)
+    name, labels, le = match.group("name"), match.group("labels") or "", match.group("le")
+    family, suffix = name, 0
+    for rank, ending in enumerate(("_bucket", "_sum", "_count")):
+        if name.endswith(ending) and name[: -len(ending)] in HISTOGRAMS:
+            family, suffix = name[: -len(ending)], rank
+            break
+    bound = float("inf") if le in (None, "+Inf") else float(le)
+    return family, labels, suffix, bound
+
+
+def render_prometheus(totals, gauges=(), histograms=()):
+    """Formato de texto de Prometheus.
+
+    `totals` es {serie: valor} con los contadores e histogramas sumados de
+    todas las ejecuciones (ver series_values()); `gauges` es
+    [(nombre, ayuda, [(labels, valor)])] y `histograms`
+    [(nombre, ayuda, límites, [(labels, cuentas acumuladas, suma, total)])],
+    ambos calculados por quien llama (p. ej. desde la base de datos).
+    """
+    lines = []
+    seen = set()
+    for key in sorted(totals, key=_series_order):
+        family = _series_order(key)[0]
+        if family not in seen:
+            _header(lines, family, "histogram" if family in HISTOGRAMS else "counter")
+            seen.add(family)
+        lines.append(f"{key} {totals[key]}")
+
+    for name, help_text, series in gauges:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in series:
+            lines.append(f"{_format_name(name, tuple(sorted(labels.items())))} {value}")
+
+    for name, help_text, bounds, series in histograms:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, buckets, total_sum, count in series:
+            _histogram_lines(
+                lines, name, tuple(sorted(labels.items())), bounds, buckets, total_sum, count
+            )
+    return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(lines, name, labels, bounds, buckets, total_sum, count):
+    for bound, value in zip(bounds, buckets):
+        lines.append(f"{_format_name(name + '_bucket', labels + (('le', bound),))} {value}")
+    lines.append(f"{_format_name(name + '_bucket', labels + (('le', '+Inf'),))} {count}")
+    lines.append(f"{_format_name(name + '_sum', labels)} {total_sum}")
+    lines.append(f"{_format_name(name + '_count', labels)} {count}")
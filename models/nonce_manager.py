@@ -0,0 +1,69 @@
+import logging
+import threading
+
+_logger = logging.getLogger(__name__)
+
+# Fragmentos de mensajes de error de los nodos (geth, erigon, besu...) que
+# indican que el nonce local ya no coincide con el estado de la red.
+NONCE_ERROR_MARKERS = (
+    "nonce too low",
+    "nonce too high",
+    "already known",
+    "known transaction",
+    "replacement transaction underpriced",
+)
+
+# Veces por ciclo que una wallet renumera sus transacciones tras un fallo
+MAX_RENONCE_ROUNDS = 3
+
+
+def is_nonce_error(error):
+    """Devuelve True si la excepción del nodo se debe a un nonce desincronizado"""
+    message = str(error).lower()
+    return any(marker in message for marker in NONCE_ERROR_MARKERS)
+
+
+class NonceManager:
+    """
+    Asignador local de nonces para una cuenta.
+
+    Lee el nonce 'pending' de la red una única vez y a partir de ahí entrega
+    nonces secuenciales sin hacer más llamadas RPC. Si un envío falla antes de
+    llegar al mempool se libera el nonce; si eso deja un hueco, o el nodo
+    rechaza el nonce, se vuelve a sincronizar con la red en la siguiente
+    asignación.
+    """
+
+    def __init__(self, w3, address):
+        self._w3 = w3
+        self.address = address
+        self._lock = threading.Lock()
+        self._next_nonce = None
+
+    def _fetch_pending_nonce(self):
+        return self._w3.eth.get_transaction_count(self.address, "pending")
+
+    def allocate(self):
+        """Reserva el siguiente nonce disponible"""
+        with self._lock:
+            if self._next_nonce is None:
+                self._next_nonce = self._fetch_pending_nonce()
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    def release(self, nonce):
+        """Devuelve un nonce que no llegó a emitirse"""
+        with self._lock:
+            if self._next_nonce == nonce + 1:
+                self._next_nonce = nonce
+            else:
+                # Ya se han entregado nonces posteriores: hay un hueco que
+                # solo la red puede resolver.
+                self._next_nonce = None
+
+    def resync(self):
+        """Fuerza una nueva lectura del nonce 'pending' en la siguiente asignación"""
+        with self._lock:
+            _logger.info(f"Resyncing nonce for {self.address}")
+            self._next_nonce = None
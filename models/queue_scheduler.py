@@ -0,0 +1,74 @@
+"""
+Reparto de la capacidad de cada ciclo del cron entre carriles de prioridad.
+
+Primero cada carril con backlog y peso positivo recibe una entrada; el resto
+de la capacidad se reparte en proporción al peso, limitado por el backlog, y
+lo que un carril no puede usar pasa a los que aún tienen entradas en cola
+(water-filling). Si la capacidad no llega para todos los carriles, la entrada
+mínima va a los que llevan más tiempo esperando: un carril que no se atiende
+en un ciclo tiene la entrada más antigua en el siguiente, así que ninguno
+queda sin servicio aunque otro de más peso tenga un backlog enorme.
+
+También decide cuándo volver a comprobar los recibos de lo que está en vuelo.
+"""
+
+import math
+
+# Peso de las entradas que no encajan en ningún carril configurado
+DEFAULT_LANE_WEIGHT = 1
+
+
+def fair_share(capacity, lanes, waiting_since=None):
+    """
+    `lanes` es {clave: (peso, backlog)} y `waiting_since` {clave: fecha de la
+    entrada más antigua}. Devuelve {clave: entradas a tomar} cuya suma no
+    supera `capacity`.
+    """
+    shares = dict.fromkeys(lanes, 0)
+    active = [key for key, (weight, backlog) in lanes.items() if weight > 0 and backlog > 0]
+    remaining = max(int(capacity or 0), 0)
+
+    # 1. Una entrada por carril; si no llega, para los que más tiempo esperan
+    order = sorted(active, key=lambda k: lanes[k][0], reverse=True)
+    if waiting_since:
+        order.sort(key=lambda k: waiting_since[k])
+    for key in order[:remaining]:
+        shares[key] = 1
+    remaining -= min(remaining, len(order))
+
+    # 2. El resto en proporción al peso, limitado por el backlog
+    active = [key for key in order if shares[key] < lanes[key][1]]
+    while remaining > 0 and active:
+        total_weight = sum(lanes[key][0] for key in active)
+        granted = 0
+        for key in active:
+            quota = int(remaining * lanes[key][0] / total_weight)
+            give = min(quota, lanes[key][1] - shares[key])
+            shares[key] += give
+            granted += give
+        if not granted:
+            # El redondeo deja cuotas a cero: una entrada más a los de más peso
+            for key in sorted(active, key=lambda k: lanes[k][0], reverse=True)[:remaining]:
+                shares[key] += 1
+                granted += 1
+        remaining -= granted
+        active = [key for key in active if shares[key] < lanes[key][1]]
+    return shares
+
+
+def receipt_check_delay(in_flight, block_time, chunk_size, progressed, max_delay):
+    """
+    Segundos hasta la próxima comprobación de recibos, o None si no hay
+    transacciones en vuelo (el cron de respaldo basta).
+
+    Cada comprobación cuesta una petición batch por cada `chunk_size`
+    transacciones: con pocas se comprueba en cada bloque, con muchas se deja
+    pasar un bloque por petición. Si la última pasada no confirmó nada, las
+    transacciones siguen en el mempool y se espera el doble.
+    """
+    if not in_flight:
+        return None
+    delay = block_time * max(math.ceil(in_flight / max(chunk_size, 1)), 1)
+    if not progressed:
+        delay *= 2
+    return min(delay, max_delay)
@@ -0,0 +1,48 @@
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def to_int(value):
+    """Los nodos devuelven cantidades como hexadecimal ('0x1a')"""
+    if isinstance(value, str):
+        return int(value, 16)
+    return int(value)
+
+
+def _single_request(w3, method, params):
+    try:
+        return w3.provider.make_request(method, params)
+    except Exception as e:
+        _logger.warning(f"JSON-RPC call {method} failed: {e}")
+        return None
+
+
+def batch_request(w3, calls, chunk_size=100):
+    """
+    Ejecuta las llamadas JSON-RPC `calls` ([(method, params), ...]) en
+    peticiones batch de como mucho `chunk_size` llamadas.
+
+    Devuelve una lista alineada con `calls` con el `result` de cada respuesta,
+    o None si esa llamada falló. Si el proveedor no admite batch se hacen
+    llamadas individuales.
+    """
+    results = []
+    chunk_size = max(int(chunk_size or 1), 1)
+    for start in range(0, len(calls), chunk_size):
+        chunk = calls[start : start + chunk_size]
+        try:
+            responses = w3.provider.make_batch_request(chunk)
+        except Exception as e:
+            _logger.warning(f"JSON-RPC batch request failed, falling back: {e}")
+            responses = None
+
+        if not isinstance(responses, list) or len(responses) != len(chunk):
+            responses = [_single_request(w3, method, params) for method, params in chunk]
+
+        for response in responses:
+            if isinstance(response, dict) and not response.get("error"):
+                results.append(response.get("result"))
+            else:
+                results.append(None)
+    return results
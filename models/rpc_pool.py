@@ -0,0 +1,324 @@
+"""
+Varios endpoints JSON-RPC detrás de un único proveedor de web3.
+
+Cada endpoint lleva su latencia media y su tasa de error (EWMA) y un
+circuito que se abre tras varios fallos seguidos o al recibir un 429. Las
+lecturas se lanzan al endpoint mejor puntuado y, si tarda más de lo normal en
+él, también al siguiente (petición de respaldo): gana la primera respuesta.
+El resto de llamadas, incluido el envío de transacciones, pasa al siguiente
+endpoint solo si el anterior falla.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+import requests
+
+from . import metrics
+
+_logger = logging.getLogger(__name__)
+
+# Lecturas que pueden repetirse en otro endpoint sin efectos secundarios
+HEDGED_METHODS = frozenset(
+    {
+        "eth_blockNumber",
+        "eth_call",
+        "eth_chainId",
+        "eth_feeHistory",
+        "eth_getBalance",
+        "eth_getBlockByHash",
+        "eth_getBlockByNumber",
+        "eth_getLogs",
+        "eth_getTransactionByHash",
+        "eth_getTransactionReceipt",
+        "net_version",
+        "web3_clientVersion",
+    }
+)
+
+# Fallos seguidos que abren el circuito y tiempo que permanece abierto (se
+# duplica si el endpoint vuelve a fallar al reabrirse)
+FAILURE_THRESHOLD = 3
+OPEN_SECONDS = 30
+MAX_OPEN_SECONDS = 300
+# Espera ante un 429 sin cabecera Retry-After (se duplica en cada 429 seguido)
+RATE_LIMIT_BACKOFF = 2
+MAX_RATE_LIMIT_BACKOFF = 120
+# Códigos JSON-RPC con que algunos proveedores indican límite de peticiones
+RATE_LIMIT_CODES = {-32005, 429}
+
+EWMA_ALPHA = 0.2
+# Latencia supuesta de un endpoint que aún no ha respondido (segundos)
+DEFAULT_LATENCY = 0.5
+# La petición de respaldo sale tras HEDGE_FACTOR veces la latencia media del
+# endpoint elegido, dentro de estos límites (segundos)
+HEDGE_FACTOR = 3
+MIN_HEDGE_DELAY = 0.1
+MAX_HEDGE_DELAY = 2.0
+# Tiempo máximo de cada petición HTTP (segundos)
+REQUEST_TIMEOUT = 10
+
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="blockchain-rpc")
+
+
+class RateLimited(requests.ConnectionError):
+    """
+    El endpoint ha rechazado la petición por límite de peticiones.
+
+    Es un error de conexión (OSError): si todos los endpoints están limitados,
+    `is_connected()` de web3 devuelve False en lugar de propagar la excepción.
+    """
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _is_rate_limited(response):
+    responses = response if isinstance(response, list) else [response]
+    for item in responses:
+        error = isinstance(item, dict) and item.get("error")
+        if isinstance(error, dict):
+            message = str(error.get("message", "")).lower()
+            if error.get("code") in RATE_LIMIT_CODES or "rate limit" in message or "too many requests" in message:
+                return True
+    return False
+
+
+class Endpoint:
+    """Proveedor HTTP de un endpoint y su estado de salud"""
+
+    def __init__(self, index, url, provider):
+        self.index = index
+        self.url = url
+        # Solo el host: la ruta suele llevar la clave del proveedor
+        self.host = urlsplit(url).hostname or f"endpoint-{index}"
+        self.label = f"#{index} {self.host}"
+        self.provider = provider
+        self.latency = None
+        self.error_rate = 0.0
+        self.failures = 0
+        self.open_until = 0.0
+        self._open_seconds = OPEN_SECONDS
+        self._backoff = RATE_LIMIT_BACKOFF
+        self._lock = threading.Lock()
+
+    def available(self, now):
+        return now >= self.open_until
+
+    def score(self):
+        """Menor es mejor: latencia media penalizada por la tasa de error"""
+        latency = DEFAULT_LATENCY if self.latency is None else self.latency
+        return latency * (1 + 10 * self.error_rate)
+
+    def record_success(self, elapsed):
+        with self._lock:
+            if self.latency is None:
+                self.latency = elapsed
+            else:
+                self.latency += EWMA_ALPHA * (elapsed - self.latency)
+            self.error_rate *= 1 - EWMA_ALPHA
+            self.failures = 0
+            self._open_seconds = OPEN_SECONDS
+            self._backoff = RATE_LIMIT_BACKOFF
+
+    def record_failure(self, error, rate_limited=False, retry_after=None):
+        with self._lock:
+            self.error_rate += EWMA_ALPHA * (1 - self.error_rate)
+            self.failures += 1
+            now = time.monotonic()
+            if rate_limited:
+                pause = retry_after or self._backoff
+                self._backoff = min(self._backoff * 2, MAX_RATE_LIMIT_BACKOFF)
+                self.open_until = max(self.open_until, now + pause)
+                metrics.inc("blockchain_rpc_rate_limited_total", endpoint=self.host)
+                _logger.warning(f"RPC endpoint {self.label} rate limited, pausing {pause:.0f}s")
+            elif self.failures >= FAILURE_THRESHOLD:
+                self.open_until = now + self._open_seconds
+                _logger.warning(
+                    f"RPC endpoint {self.label} failed {self.failures} times in a row, "
+                    f"circuit open for {self._open_seconds}s: {error}"
+                )
+                self._open_seconds = min(self._open_seconds * 2, MAX_OPEN_SECONDS)
+                metrics.inc("blockchain_rpc_circuit_open_total", endpoint=self.host)
+
+    def call(self, method, params):
+        return self._send(lambda: self.provider.make_request(method, params))
+
+    def call_batch(self, calls):
+        return self._send(lambda: self.provider.make_batch_request(calls))
+
+    def _send(self, request):
+        started = time.perf_counter()
+        try:
+            response = request()
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status == 429:
+                self.record_failure(e, rate_limited=True, retry_after=_retry_after(e.response))
+            else:
+                self.record_failure(e)
+            raise
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        if _is_rate_limited(response):
+            self.record_failure("rate limited", rate_limited=True)
+            raise RateLimited(self.label)
+        # Un error JSON-RPC (p. ej. un revert) es una respuesta válida del nodo
+        self.record_success(time.perf_counter() - started)
+        return response
+
+
+class RpcPool:
+    """
+    Reparte las llamadas JSON-RPC entre endpoints según su salud.
+
+    `make_provider(url)` construye el proveedor HTTP de cada endpoint; el
+    primero de `urls` es el preferido mientras su puntuación empate.
+    """
+
+    def __init__(self, urls, make_provider):
+        self.endpoints = [Endpoint(i, url, make_provider(url)) for i, url in enumerate(urls)]
+
+    def ranked(self):
+        """Endpoints disponibles de mejor a peor (si no hay ninguno, el que antes se reabre)"""
+        now = time.monotonic()
+        available = [e for e in self.endpoints if e.available(now)]
+        if not available:
+            return sorted(self.endpoints, key=lambda e: e.open_until)
+        return sorted(available, key=lambda e: (e.score(), e.index))
+
+    def best_url(self):
+        return self.ranked()[0].url
+
+    def install(self, provider):
+        """Sustituye make_request/make_batch_request del proveedor de web3"""
+        provider.make_request = self.make_request
+        provider.make_batch_request = self.make_batch_request
+        return provider
+
+    def make_request(self, method, params):
+        if method in HEDGED_METHODS:
+            return self._hedged(lambda endpoint: endpoint.call(method, params))
+        if method == "eth_sendRawTransaction":
+            return self._send_raw_transaction(params)
+        return self._failover(lambda endpoint: endpoint.call(method, params))
+
+    def make_batch_request(self, calls):
+        if all(method in HEDGED_METHODS for method, _params in calls):
+            return self._hedged(lambda endpoint: endpoint.call_batch(calls))
+        return self._failover(lambda endpoint: endpoint.call_batch(calls))
+
+    def _failover(self, call):
+        """Prueba los endpoints en orden hasta que uno responde"""
+        error = None
+        for attempt, endpoint in enumerate(self.ranked()):
+            if attempt:
+                metrics.inc("blockchain_rpc_failovers_total")
+            try:
+                return call(endpoint)
+            except Exception as e:
+                error = e
+        raise error
+
+    def _hedged(self, call):
+        """
+        Lanza la llamada al mejor endpoint y, si no responde a tiempo o falla,
+        también al siguiente. Devuelve la primera respuesta.
+        """
+        ranked = self.ranked()
+        if len(ranked) == 1:
+            return call(ranked[0])
+
+        candidates = iter(ranked)
+        delay = min(max(HEDGE_FACTOR * (ranked[0].latency or DEFAULT_LATENCY), MIN_HEDGE_DELAY), MAX_HEDGE_DELAY)
+        running = set()
+        error = None
+
+        def launch():
+            endpoint = next(candidates, None)
+            if endpoint is not None:
+                running.add(_executor.submit(metrics.propagate(call), endpoint))
+            return endpoint is not None
+
+        launch()
+        hedged = False
+        while running:
+            done, _pending = wait(
+                running, timeout=None if hedged else delay, return_when=FIRST_COMPLETED
+            )
+            if not done:
+                # El endpoint elegido va lento: repetimos la lectura en el siguiente
+                hedged = True
+                if launch():
+                    metrics.inc("blockchain_rpc_hedged_total")
+                continue
+            for future in done:
+                running.discard(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    error = e
+            if launch():
+                metrics.inc("blockchain_rpc_failovers_total")
+        raise error
+
+    def _send_raw_transaction(self, params):
+        """
+        Difunde por el mejor endpoint y, si falla, por el siguiente. Si el
+        anterior llegó a difundirla antes de fallar, el siguiente la rechaza
+        como ya conocida: el hash se calcula de la transacción firmada.
+        """
+        error = None
+        for endpoint in self.ranked():
+            if error is not None:
+                metrics.inc("blockchain_rpc_failovers_total")
+                _logger.warning(f"Broadcasting through {endpoint.label} after error: {error}")
+            try:
+                response = endpoint.call("eth_sendRawTransaction", params)
+            except Exception as e:
+                error = e
+                continue
+            rpc_error = isinstance(response, dict) and response.get("error")
+            if error is not None and isinstance(rpc_error, dict) and "already known" in str(rpc_error.get("message", "")):
+                from eth_utils import keccak
+
+                return {
+                    "jsonrpc": "2.0",
+                    "id": response.get("id"),
+                    "result": "0x" + keccak(hexstr=params[0]).hex(),
+                }
+            return response
+        raise error
+
+    def probe(self):
+        """Comprueba cada endpoint por separado: [(etiqueta, error o None)]"""
+        results = []
+        for endpoint in self.endpoints:
+            try:
+                response = endpoint.call("eth_chainId", [])
+                error = isinstance(response, dict) and response.get("error")
+                results.append((endpoint.label, str(error) if error else None))
+            except Exception as e:
+                results.append((endpoint.label, str(e)))
+        return results
+
+    def health(self):
+        """Estado de cada endpoint para las métricas"""
+        now = time.monotonic()
+        return [
+            {
+                "endpoint": e.host,
+                "up": int(e.available(now)),
+                "latency": e.latency or 0.0,
+                "error_rate": e.error_rate,
+            }
+            for e in self.endpoints
+        ]
@@ -0,0 +1,111 @@
+"""
+Preparación de hashes y firma de transacciones por lotes.
+
+La firma secp256k1 y la codificación RLP son trabajo de CPU que, dentro del
+worker de Odoo, compite por el GIL con los hilos de envío. Con lotes grandes
+se reparten entre un pool de procesos; con lotes pequeños (o sin procesos
+configurados) se firma en el propio proceso, donde arrancar el pool costaría
+más que la firma.
+
+El pool usa spawn: un fork desde un worker con hilos (RPC, envío) puede
+heredar locks tomados. Los hijos no pueden importar el addon, así que la
+función de firma vive en lib/berpia_blockchain_sign_worker.py, que solo
+importa eth_account; cada hijo la carga desde su ruta al arrancar.
+"""
+
+import importlib.util
+import logging
+import multiprocessing
+import os
+import re
+import site
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+_logger = logging.getLogger(__name__)
+
+# Hash de documento: 32 bytes en hexadecimal, con o sin 0x
+_HASH_PATTERN = re.compile(r"(?:0x)?([0-9a-fA-F]{64})")
+
+# Por debajo de este número de transacciones se firma sin el pool
+MIN_POOL_BATCH = 32
+# Transacciones por tarea enviada a cada proceso
+SIGN_CHUNK_SIZE = 64
+
+WORKER_MODULE = "berpia_blockchain_sign_worker"
+WORKER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lib")
+
+_pool = {}
+_pool_lock = threading.Lock()
+
+
+def hashes_to_bytes32(values):
+    """
+    Convierte de una vez una lista de hashes hexadecimales en bytes32.
+
+    Devuelve una lista alineada con `values` con los bytes de cada hash o None
+    si no es un valor hexadecimal de 32 bytes. Todos los válidos se decodifican
+    con una única llamada a bytes.fromhex.
+    """
+    matches = [_HASH_PATTERN.fullmatch(v) if isinstance(v, str) else None for v in values]
+    raw = bytes.fromhex("".join(m.group(1) for m in matches if m))
+    chunks = (raw[i : i + 32] for i in range(0, len(raw), 32))
+    return [next(chunks) if m else None for m in matches]
+
+
+def _worker():
+    """
+    Módulo de firma cargado desde su ruta con su nombre de nivel superior, el
+    mismo con el que lo importan los hijos: así sign_chunk se serializa por
+    referencia sin pasar por odoo.addons.
+    """
+    module = sys.modules.get(WORKER_MODULE)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(
+            WORKER_MODULE, os.path.join(WORKER_DIR, f"{WORKER_MODULE}.py")
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules[WORKER_MODULE] = module
+    return module
+
+
+def _get_pool(processes):
+    """Pool de firma del proceso actual (se recrea tras un fork o si cambia el tamaño)"""
+    with _pool_lock:
+        key = (os.getpid(), processes)
+        if _pool.get("key") != key:
+            if _pool.get("executor") and _pool["key"][0] == os.getpid():
+                _pool["executor"].shutdown(wait=False)
+            # Cada hijo añade lib/ a su sys.path antes de recibir tareas
+            _pool["executor"] = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=site.addsitedir,
+                initargs=(WORKER_DIR,),
+            )
+            _pool["key"] = key
+        return _pool["executor"]
+
+
+def sign_transactions(items, processes=0):
+    """
+    Firma las transacciones [(clave privada, tx)] y devuelve, en el mismo
+    orden, [(raw_transaction, tx_hash, error)].
+
+    Con `processes` > 0 y al menos MIN_POOL_BATCH transacciones se firma en un
+    pool de ese tamaño; si el pool falla se firma en el propio proceso.
+    """
+    sign_chunk = _worker().sign_chunk
+    if processes <= 0 or len(items) < MIN_POOL_BATCH:
+        return sign_chunk(items)
+    chunks = [items[i : i + SIGN_CHUNK_SIZE] for i in range(0, len(items), SIGN_CHUNK_SIZE)]
+    try:
+        executor = _get_pool(processes)
+        return [signed for chunk in executor.map(sign_chunk, chunks) for signed in chunk]
+    except Exception as e:
+        _logger.warning(f"Signing pool unavailable, signing in-process: {e}")
+        with _pool_lock:
+            _pool.clear()
+        return sign_chunk(items)
@@ -0,0 +1,302 @@
+/*
+ * Web Worker de hash para el verificador público (/blockchain/verify).
+ *
+ * Lee el fichero por bloques con Blob.slice y alimenta un hash incremental, de
+ * modo que la memoria es constante sea cual sea el tamaño del documento y el
+ * hilo de la página no se bloquea. WebCrypto (crypto.subtle.digest) no admite
+ * hash incremental, por eso SHA-256 y Keccak-256 se implementan aquí.
+ *
+ * Mensajes de entrada: {id, file, algorithm: 'sha256' | 'keccak256', chunkSize}
+ * Mensajes de salida:  {id, type: 'progress', loaded, total}
+ *                      {id, type: 'done', hash: '0x...'}
+ *                      {id, type: 'error', message}
+ */
+
+'use strict';
+
+const CHUNK_SIZE = 4 * 1024 * 1024;
+
+function toHex(bytes) {
+    let hex = '';
+    for (let i = 0; i < bytes.length; i++) {
+        hex += (bytes[i] < 16 ? '0' : '') + bytes[i].toString(16);
+    }
+    return hex;
+}
+
+// --- SHA-256 (FIPS 180-4) ---
+
+const SHA256_K = new Int32Array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+]);
+
+class Sha256 {
+    constructor() {
+        this.state = new Int32Array([
+            0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+        ]);
+        this.block = new Uint8Array(64);
+        this.blockLength = 0;
+        this.length = 0;
+        this.w = new Int32Array(64);
+    }
+
+    update(data) {
+        let offset = 0;
+        this.length += data.length;
+        if (this.blockLength) {
+            const take = Math.min(64 - this.blockLength, data.length);
+            this.block.set(data.subarray(0, take), this.blockLength);
+            this.blockLength += take;
+            offset = take;
+            if (this.blockLength === 64) {
+                this._compress(this.block, 0);
+                this.blockLength = 0;
+            }
+        }
+        for (; offset + 64 <= data.length; offset += 64) {
+            this._compress(data, offset);
+        }
+        if (offset < data.length) {
+            this.block.set(data.subarray(offset), 0);
+            this.blockLength = data.length - offset;
+        }
+    }
+
+    _compress(data, offset) {
+        const w = this.w;
+        for (let i = 0; i < 16; i++) {
+            const j = offset + i * 4;
+            w[i] = (data[j] << 24) | (data[j + 1] << 16) | (data[j + 2] << 8) | data[j + 3];
+        }
+        for (let i = 16; i < 64; i++) {
+            const x = w[i - 15];
+            const y = w[i - 2];
+            const s0 = ((x >>> 7) | (x << 25)) ^ ((x >>> 18) | (x << 14)) ^ (x >>> 3);
+            const s1 = ((y >>> 17) | (y << 15)) ^ ((y >>> 19) | (y << 13)) ^ (y >>> 10);
+            w[i] = (w[i - 16] + s0 + w[i - 7] + s1) | 0;
+        }
+        const h = this.state;
+        let a = h[0], b = h[1], c = h[2], d = h[3], e = h[4], f = h[5], g = h[6], k = h[7];
+        for (let i = 0; i < 64; i++) {
+            const S1 = ((e >>> 6) | (e << 26)) ^ ((e >>> 11) | (e << 21)) ^ ((e >>> 25) | (e << 7));
+            const ch = (e & f) ^ (~e & g);
+            const t1 = (k + S1 + ch + SHA256_K[i] + w[i]) | 0;
+            const S0 = ((a >>> 2) | (a << 30)) ^ ((a >>> 13) | (a << 19)) ^ ((a >>> 22) | (a << 10));
+            const maj = (a & b) ^ (a & c) ^ (b & c);
+            const t2 = (S0 + maj) | 0;
+            k = g;
+            g = f;
+            f = e;
+            e = (d + t1) | 0;
+            d = c;
+            c = b;
+            b = a;
+            a = (t1 + t2) | 0;
+        }
+        h[0] += a;
+        h[1] += b;
+        h[2] += c;
+        h[3] += d;
+        h[4] += e;
+        h[5] += f;
+        h[6] += g;
+        h[7] += k;
+    }
+
+    hexdigest() {
+        // Relleno: 0x80, ceros y la longitud en bits (big-endian, 64 bits)
+        const length = this.length;
+        const padding = new Uint8Array((this.blockLength < 56 ? 64 : 128) - this.blockLength);
+        padding[0] = 0x80;
+        const view = new DataView(padding.buffer);
+        view.setUint32(padding.length - 8, Math.floor(length / 0x20000000));
+        view.setUint32(padding.length - 4, (length * 8) >>> 0);
+        this.update(padding);
+
+        const out = new Uint8Array(32);
+        const outView = new DataView(out.buffer);
+        this.state.forEach((word, i) => outView.setUint32(i * 4, word));
+        return toHex(out);
+    }
+}
+
+// --- Keccak-256 (el de Ethereum: padding 0x01, no el 0x06 de SHA3-256) ---
+
+// Constantes de ronda como pares [parte baja, parte alta] de 32 bits. Se usan
+// Int32Array en todo el estado: con Uint32Array los valores altos dejan de ser
+// enteros pequeños del motor JS y el cálculo es varias veces más lento.
+const KECCAK_RC = new Int32Array([
+    0x00000001, 0x00000000, 0x00008082, 0x00000000, 0x0000808a, 0x80000000, 0x80008000, 0x80000000,
+    0x0000808b, 0x00000000, 0x80000001, 0x00000000, 0x80008081, 0x80000000, 0x00008009, 0x80000000,
+    0x0000008a, 0x00000000, 0x00000088, 0x00000000, 0x80008009, 0x00000000, 0x8000000a, 0x00000000,
+    0x8000808b, 0x00000000, 0x0000008b, 0x80000000, 0x00008089, 0x80000000, 0x00008003, 0x80000000,
+    0x00008002, 0x80000000, 0x00000080, 0x80000000, 0x0000800a, 0x00000000, 0x8000000a, 0x80000000,
+    0x80008081, 0x80000000, 0x00008080, 0x80000000, 0x80000001, 0x00000000, 0x80008008, 0x80000000,
+]);
+// Rotación de cada carril (índice x + 5y)
+const KECCAK_ROTATION = [
+    0, 1, 62, 28, 27, 36, 44, 6, 55, 20, 3, 10, 43, 25, 39, 41, 45, 15, 21, 8, 18, 2, 61, 56, 14,
+];
+const KECCAK_RATE = 136;
+
+// Posiciones (en el array de pares de 32 bits) precalculadas para cada paso
+const KECCAK_PREV = new Uint8Array(10);
+const KECCAK_NEXT = new Uint8Array(10);
+const KECCAK_PI = new Uint8Array(25);
+const KECCAK_CHI1 = new Uint8Array(50);
+const KECCAK_CHI2 = new Uint8Array(50);
+for (let x = 0; x < 5; x++) {
+    KECCAK_PREV[2 * x] = ((x + 4) % 5) * 2;
+    KECCAK_NEXT[2 * x] = ((x + 1) % 5) * 2;
+    for (let y = 0; y < 5; y++) {
+        KECCAK_PI[x + 5 * y] = 2 * (y + 5 * ((2 * x + 3 * y) % 5));
+        KECCAK_CHI1[2 * (x + 5 * y)] = 2 * (((x + 1) % 5) + 5 * y);
+        KECCAK_CHI2[2 * (x + 5 * y)] = 2 * (((x + 2) % 5) + 5 * y);
+    }
+}
+
+class Keccak256 {
+    constructor() {
+        // 25 carriles de 64 bits como pares de 32 bits: [bajo, alto]
+        this.state = new Int32Array(50);
+        this.b = new Int32Array(50);
+        this.c = new Int32Array(10);
+        this.block = new Uint8Array(KECCAK_RATE);
+        this.blockLength = 0;
+    }
+
+    update(data) {
+        let offset = 0;
+        if (this.blockLength) {
+            const take = Math.min(KECCAK_RATE - this.blockLength, data.length);
+            this.block.set(data.subarray(0, take), this.blockLength);
+            this.blockLength += take;
+            offset = take;
+            if (this.blockLength === KECCAK_RATE) {
+                this._absorb(this.block, 0);
+                this.blockLength = 0;
+            }
+        }
+        for (; offset + KECCAK_RATE <= data.length; offset += KECCAK_RATE) {
+            this._absorb(data, offset);
+        }
+        if (offset < data.length) {
+            this.block.set(data.subarray(offset), 0);
+            this.blockLength = data.length - offset;
+        }
+    }
+
+    _absorb(data, offset) {
+        const s = this.state;
+        for (let i = 0; i < KECCAK_RATE / 4; i++) {
+            const j = offset + i * 4;
+            s[i] ^= data[j] | (data[j + 1] << 8) | (data[j + 2] << 16) | (data[j + 3] << 24);
+        }
+        this._permute();
+    }
+
+    _permute() {
+        const s = this.state;
+        const b = this.b;
+        const c = this.c;
+        for (let round = 0; round < 24; round++) {
+            // theta
+            for (let x = 0; x < 10; x += 2) {
+                c[x] = s[x] ^ s[x + 10] ^ s[x + 20] ^ s[x + 30] ^ s[x + 40];
+                c[x + 1] = s[x + 1] ^ s[x + 11] ^ s[x + 21] ^ s[x + 31] ^ s[x + 41];
+            }
+            for (let x = 0; x < 10; x += 2) {
+                const prev = KECCAK_PREV[x];
+                const next = KECCAK_NEXT[x];
+                const lo = c[prev] ^ ((c[next] << 1) | (c[next + 1] >>> 31));
+                const hi = c[prev + 1] ^ ((c[next + 1] << 1) | (c[next] >>> 31));
+                for (let y = x; y < 50; y += 10) {
+                    s[y] ^= lo;
+                    s[y + 1] ^= hi;
+                }
+            }
+            // rho + pi
+            for (let i = 0; i < 25; i++) {
+                const lo = s[2 * i];
+                const hi = s[2 * i + 1];
+                const to = KECCAK_PI[i];
+                const n = KECCAK_ROTATION[i];
+                if (n === 0) {
+                    b[to] = lo;
+                    b[to + 1] = hi;
+                } else if (n < 32) {
+                    b[to] = (lo << n) | (hi >>> (32 - n));
+                    b[to + 1] = (hi << n) | (lo >>> (32 - n));
+                } else {
+                    const m = n - 32;
+                    b[to] = (hi << m) | (lo >>> (32 - m));
+                    b[to + 1] = (lo << m) | (hi >>> (32 - m));
+                }
+            }
+            // chi
+            for (let i = 0; i < 50; i += 2) {
+                const i1 = KECCAK_CHI1[i];
+                const i2 = KECCAK_CHI2[i];
+                s[i] = b[i] ^ (~b[i1] & b[i2]);
+                s[i + 1] = b[i + 1] ^ (~b[i1 + 1] & b[i2 + 1]);
+            }
+            // iota
+            s[0] ^= KECCAK_RC[2 * round];
+            s[1] ^= KECCAK_RC[2 * round + 1];
+        }
+    }
+
+    hexdigest() {
+        const padding = new Uint8Array(KECCAK_RATE - this.blockLength);
+        padding[0] ^= 0x01;
+        padding[padding.length - 1] ^= 0x80;
+        this.update(padding);
+
+        const out = new Uint8Array(32);
+        const view = new DataView(out.buffer);
+        for (let i = 0; i < 8; i++) {
+            view.setUint32(i * 4, this.state[i], true);
+        }
+        return toHex(out);
+    }
+}
+
+function readChunk(blob) {
+    if (blob.arrayBuffer) {
+        return blob.arrayBuffer();
+    }
+    return Promise.resolve(new FileReaderSync().readAsArrayBuffer(blob));
+}
+
+async function hashFile(id, file, algorithm, chunkSize) {
+    const hasher = algorithm === 'keccak256' ? new Keccak256() : new Sha256();
+    const step = chunkSize || CHUNK_SIZE;
+    for (let offset = 0; offset < file.size; offset += step) {
+        const chunk = await readChunk(file.slice(offset, offset + step));
+        hasher.update(new Uint8Array(chunk));
+        self.postMessage({id, type: 'progress', loaded: Math.min(offset + step, file.size), total: file.size});
+    }
+    return '0x' + hasher.hexdigest();
+}
+
+// Los ficheros se procesan de uno en uno: un único bloque en memoria
+let queue = Promise.resolve();
+self.onmessage = (event) => {
+    const {id, file, algorithm, chunkSize} = event.data;
+    queue = queue.then(async () => {
+        try {
+            const hash = await hashFile(id, file, algorithm, chunkSize);
+            self.postMessage({id, type: 'done', hash});
+        } catch (error) {
+            self.postMessage({id, type: 'error', message: String((error && error.message) || error)});
+        }
+    });
+};
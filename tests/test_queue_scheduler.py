@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+from odoo.tests import BaseCase, tagged
+
+from ..models import queue_scheduler
+
+
+@tagged("post_install", "-at_install")
+class TestFairShare(BaseCase):
+    def test_low_weight_lanes_not_starved(self):
+        """Un carril de mucho peso y backlog enorme no deja a los demás a cero"""
+        lanes = {"urgent": (100, 10000), **{f"l{i}": (1, 500) for i in range(9)}}
+        shares = queue_scheduler.fair_share(10, lanes)
+        self.assertEqual(sum(shares.values()), 10)
+        self.assertTrue(all(shares[key] == 1 for key in lanes))
+
+        shares = queue_scheduler.fair_share(100, lanes)
+        self.assertEqual(sum(shares.values()), 100)
+        self.assertTrue(all(shares[f"l{i}"] >= 1 for i in range(9)))
+        self.assertEqual(shares["urgent"], 91)
+
+    def test_capacity_below_lane_count_serves_oldest(self):
+        """Sin capacidad para todos, la entrada mínima va a los que más esperan"""
+        start = datetime(2026, 1, 1)
+        lanes = {f"l{i}": (1, 10) for i in range(6)}
+        waiting = {key: start + timedelta(minutes=i) for i, key in enumerate(lanes)}
+        waiting["urgent"] = start + timedelta(hours=1)
+        lanes["urgent"] = (100, 10000)
+        shares = queue_scheduler.fair_share(3, lanes, waiting)
+        self.assertEqual({key for key, share in shares.items() if share}, {"l0", "l1", "l2"})
+
+        # En el ciclo siguiente los atendidos tienen entradas más recientes
+        for key in ("l0", "l1", "l2"):
+            waiting[key] = start + timedelta(hours=2)
+        shares = queue_scheduler.fair_share(3, lanes, waiting)
+        self.assertEqual({key for key, share in shares.items() if share}, {"l3", "l4", "l5"})
+
+    def test_leftover_goes_to_lanes_with_backlog(self):
+        shares = queue_scheduler.fair_share(7, {"a": (3, 2), "b": (1, 50), "off": (0, 9)})
+        self.assertEqual(shares, {"a": 2, "b": 5, "off": 0})